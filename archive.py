@@ -0,0 +1,288 @@
+"""
+Archive of the receipts stored by the printer (receipt_*.txt files).
+The closed receipts are rolled into compressed segments, then removed from the
+working directory. The receipts are highly repetitive (title, separators, labels,
+names of the burgers): each segment holds a zlib preset dictionary sampled from
+its first receipts, and each receipt is compressed as its own zlib stream with
+that dictionary. A single receipt is then extracted by reading and decompressing
+its own bytes only, located through the index of the segment.
+
+Layout of the archive folder:
+. archive_00001.seg: the dictionary followed by the compressed receipts
+. archive_00001.idx: JSON index {'dictionary': [offset, length],
+                                 'receipts': {order id: [[offset, length, size], ...]}}
+The order IDs are random hence reused: an order ID lists all its receipts of the
+segment, in the order they were archived.
+A segment is appended to until it is full, then a new one is started.
+
+The archiver runs in a background thread: the printer keeps on storing plain
+receipts and is never blocked by the compression.
+
+    archive = ReceiptArchive('archive')
+    archive.start(interval=60)
+    ...
+    archive.extract(26500)
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["ReceiptArchive"]
+
+from time import time
+import threading
+import zlib
+import json
+import glob
+import os
+import re
+
+_RECEIPT = re.compile(r'receipt_(\d+)\.txt$')
+
+
+def _fsync_directory(path):
+    """Make the entries created or renamed in the folder durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Segment():
+    """One segment file and its index"""
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path[:-len('.seg')] + '.idx'
+        self.dictionary = None
+        self.receipts = {} # order id -> [[offset, length, size], ...] in archive order
+        self.count = 0
+        self.end = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as fd:
+                index = json.loads(fd.read())
+            offset, length = index['dictionary']
+            self.receipts = {int(id): entries for id, entries in index['receipts'].items()}
+            self.count = sum(len(entries) for entries in self.receipts.values())
+            with open(self.path, 'rb') as fd:
+                fd.seek(offset)
+                self.dictionary = fd.read(length)
+            # bytes beyond the last indexed receipt are from an interrupted roll
+            self.end = max([offset + length] + [o + n for o, n, _ in self.entries()])
+
+    def __len__(self):
+        """Number of receipts, an order ID counting as many times as it was archived"""
+        return self.count
+
+    def entries(self):
+        """[offset, length, size] of all the receipts"""
+        return [entry for entries in self.receipts.values() for entry in entries]
+
+    def size(self):
+        return self.end
+
+    def create(self, dictionary):
+        self.dictionary = dictionary
+        with open(self.path, 'wb') as fd:
+            fd.write(dictionary)
+        self.end = len(dictionary)
+
+    def append(self, receipts):
+        """Append the compressed (order id, data) receipts, then update the index"""
+        with open(self.path, 'r+b') as fd:
+            fd.seek(self.end)
+            for id, data in receipts:
+                compressor = zlib.compressobj(level=9, zdict=self.dictionary)
+                compressed = compressor.compress(data) + compressor.flush()
+                fd.write(compressed)
+                self.receipts.setdefault(id, []).append([self.end, len(compressed), len(data)])
+                self.count += 1
+                self.end += len(compressed)
+            fd.flush()
+            os.fsync(fd.fileno())
+        self._write_index()
+
+    def _write_index(self):
+        index = {'dictionary': [0, len(self.dictionary)], 'receipts': self.receipts}
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'w') as fd:
+            fd.write(json.dumps(index))
+            fd.flush()
+            os.fsync(fd.fileno())
+        os.replace(temporary, self.index_path)
+        # the receipts are removed once indexed: the index must survive a power loss
+        _fsync_directory(os.path.dirname(self.index_path) or '.')
+
+    def extract(self, entry):
+        offset, length, size = entry
+        with open(self.path, 'rb') as fd:
+            fd.seek(offset)
+            compressed = fd.read(length)
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(compressed) + decompressor.flush()
+
+
+class ReceiptArchive():
+    """Compressed and rotating archive of the receipts.
+    . source: folder of the receipt_*.txt files, the working directory by default
+    . max_receipts, max_bytes: a segment is full beyond any of these
+    . min_age: age in seconds of a receipt file before it is considered closed
+    . dictionary_size: maximum size of the preset dictionary of a segment
+    """
+    def __init__(self, folder, source='.', max_receipts=10_000, max_bytes=2**24, min_age=5.0, dictionary_size=2**15):
+        self._folder = folder
+        self._source = source
+        self._max_receipts = max_receipts
+        self._max_bytes = max_bytes
+        self._min_age = min_age
+        self._dictionary_size = dictionary_size
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        os.makedirs(folder, exist_ok=True)
+        self._segments = []
+        for path in sorted(glob.glob(os.path.join(folder, 'archive_*.seg'))):
+            segment = _Segment(path)
+            if segment.dictionary is None:
+                # no index: interrupted right after its creation, before any receipt
+                # was indexed hence removed, the next segment replaces it
+                os.remove(path)
+                continue
+            self._segments.append(segment)
+
+    def __len__(self):
+        return sum(len(segment) for segment in self._segments)
+
+    def __contains__(self, id):
+        return any(id in segment.receipts for segment in self._segments)
+
+    def ids(self):
+        """Order IDs of the archived receipts"""
+        return sorted({id for segment in self._segments for id in segment.receipts})
+
+    def segments(self):
+        """Paths of the segment files, oldest first"""
+        return [segment.path for segment in self._segments]
+
+    def closed_receipts(self):
+        """[(order id, path)] of the receipts old enough to be archived, oldest first"""
+        now = time()
+        closed = []
+        for path in glob.glob(os.path.join(self._source, 'receipt_*.txt')):
+            match = _RECEIPT.search(path)
+            if not match:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            if now - mtime >= self._min_age:
+                closed.append((mtime, int(match.group(1)), path))
+        return [(id, path) for _, id, path in sorted(closed)]
+
+    def _dictionary(self, samples):
+        """Preset dictionary from the first receipts: zlib favours the end of the
+        dictionary, so the content is packed up to the maximum size"""
+        dictionary = b''.join(samples)
+        return dictionary[-self._dictionary_size:]
+
+    def _new_segment(self, samples):
+        number = int(os.path.basename(self._segments[-1].path)[len('archive_'):-len('.seg')]) + 1 if self._segments else 1
+        segment = _Segment(os.path.join(self._folder, f'archive_{number:05d}.seg'))
+        segment.create(self._dictionary(samples))
+        self._segments.append(segment)
+        return segment
+
+    def _full(self, segment):
+        return len(segment) >= self._max_receipts or segment.size() >= self._max_bytes
+
+    def roll(self):
+        """Archive the closed receipts, then remove their files.
+        Returns the number of receipts archived."""
+        with self._lock:
+            pending = []
+            for id, path in self.closed_receipts():
+                with open(path, 'rb') as fd:
+                    pending.append((id, path, fd.read()))
+            archived = 0
+            while archived < len(pending):
+                segment = self._segments[-1] if self._segments else None
+                if segment is None or self._full(segment):
+                    segment = self._new_segment(data for _, _, data in pending[archived:archived+16])
+                room = self._max_receipts - len(segment)
+                batch = pending[archived:archived+room]
+                segment.append([(id, data) for id, _, data in batch])
+                archived += len(batch)
+            # only once the receipts are safely indexed
+            for _, path, _ in pending:
+                os.remove(path)
+            return archived
+
+    def count(self, id):
+        """Number of receipts archived under the order id, the IDs being reused"""
+        with self._lock:
+            return sum(len(segment.receipts.get(id, ())) for segment in self._segments)
+
+    def extract(self, id, n=-1):
+        """Text of the n-th receipt archived under the order id, in archive order:
+        the most recent one by default, the IDs being reused (see count).
+        Raises KeyError if the receipt is not archived."""
+        with self._lock:
+            found = [(segment, entry) for segment in self._segments for entry in segment.receipts.get(id, ())]
+            try:
+                segment, entry = found[n]
+            except IndexError:
+                raise KeyError(id) from None
+            return segment.extract(entry).decode('utf-8')
+
+    def stats(self):
+        """{'receipts', 'segments', 'size', 'compressed', 'dictionaries'}: sizes in bytes"""
+        with self._lock:
+            return {
+                'receipts': len(self),
+                'segments': len(self._segments),
+                'size': sum(size for segment in self._segments for _, _, size in segment.entries()),
+                'compressed': sum(length for segment in self._segments for _, length, _ in segment.entries()),
+                'dictionaries': sum(len(segment.dictionary) for segment in self._segments),
+            }
+
+    def start(self, interval=60.0):
+        """Roll the receipts every interval seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='receipt-archive', daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stopping.wait(interval):
+            self.roll()
+
+    def stop(self, flush=True):
+        """Stop the background thread, archiving the last closed receipts if flush"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.roll()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('folder', help='archive folder')
+    parser.add_argument('--source', default='.', help='folder of the receipt_*.txt files')
+    parser.add_argument('--min-age', type=float, default=5.0)
+    parser.add_argument('--extract', type=int, help='order id of the receipt to print')
+    parser.add_argument('--nth', type=int, default=-1, help='receipt of the order id, in archive order, the last one by default')
+    args = parser.parse_args()
+
+    archive = ReceiptArchive(args.folder, args.source, min_age=args.min_age)
+    if args.extract is not None:
+        print(archive.extract(args.extract, args.nth), end='')
+    else:
+        print(f'{archive.roll()} receipts archived')
+        print(archive.stats())
+
+
+if __name__ == "__main__":
+    main()
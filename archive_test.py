@@ -0,0 +1,126 @@
+"""Test the package archive"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from archive import *
+from order import Order
+from printer import VectoredReceipt
+import unittest
+import tempfile
+import shutil
+import threading
+import os
+
+
+class TestReceiptArchive(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.TemporaryDirectory()
+        shutil.copy('burger.json.txt', self._folder.name)
+        os.chdir(self._folder.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._folder.cleanup()
+
+    def receipts(self, n):
+        """Store n receipts, returns {order id: text}"""
+        texts = {}
+        while len(texts) < n:
+            order = Order()
+            order.add_batch([(len(texts) % 5 + 1, 2), (3, 1)])
+            order.tax_rate = 0.09
+            order.compute()
+            VectoredReceipt(order).store()
+            with open(f'receipt_{order.id}.txt', 'r', encoding='utf-8') as fd:
+                texts[order.id] = fd.read()
+        return texts
+
+    def test_roll_extract(self):
+        texts = self.receipts(20)
+        archive = ReceiptArchive('archive', min_age=0)
+        self.assertEqual(archive.roll(), 20)
+        self.assertEqual(len(archive), 20)
+        self.assertEqual([f for f in os.listdir('.') if f.startswith('receipt_')], [])
+        self.assertTrue(os.path.exists('burger.json.txt'))
+        for id, text in texts.items():
+            self.assertIn(id, archive)
+            self.assertEqual(archive.extract(id), text)
+        with self.assertRaises(KeyError):
+            archive.extract(-1)
+
+        stats = archive.stats()
+        self.assertEqual(stats['segments'], 1)
+        self.assertLess(stats['compressed'], stats['size'] / 2)
+
+        # nothing new to archive
+        self.assertEqual(archive.roll(), 0)
+
+        # reopened from the files
+        archive = ReceiptArchive('archive', min_age=0)
+        self.assertEqual(archive.ids(), sorted(texts))
+        self.assertEqual(archive.extract(min(texts)), texts[min(texts)])
+
+    def test_rotation(self):
+        texts = self.receipts(7)
+        archive = ReceiptArchive('archive', max_receipts=3, min_age=0)
+        archive.roll()
+        self.assertEqual(len(archive.segments()), 3)
+        texts.update(self.receipts(2))
+        archive.roll()
+        # the last segment was completed before a new one
+        self.assertEqual(len(archive.segments()), 3)
+        self.assertEqual(len(archive), 9)
+        for id, text in texts.items():
+            self.assertEqual(archive.extract(id), text)
+
+    def test_reused_order_id(self):
+        archive = ReceiptArchive('archive', min_age=0)
+        for text in ['first receipt\n', 'second receipt\n']:
+            with open('receipt_12345.txt', 'w') as fd:
+                fd.write(text)
+            self.assertEqual(archive.roll(), 1)
+        self.assertEqual(len(archive), 2)
+        self.assertEqual(archive.stats()['receipts'], 2)
+        self.assertEqual(archive.count(12345), 2)
+        self.assertEqual(archive.extract(12345), 'second receipt\n')
+        self.assertEqual(archive.extract(12345, 0), 'first receipt\n')
+        with self.assertRaises(KeyError):
+            archive.extract(12345, 2)
+
+        # reopened from the files
+        archive = ReceiptArchive('archive', min_age=0)
+        self.assertEqual(archive.count(12345), 2)
+        self.assertEqual(archive.extract(12345, 0), 'first receipt\n')
+
+    def test_segment_without_index(self):
+        texts = self.receipts(3)
+        os.makedirs('archive')
+        # interrupted after the creation of the segment, before its index
+        with open(os.path.join('archive', 'archive_00001.seg'), 'wb') as fd:
+            fd.write(b'dictionary')
+        archive = ReceiptArchive('archive', min_age=0)
+        self.assertEqual(archive.segments(), [])
+        self.assertEqual(archive.roll(), 3)
+        self.assertEqual(archive.segments(), [os.path.join('archive', 'archive_00001.seg')])
+        for id, text in texts.items():
+            self.assertEqual(archive.extract(id), text)
+
+    def test_min_age(self):
+        self.receipts(3)
+        archive = ReceiptArchive('archive', min_age=3600)
+        self.assertEqual(archive.roll(), 0)
+        self.assertEqual(len([f for f in os.listdir('.') if f.startswith('receipt_')]), 3)
+
+    def test_background(self):
+        texts = self.receipts(5)
+        archive = ReceiptArchive('archive', min_age=0)
+        archive.start(interval=0.01)
+        self.assertTrue(any(t.name == 'receipt-archive' for t in threading.enumerate()))
+        archive.stop()
+        self.assertEqual(archive.ids(), sorted(texts))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,228 @@
+"""
+Benchmark suite of the main data structures of the system, at scale.
+Each benchmark builds its data structure at a given size, then times a few
+operations on it. The results are stored as JSON to compare the runs and catch
+the regressions:
+
+    python benchmark.py --sizes 10 100 1000 10000 --output bench.json
+    python benchmark.py --output new.json --compare bench.json
+
+Sizes up to 10^6 are supported, but some operations of the LinkedBag based
+structures are O(n) per call: the number of calls timed is scaled down with
+the size to keep a run within minutes. The transactions are those of the Order,
+the persistent ones: the LinkedBag based Transactions are no longer used.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["run", "compare", "BENCHMARKS"]
+
+from linkedbag import LinkedBag
+from transaction import Transaction
+from persistent import PersistentTransactions
+from menuitem import Burger
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from contextlib import redirect_stdout
+from datetime import datetime
+from time import perf_counter
+import argparse
+import platform
+import json
+import io
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000]
+REPEAT = 3
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark: a function of the size returning {operation: seconds per call}"""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, number):
+    """Best time per call of fn over REPEAT rounds of number calls"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (perf_counter() - start) / number)
+    return best
+
+def calls(size, budget=100_000):
+    """Number of calls timed for an O(size) operation"""
+    return max(1, min(1_000, budget // size))
+
+def synthetic_items(size):
+    return [Burger(f'burger {i}', 1.0 + (i % 997) / 100) for i in range(size)]
+
+def synthetic_menu(size):
+    menu = Menu()
+    menu.load_records([{'name': item.name, 'price': item.price} for item in synthetic_items(size)])
+    return menu
+
+def synthetic_transactions(items, quantity=1):
+    """PersistentTransactions of the items, O(log n) per line"""
+    ts = PersistentTransactions()
+    for item in items:
+        ts = ts.add(Transaction(item, quantity))
+    return ts
+
+
+@benchmark('linkedbag')
+def bench_linkedbag(size):
+    bag = LinkedBag(list(range(size)))
+    grow = LinkedBag(list(range(size))) # add() is timed apart, not to skew the other operations
+    last = size - 1
+    n = calls(size)
+    def remove_add():
+        bag.remove(last)
+        bag.add(last)
+    return {
+        'add': measure(lambda: grow.add(-1), 1_000),
+        'contains': measure(lambda: last in bag, n),
+        'count': measure(lambda: bag.count(last), n),
+        'remove': measure(remove_add, n),
+        'extend': measure(lambda: LinkedBag().extend(range(size)), calls(size, 1_000_000)),
+    }
+
+
+@benchmark('persistent')
+def bench_persistent(size):
+    items = synthetic_items(size)
+    ts = synthetic_transactions(items)
+    last = items[-1]
+    new = Burger('new burger', 1.0)
+    # each edit returns a new version, ts is left as is: the size does not drift
+    return {
+        'add_new': measure(lambda: ts.add(Transaction(new, 1)), 1_000),
+        'add_existing': measure(lambda: ts.add(Transaction(last, 1)), 1_000),
+        'update': measure(lambda: ts.update(Transaction(last, 2)), 1_000),
+        'delete': measure(lambda: ts.delete(Transaction(last, 0)), 1_000),
+        'getitem_id': measure(lambda: ts[size], 1_000),
+        'getitem_item': measure(lambda: ts[last], 1_000),
+        'iterate': measure(lambda: sum(1 for _ in ts), calls(size, 1_000_000)),
+    }
+
+
+@benchmark('menu')
+def bench_menu(size):
+    menu = synthetic_menu(size)
+    keyed = MenuDecoratorForOrder(menu)
+    n = calls(size)
+    return {
+        'decorator': measure(lambda: MenuDecoratorForOrder(menu), calls(size, 1_000_000)),
+        'lookup': measure(lambda: keyed[size], n),
+        'render': measure(lambda: str(keyed), calls(size, 10_000)),
+    }
+
+
+def _order(size):
+    """An Order holding size transactions, priced and taxed"""
+    from order import Order
+    order = Order()
+    order.resume(order.id, synthetic_transactions(synthetic_items(size), 2))
+    order.tax_rate = 0.09
+    return order
+
+@benchmark('order')
+def bench_order(size):
+    from order import Order
+    order = _order(size)
+    return {
+        'compute': measure(order.compute, calls(size, 1_000_000)),
+        'new_session': measure(lambda: Order(menu=order.menu), 1_000),
+        'reset_session': measure(lambda: order.reset(), 1_000),
+    }
+
+
+@benchmark('printer')
+def bench_printer(size):
+    import printer
+    order = _order(size)
+    order.compute()
+    n = calls(size, 10_000)
+    sink = io.StringIO()
+    results = {}
+    skins = {
+        'pretty': lambda: printer.PrettyPrint(order).issue(),
+        'ongoing_basic': lambda: printer._PrintOnGoingOrderBasic(order).issue(),
+        'ongoing_pandas': lambda: printer._PrintOnGoingOrderPandas(order).issue(),
+    }
+    for name, skin in skins.items():
+        if name == 'ongoing_pandas' and size > 10_000:
+            # one DataFrame.loc insertion per line, far too slow beyond that
+            continue
+        with redirect_stdout(sink):
+            # about 10 ms per pandas call even for a few lines
+            results[name] = measure(skin, calls(size, 100) if name == 'ongoing_pandas' else n)
+        sink.seek(0)
+        sink.truncate()
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, names=None, verbose=True):
+    """Run the benchmarks, returns the results as a JSON-ready dict"""
+    results = []
+    for name, fn in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for size in sizes:
+            for operation, seconds in fn(size).items():
+                results.append({'benchmark': name, 'operation': operation, 'size': size, 'seconds_per_call': seconds})
+                if verbose:
+                    print(f'{name:>12s} {operation:>15s} {size:>8d}: {seconds*1e6:12.2f} us')
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'sizes': list(sizes),
+        },
+        'results': results,
+    }
+
+
+def compare(previous, current, threshold=1.25):
+    """List the (benchmark, operation, size, ratio) slower than threshold times the previous run"""
+    reference = {(r['benchmark'], r['operation'], r['size']): r['seconds_per_call'] for r in previous['results']}
+    regressions = []
+    for r in current['results']:
+        key = (r['benchmark'], r['operation'], r['size'])
+        if key in reference and reference[key] > 0:
+            ratio = r['seconds_per_call'] / reference[key]
+            if ratio > threshold:
+                regressions.append(key + (ratio,))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', help='previous JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.only)
+    with open(args.output, 'w') as fd:
+        fd.write(json.dumps(results, indent=2))
+    print(f'results stored in {args.output}')
+
+    if args.compare:
+        with open(args.compare, 'r') as fd:
+            previous = json.loads(fd.read())
+        regressions = compare(previous, results, args.threshold)
+        for name, operation, size, ratio in regressions:
+            print(f'REGRESSION {name} {operation} @{size}: x{ratio:.2f}')
+        if regressions:
+            exit(1)
+
+
+if __name__ == "__main__":
+    main()
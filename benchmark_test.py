@@ -0,0 +1,43 @@
+"""Test the benchmark suite itself, at a tiny size"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+import unittest
+import json
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run(self):
+        results = benchmark.run([10], verbose=False)
+        json.dumps(results)
+        self.assertEqual(results['meta']['sizes'], [10])
+        # every registered benchmark ran
+        self.assertEqual({r['benchmark'] for r in results['results']}, set(benchmark.BENCHMARKS))
+        operations = {(r['benchmark'], r['operation']) for r in results['results']}
+        for expected in [('linkedbag', 'add'), ('linkedbag', 'remove'), ('persistent', 'getitem_id'), ('menu', 'render'),
+                         ('order', 'compute'), ('order', 'reset_session'), ('printer', 'pretty'), ('printer', 'ongoing_pandas')]:
+            self.assertIn(expected, operations)
+        self.assertTrue(all(r['seconds_per_call'] > 0 for r in results['results']))
+
+    def test_only(self):
+        results = benchmark.run([10], ['persistent'], verbose=False)
+        self.assertEqual({r['benchmark'] for r in results['results']}, {'persistent'})
+
+    def test_compare(self):
+        previous = {'results': [
+            {'benchmark': 'b', 'operation': 'op', 'size': 10, 'seconds_per_call': 1.0},
+            {'benchmark': 'b', 'operation': 'op', 'size': 100, 'seconds_per_call': 1.0},
+        ]}
+        current = {'results': [
+            {'benchmark': 'b', 'operation': 'op', 'size': 10, 'seconds_per_call': 1.1},
+            {'benchmark': 'b', 'operation': 'op', 'size': 100, 'seconds_per_call': 2.0},
+            {'benchmark': 'b', 'operation': 'new', 'size': 10, 'seconds_per_call': 9.0},
+        ]}
+        self.assertEqual(benchmark.compare(previous, current), [('b', 'op', 100, 2.0)])
+        self.assertEqual(benchmark.compare(previous, current, threshold=3), [])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,125 @@
+"""
+Checkpoint of the order in progress, to resume it if the register process dies.
+Pickling the Order would drag the menu along: the checkpoint only holds the order ID
+and, per line, its ID, the key of the menu item, the quantity and the item name,
+packed with struct:
+
+. header: magic b'OCKP', format version, order ID, number of lines
+. lines: (line ID, menu key, quantity, length of the name) then the UTF-8 name, each
+. trailer: CRC32 of all the above, to detect a torn write
+
+The order is restored against the menu of the new process (see ItemMatcher): a line
+is matched by its key, or by the name of its item if the key changed, and is dropped
+if the item is no longer on the menu. A checkpoint costs a few microseconds to pack and one
+small file write: it is taken after each edit of the order.
+
+    order = Order(checkpoint=Checkpoint('register_1.ckpt'))
+    if not order.checkpoint.restore(order): ...
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["Checkpoint", "dumps", "loads"]
+
+from transaction import Transaction
+from menu4order import ItemMatcher
+from persistent import PersistentTransactions
+from zlib import crc32
+import struct
+import os
+
+_HEADER = struct.Struct('<4sBII')
+_LINE = struct.Struct('<IIIH')
+_TRAILER = struct.Struct('<I')
+_MAGIC = b'OCKP'
+_VERSION = 3 # 2: 32-bit quantities, 3: names instead of their CRC32
+
+
+def dumps(order):
+    """Binary checkpoint of an order"""
+    keys = order.menu._keys
+    lines = [(t, t.item.name.encode()) for t in order.transactions]
+    buf = bytearray(_HEADER.size + sum(_LINE.size + len(name) for _, name in lines) + _TRAILER.size)
+    _HEADER.pack_into(buf, 0, _MAGIC, _VERSION, order.id, len(lines))
+    offset = _HEADER.size
+    for t, name in lines:
+        _LINE.pack_into(buf, offset, t.id, keys[t.item], t.quantity, len(name))
+        offset += _LINE.size
+        buf[offset:offset+len(name)] = name
+        offset += len(name)
+    _TRAILER.pack_into(buf, offset, crc32(memoryview(buf)[:offset]))
+    return bytes(buf)
+
+
+def loads(data, menu):
+    """(order ID, [(line ID, menu item, quantity)], number of lines dropped) of a checkpoint,
+    matched against the keyed menu. Raises ValueError if the checkpoint is corrupted."""
+    if len(data) < _HEADER.size + _TRAILER.size:
+        raise ValueError('truncated checkpoint')
+    magic, version, order_id, n = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('not a checkpoint of this version')
+    end = len(data) - _TRAILER.size
+    if _TRAILER.unpack_from(data, end)[0] != crc32(memoryview(data)[:end]):
+        raise ValueError('corrupted checkpoint')
+
+    match = ItemMatcher(menu)
+    lines = []
+    offset = _HEADER.size
+    for _ in range(n):
+        if offset + _LINE.size > end:
+            raise ValueError('truncated checkpoint')
+        line_id, key, quantity, length = _LINE.unpack_from(data, offset)
+        offset += _LINE.size
+        name = bytes(data[offset:offset+length]).decode()
+        offset += length
+        item = match(key, name)
+        if item is not None:
+            lines.append((line_id, item, quantity))
+    if offset != end:
+        raise ValueError('not a checkpoint of this version')
+    return order_id, sorted(lines, key=lambda line: line[0]), n - len(lines)
+
+
+class Checkpoint():
+    """Checkpoint file of a register, replaced atomically at each save.
+    fsync: also survive a power loss, at the cost of a disk flush per save."""
+    def __init__(self, file, fsync=False):
+        self._file = file
+        self._temporary = file + '.tmp'
+        self._fsync = fsync
+
+    def save(self, order):
+        data = dumps(order)
+        fd = os.open(self._temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+            if self._fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(self._temporary, self._file)
+
+    def clear(self):
+        """Forget the checkpoint, once the order is finalized or cancelled"""
+        try:
+            os.remove(self._file)
+        except FileNotFoundError:
+            pass
+
+    def exists(self):
+        return os.path.exists(self._file)
+
+    def restore(self, order):
+        """Resume the checkpointed order into order, a fresh one.
+        Returns the number of lines dropped, None if there is nothing to restore."""
+        try:
+            with open(self._file, 'rb') as fd:
+                data = fd.read()
+            order_id, lines, dropped = loads(data, order.menu)
+        except (FileNotFoundError, ValueError):
+            return None
+        transactions = PersistentTransactions()
+        for _, item, quantity in lines:
+            transactions = transactions.add(Transaction(item, quantity))
+        order.resume(order_id, transactions)
+        return dropped
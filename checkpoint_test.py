@@ -0,0 +1,100 @@
+"""Test the package checkpoint"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from checkpoint import *
+from order import Order, OrderTermination
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from questionio import QueueIO
+from unittest.mock import patch
+import unittest
+import tempfile
+import os
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._folder.name, 'register.ckpt')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def lines(self, order):
+        return [(t.id, t.item.name, t.quantity) for t in order.transactions]
+
+    def test_dumps_loads(self):
+        order = Order()
+        order.add_batch([(4, 15), (2, 3), (5, 1)])
+        data = dumps(order)
+        self.assertEqual(len(data), 13 + 3*14 + sum(len(t.item.name) for t in order.transactions) + 4)
+        order_id, lines, dropped = loads(data, order.menu)
+        self.assertEqual(order_id, order.id)
+        self.assertEqual(dropped, 0)
+        self.assertEqual([(id, item.name, quantity) for id, item, quantity in lines], self.lines(order))
+
+        with self.assertRaises(ValueError):
+            loads(data[:-1], order.menu)
+        corrupted = bytearray(data)
+        corrupted[20] ^= 0xFF
+        with self.assertRaises(ValueError):
+            loads(bytes(corrupted), order.menu)
+
+    def test_large_quantity(self):
+        order = Order()
+        order.add_batch([(1, 50000), (1, 50000)])
+        _, lines, _ = loads(dumps(order), order.menu)
+        self.assertEqual(lines[0][2], 100000)
+
+    def test_changed_menu(self):
+        order = Order()
+        order.add_batch([(1, 2), (3, 4)])
+        data = dumps(order)
+        # "Mushroom Swiss" moved from key 3 to key 2, "de Anza Burger" was removed
+        menu = Menu()
+        menu.load_records([{'name': 'Bacon Cheese', 'price': 5.75}, {'name': 'Mushroom Swiss', 'price': 6.25}])
+        _, lines, dropped = loads(data, MenuDecoratorForOrder(menu))
+        self.assertEqual(dropped, 1)
+        self.assertEqual([(item.name, item.price, quantity) for _, item, quantity in lines], [('Mushroom Swiss', 6.25, 4)])
+
+    def test_name_collision(self):
+        # "plumless" and "buckeroo" have the same CRC32 and swapped keys
+        menu = Menu()
+        menu.load_records([{'name': 'plumless', 'price': 1}, {'name': 'buckeroo', 'price': 2}])
+        order = Order(menu=MenuDecoratorForOrder(menu))
+        order.add_batch([(1, 3)])
+        data = dumps(order)
+        menu = Menu()
+        menu.load_records([{'name': 'buckeroo', 'price': 2}, {'name': 'plumless', 'price': 1}])
+        _, lines, dropped = loads(data, MenuDecoratorForOrder(menu))
+        self.assertEqual(dropped, 0)
+        self.assertEqual([(item.name, quantity) for _, item, quantity in lines], [('plumless', 3)])
+
+    @patch('builtins.print')
+    def test_resume(self, mocked_print):
+        checkpoint = Checkpoint(self.file)
+        order = Order(checkpoint=checkpoint)
+        order.add_batch([(2, 5), (4, 1)])
+        self.assertTrue(checkpoint.exists())
+        order.undo()
+        order.redo()
+
+        # the register dies, a new process resumes the order
+        resumed = Order(checkpoint=checkpoint, io=QueueIO(["1", "1", "11"]))
+        self.assertEqual(checkpoint.restore(resumed), 0)
+        self.assertEqual(resumed.id, order.id)
+        self.assertEqual(self.lines(resumed), self.lines(order))
+
+        # the order goes on, then is cancelled: nothing left to resume
+        try:
+            resumed.fill()
+        except OrderTermination:
+            pass
+        self.assertFalse(checkpoint.exists())
+        self.assertIsNone(checkpoint.restore(Order()))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,133 @@
+"""
+Implement a multiset bag for the BagInterface, using a hash-counted internal data structure.
+
+Unlike the LinkedBag, the order of insertion is not kept: two bags are equal
+when they hold the same items the same number of times. Counting an item is O(1)
+and the equality is O(n), regardless of the order of the items.
+The set algebra (union, intersection, difference) follows the multiset semantics.
+The items are expected to be hashable. As for the LinkedBag, a mapping is not a
+source of items: its values would be taken as multiplicities.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+from collections import Counter
+from collections.abc import Mapping
+from baginterface import BagInterface
+
+
+class CounterBag(BagInterface):
+    """Implement a multiset bag for the BagInterface, using a Counter internal data structure."""
+
+    def __init__(self, source = None):
+        self._counter = Counter()
+        self._len = 0
+        if source:
+            self.extend(source)
+
+    @classmethod
+    def _from_counter(cls, counter):
+        bag = cls()
+        bag._counter = counter
+        bag._len = sum(counter.values())
+        return bag
+
+    # Accessor methods
+    def __len__(self):
+        """Returns the number of items in self."""
+        return self._len
+
+    def __str__(self):
+        """Returns the string representation of self."""
+        return "{" + ", ".join([f'{x}: {n}' for x, n in self._counter.items()]) + "}"
+
+    def __iter__(self):
+        """Supports iteration over a view of self.
+        Each item is yielded as many times as it is in self."""
+        return self._counter.elements()
+
+    def __contains__(self, item):
+        return item in self._counter
+
+    def __add__(self, other):
+        """Returns a new bag containing the contents
+        of self and other."""
+        return CounterBag._from_counter(self._counter + self._as_counter(other))
+
+    def __eq__(self, other):
+        """Returns True if self equals other as multisets,
+        or False otherwise."""
+        if len(self) != len(other):
+            return False
+        return self._counter == self._as_counter(other)
+
+    def count(self, item):
+        """Returns the number of instances of item in self."""
+        return self._counter[item]
+
+    def distinct(self):
+        """Returns the distinct items of self"""
+        return self._counter.keys()
+
+    # Set algebra
+    def union(self, other):
+        """Returns a new bag where each item appears the max number of times
+        it appears in self or other."""
+        return CounterBag._from_counter(self._counter | self._as_counter(other))
+
+    def intersection(self, other):
+        """Returns a new bag where each item appears the min number of times
+        it appears in self and other."""
+        return CounterBag._from_counter(self._counter & self._as_counter(other))
+
+    def difference(self, other):
+        """Returns a new bag with the items of self in excess of other.
+        Items of other missing in self are ignored."""
+        return CounterBag._from_counter(self._counter - self._as_counter(other))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    @staticmethod
+    def _as_counter(other):
+        if isinstance(other, CounterBag):
+            return other._counter
+        if isinstance(other, Mapping):
+            raise NotImplementedError(f'using a {type(other).__name__} as a CounterBag is not implemented')
+        return Counter(other)
+
+    # Mutator methods
+    def clear(self):
+        """Makes self become empty."""
+        self._counter = Counter()
+        self._len = 0
+
+    def add(self, item, quantity=1):
+        """Adds item to self, quantity times.
+        Raises: ValueError if quantity is not positive."""
+        if quantity < 1:
+            raise ValueError(f'cannot add {quantity} times an item')
+        self._counter[item] += quantity
+        self._len += quantity
+
+    def extend(self, source):
+        """Adds all the items from the iterable source to self in one pass."""
+        counter = self._as_counter(source)
+        # summed before the update: source may be self
+        n = sum(counter.values())
+        self._counter.update(counter)
+        self._len += n
+
+    def remove(self, item):
+        """Precondition: item is in self.
+        Raises: KeyError if item in not in self.
+        Postcondition: one instance of item is removed from self."""
+        if item not in self._counter:
+            raise KeyError(f'{item} not in the bag')
+        if self._counter[item] == 1:
+            del self._counter[item]
+        else:
+            self._counter[item] -= 1
+        self._len -= 1
+        return True
@@ -0,0 +1,90 @@
+"""Test the package counterbag"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from counterbag import *
+from collections import Counter
+import unittest
+
+
+class TestCounterBag(unittest.TestCase):
+    def test_creation(self):
+        cb = CounterBag()
+        self.assertEqual(len(cb), 0)
+        self.assertTrue(cb.isEmpty())
+        cb = CounterBag([1, 2, 2, 3])
+        self.assertEqual(len(cb), 4)
+        self.assertEqual(cb.count(2), 2)
+        self.assertEqual(cb.count(5), 0)
+
+    def test_eq_ignores_order(self):
+        self.assertTrue(CounterBag([1, 2, 2, 3]) == CounterBag([2, 3, 2, 1]))
+        self.assertFalse(CounterBag([1, 2, 2, 3]) == CounterBag([1, 2, 3, 3]))
+        self.assertFalse(CounterBag([1, 2]) == CounterBag([1, 2, 2]))
+        self.assertTrue(CounterBag([1, 2, 2]) == [2, 1, 2])
+
+    def test_mapping(self):
+        # the values of a mapping are not multiplicities
+        for source in [{'a': 3}, {'a': 'x'}, Counter(a=2)]:
+            with self.assertRaises(NotImplementedError):
+                CounterBag(source)
+            with self.assertRaises(NotImplementedError):
+                CounterBag([1]).union(source)
+        self.assertEqual(len(CounterBag(CounterBag(['a', 'a']))), 2)
+
+    def test_str_iter(self):
+        cb = CounterBag(["a", "b", "a"])
+        self.assertEqual(str(cb), "{a: 2, b: 1}")
+        self.assertEqual(sorted(cb), ["a", "a", "b"])
+        self.assertEqual(str(CounterBag()), "{}")
+
+    def test_add_remove(self):
+        cb = CounterBag()
+        cb.add(3)
+        cb.add(3, 4)
+        self.assertEqual(cb.count(3), 5)
+        self.assertEqual(len(cb), 5)
+        self.assertTrue(cb.remove(3))
+        self.assertEqual(cb.count(3), 4)
+        for _ in range(4):
+            cb.remove(3)
+        self.assertFalse(3 in cb)
+        self.assertTrue(cb.isEmpty())
+        with self.assertRaises(KeyError):
+            cb.remove(3)
+        with self.assertRaises(ValueError):
+            cb.add(3, 0)
+        with self.assertRaises(ValueError):
+            cb.add(3, -1)
+        self.assertFalse(3 in cb)
+        self.assertEqual(len(cb), 0)
+
+    def test_extend_self(self):
+        cb = CounterBag([1, 2])
+        cb.extend(cb)
+        self.assertEqual(len(cb), 4)
+        self.assertEqual(len(cb), len(list(cb)))
+        self.assertEqual(cb.count(1), 2)
+
+    def test_clear(self):
+        cb = CounterBag([1, 2])
+        cb.clear()
+        self.assertTrue(cb.isEmpty())
+        self.assertEqual(cb.count(1), 0)
+
+    def test_algebra(self):
+        kitchen = CounterBag(["burger", "burger", "fries"])
+        register = CounterBag(["burger", "fries", "fries", "soda"])
+        self.assertEqual(kitchen + register, ["burger"]*3 + ["fries"]*3 + ["soda"])
+        self.assertEqual(kitchen | register, ["burger"]*2 + ["fries"]*2 + ["soda"])
+        self.assertEqual(kitchen & register, ["burger", "fries"])
+        self.assertEqual(kitchen - register, ["burger"])
+        self.assertEqual(register - kitchen, ["fries", "soda"])
+        self.assertEqual(len(register - kitchen), 2)
+        self.assertEqual(kitchen.difference(["burger", "burger", "fries"]), [])
+
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,150 @@
+"""
+Event stream of the orders, for the kitchen, the stock, the reporting...
+The orders publish typed events as they are edited and finalized onto an
+in-process bus. Each subscriber has its own bounded queue and consumes the events
+in batches. When a queue is full, the publisher waits for the subscriber to catch
+up (backpressure) rather than buffering without bounds; a subscriber which can
+afford to lose events may choose to drop them instead.
+
+    bus = EventBus()
+    kitchen = bus.subscribe('kitchen', kinds={LINE_ADDED, QUANTITY_CHANGED, LINE_REMOVED})
+    order = Order(events=bus)
+    ...
+    for batch in kitchen: # in the kitchen thread, until kitchen.close()
+        for event in batch: ...
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["Event", "EventBus", "Subscription", "LINE_ADDED", "QUANTITY_CHANGED", "LINE_REMOVED",
+           "ORDER_FINALIZED", "ORDER_CANCELLED"]
+
+from collections import deque
+from time import time, monotonic
+import threading
+
+LINE_ADDED = "line_added"
+QUANTITY_CHANGED = "quantity_changed"
+LINE_REMOVED = "line_removed"
+ORDER_FINALIZED = "order_finalized"
+ORDER_CANCELLED = "order_cancelled"
+
+
+class Event():
+    """Something happened to an order.
+    . item, quantity: the menu item and its new quantity, for the line events
+    . total: the grand total, for ORDER_FINALIZED"""
+    __slots__ = ('kind', 'order_id', 'item', 'quantity', 'total', 'timestamp')
+
+    def __init__(self, kind, order_id, item=None, quantity=0, total=None):
+        self.kind = kind
+        self.order_id = order_id
+        self.item = item
+        self.quantity = quantity
+        self.total = total
+        self.timestamp = time()
+
+    def __repr__(self):
+        item = f' {self.item.name} x {self.quantity}' if self.item is not None else ''
+        return f'<{self.kind} #{self.order_id}{item}>'
+
+
+class Subscription():
+    """Bounded queue of the events of one subscriber.
+    . maxsize: events queued at most
+    . block: the publisher waits when the queue is full, otherwise the event is dropped
+    . kinds: the kinds of events of interest, all by default
+    """
+    def __init__(self, name, maxsize=1024, block=True, kinds=None):
+        self.name = name
+        self.kinds = frozenset(kinds) if kinds else None
+        self.dropped = 0
+        self._maxsize = maxsize
+        self._block = block
+        self._events = deque()
+        self._closed = False
+        self._changed = threading.Condition()
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, events, timeout=None):
+        """Queue the events, waiting for room if blocking.
+        Returns the number of events queued, the others being dropped."""
+        queued = 0
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._changed:
+            for event in events:
+                while not self._closed and len(self._events) >= self._maxsize and self._block:
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+                if self._closed or len(self._events) >= self._maxsize:
+                    self.dropped += 1
+                    continue
+                self._events.append(event)
+                queued += 1
+            if queued:
+                self._changed.notify_all()
+        return queued
+
+    def get_batch(self, max_events=64, timeout=None):
+        """Up to max_events events, waiting for the first one.
+        Returns an empty list on timeout or once closed and drained."""
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._events or self._closed, timeout):
+                return []
+            n = min(max_events, len(self._events))
+            batch = [self._events.popleft() for _ in range(n)]
+            self._changed.notify_all() # room for the publishers
+            return batch
+
+    def __iter__(self):
+        """Batches of events until the subscription is closed and drained"""
+        while True:
+            batch = self.get_batch()
+            if not batch:
+                return
+            yield batch
+
+    def close(self):
+        """Stop receiving events, the events queued can still be consumed"""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+
+class EventBus():
+    """In-process publish/subscribe of the order events"""
+    def __init__(self, timeout=None):
+        self._subscriptions = ()
+        self._timeout = timeout # maximum wait of a publisher on a full queue, None: no limit
+        self._lock = threading.Lock()
+
+    def subscribe(self, name, maxsize=1024, block=True, kinds=None):
+        subscription = Subscription(name, maxsize, block, kinds)
+        with self._lock:
+            # copied on write: the publishers iterate without lock
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, events):
+        """Publish a list of events to all the subscribers interested"""
+        for subscription in self._subscriptions:
+            if subscription.closed:
+                continue
+            if subscription.kinds is None:
+                selected = events
+            else:
+                selected = [event for event in events if event.kind in subscription.kinds]
+            if selected:
+                subscription.put(selected, self._timeout)
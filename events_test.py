@@ -0,0 +1,89 @@
+"""Test the package events"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from events import *
+from order import Order, OrderTermination
+from questionio import QueueIO
+from unittest.mock import patch
+import unittest
+import threading
+import os
+
+
+class TestEventBus(unittest.TestCase):
+    def kinds(self, batch):
+        return [(event.kind, event.item.name if event.item else None, event.quantity) for event in batch]
+
+    @patch('builtins.print')
+    def test_order_events(self, mocked_print):
+        bus = EventBus()
+        kitchen = bus.subscribe('kitchen', kinds={LINE_ADDED, QUANTITY_CHANGED, LINE_REMOVED})
+        reporting = bus.subscribe('reporting', kinds={ORDER_FINALIZED, ORDER_CANCELLED})
+
+        order = Order(events=bus)
+        order.add_batch([(2, 5), (4, 1)])
+        order.add_batch([(2, 1)])
+        order._apply(order.transactions.delete(order.transactions[2]), [order.menu[4]])
+        order.undo()
+        self.assertEqual(self.kinds(kitchen.get_batch()), [
+            (LINE_ADDED, 'Bacon Cheese', 5), (LINE_ADDED, 'Western Burger', 1),
+            (QUANTITY_CHANGED, 'Bacon Cheese', 6),
+            (LINE_REMOVED, 'Western Burger', 0),
+            (LINE_ADDED, 'Western Burger', 1),
+        ])
+        self.assertEqual(reporting.get_batch(timeout=0), [])
+
+        order = Order(events=bus, io=QueueIO(["10", "2"]))
+        order.add_batch([(1, 2)])
+        try:
+            order.commit()
+        except OrderTermination:
+            pass
+        os.remove(f'receipt_{order.id}.txt')
+        batch = reporting.get_batch()
+        self.assertEqual([event.kind for event in batch], [ORDER_FINALIZED])
+        self.assertEqual(batch[0].total, order.post_tax)
+        self.assertEqual(len(kitchen), 1)
+
+    def test_backpressure(self):
+        bus = EventBus()
+        slow = bus.subscribe('slow', maxsize=4)
+        lossy = bus.subscribe('lossy', maxsize=4, block=False)
+        received = []
+
+        def consumer():
+            for batch in slow:
+                self.assertLessEqual(len(batch), 4)
+                received.extend(batch)
+
+        thread = threading.Thread(target=consumer)
+        thread.start()
+        for i in range(100):
+            bus.publish([Event(LINE_ADDED, i)])
+        slow.close()
+        thread.join()
+        # the publisher waited for the slow subscriber, the lossy one dropped the overflow
+        self.assertEqual([event.order_id for event in received], list(range(100)))
+        self.assertEqual(len(lossy), 4)
+        self.assertEqual(lossy.dropped, 96)
+
+        # a closed subscription does not receive anything anymore
+        bus.unsubscribe(lossy)
+        bus.publish([Event(LINE_ADDED, 100)])
+        self.assertEqual(len(lossy.get_batch(100)), 4)
+        self.assertEqual(lossy.get_batch(), [])
+
+    def test_timeout(self):
+        bus = EventBus(timeout=0.01)
+        full = bus.subscribe('full', maxsize=1)
+        bus.publish([Event(LINE_ADDED, 1), Event(LINE_ADDED, 2)])
+        self.assertEqual(len(full), 1)
+        self.assertEqual(full.dropped, 1)
+        self.assertEqual(full.get_batch(timeout=0.01)[0].order_id, 1)
+        self.assertEqual(full.get_batch(timeout=0.01), [])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -8,6 +8,7 @@ to enforce the implementation of the abstract methods.
 __author__ = "Bertrand Blanc (Alan Turing)"
 
 import unittest
+from array import array
 from node import Node
 from baginterface import BagInterface
 
@@ -29,9 +30,8 @@ class LinkedBag(BagInterface):
             else:
                 raise NotImplementedError(f'creating an ArrayBag from a {type(source).__name__} is not implemented')
 
-            for v in source:
-                self.add(v)
-        
+            self.extend(source)
+
 
     # Accessor methods
     def __len__(self):
@@ -60,8 +60,7 @@ class LinkedBag(BagInterface):
         """Returns a new bag containing the contents
         of self and other."""
         ll = LinkedBag(self)
-        for v in other:
-            ll.add(v)
+        ll.extend(other)
         return ll
 
 
@@ -73,7 +72,7 @@ class LinkedBag(BagInterface):
         for x, y in zip(self, other):
             if x != y:
                 return False
-            return True
+        return True
 
     def count(self, item):
         """Returns the number of instances of item in self."""
@@ -84,6 +83,38 @@ class LinkedBag(BagInterface):
             ptr = ptr.next
         return cpt
 
+    def to_list(self):
+        """Returns a new list with the contents of self, in insertion order."""
+        lst = [None]*self._len
+        ptr = self._head
+        i = 0
+        while ptr:
+            lst[i] = ptr.data
+            ptr = ptr.next
+            i += 1
+        return lst
+
+    def to_array(self, typecode='d'):
+        """Returns an array.array of the given typecode with the contents of self.
+        Only meaningful for bags of numbers (prices, quantities, IDs...)."""
+        return array(typecode, self.to_list())
+
+    def chunks(self, size):
+        """Supports iteration over self by lists of at most size items.
+        The last chunk may be shorter."""
+        if size < 1:
+            raise ValueError(f'chunk size shall be positive, got {size}')
+        chunk = []
+        ptr = self._head
+        while ptr:
+            chunk.append(ptr.data)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+            ptr = ptr.next
+        if chunk:
+            yield chunk
+
     # Mutator methods
     def clear(self):
         """Makes self become empty."""
@@ -102,6 +133,47 @@ class LinkedBag(BagInterface):
         self._tail = self._head
         self._len += 1
 
+    def extend(self, source):
+        """Adds all the items from the iterable source to self.
+        The chain of nodes is built in one pass then linked at the tail,
+        avoiding a call to add() per item."""
+        it = iter(source)
+        for first in it:
+            break
+        else:
+            return
+        head = tail = Node(first)
+        cpt = 1
+        for v in it:
+            tail.next = Node(v)
+            tail = tail.next
+            cpt += 1
+        if self._head:
+            self._tail.next = head
+        else:
+            self._head = head
+        self._tail = tail
+        self._len += cpt
+
+    def splice(self, other):
+        """Moves all the nodes of the LinkedBag other at the end of self in O(1).
+        No node is copied: other is relinked into self then left empty.
+        Returns self to allow chaining a.splice(b).splice(c)."""
+        if not isinstance(other, LinkedBag):
+            raise NotImplementedError(f'splicing a {type(other).__name__} is not implemented')
+        if other is self:
+            raise ValueError('a LinkedBag cannot be spliced into itself')
+        if other._head is None:
+            return self
+        if self._head:
+            self._tail.next = other._head
+        else:
+            self._head = other._head
+        self._tail = other._tail
+        self._len += other._len
+        other.clear()
+        return self
+
     def remove(self, item):
         """Precondition: item is in self.
         Raises: KeyError if item in not in self.
@@ -113,6 +185,8 @@ class LinkedBag(BagInterface):
         # I followed this behavior
         if self._head.data == item:
             self._head = self._head.next
+            if self._head is None:
+                self._tail = None
             self._len -= 1
             return True
         
@@ -124,6 +198,8 @@ class LinkedBag(BagInterface):
                 ptr = ptr.next
                 continue
             previous.next = ptr.next
+            if ptr is self._tail:
+                self._tail = previous
             self._len -= 1
             return True
 
@@ -131,6 +207,39 @@ class LinkedBag(BagInterface):
         return False 
 
 
+class ConcatView():
+    """Lazy read-only view over the concatenation of several bags.
+    Nothing is copied: iterating the view walks each bag in turn,
+    so the view reflects any later change to the underlying bags."""
+
+    def __init__(self, *bags):
+        self._bags = bags
+
+    def __len__(self):
+        return sum(len(bag) for bag in self._bags)
+
+    def __iter__(self):
+        for bag in self._bags:
+            yield from bag
+
+    def __contains__(self, item):
+        return any(item in bag for bag in self._bags)
+
+    def __str__(self):
+        return "[" + ", ".join([str(x) for x in self]) + "]"
+
+    def isEmpty(self):
+        return len(self) == 0
+
+    def count(self, item):
+        """Returns the number of instances of item across all the bags."""
+        return sum(bag.count(item) for bag in self._bags)
+
+    def materialize(self):
+        """Returns a new LinkedBag holding a copy of the contents of the view."""
+        return LinkedBag(list(self))
+
+
 class TestArrayBag(unittest.TestCase):
     def test_creation(self):
         lb = LinkedBag()
@@ -200,6 +309,11 @@ class TestArrayBag(unittest.TestCase):
             lb2.add(x)
             self.assertFalse(lb1 == lb2)
 
+        self.assertFalse(LinkedBag([0, 1, 2]) == LinkedBag([0, 2, 1]))
+        # the first pair matches, the last one differs
+        self.assertFalse(LinkedBag([0, 1]) == LinkedBag([0, 2]))
+        self.assertTrue(LinkedBag([0, 2]) == LinkedBag([0, 2]))
+
 
     def test_count(self):
         lst = [x for x in range(5)]
@@ -276,6 +390,87 @@ class TestArrayBag(unittest.TestCase):
 
         self.assertTrue(lb.remove(2))
 
+    def test_remove_tail(self):
+        lb = LinkedBag([1, 2, 3])
+        lb.remove(3)
+        self.assertEqual(lb._tail.data, 2)
+        lb.add(4)
+        self.assertEqual(lb.to_list(), [1, 2, 4])
+        lb = LinkedBag([1])
+        lb.remove(1)
+        self.assertIsNone(lb._tail)
+
+
+    def test_extend(self):
+        lb = LinkedBag()
+        lb.extend(x for x in range(3))
+        self.assertEqual(len(lb), 3)
+        self.assertEqual(lb._tail.data, 2)
+        lb.extend(range(3, 6))
+        lb.extend([])
+        self.assertEqual(len(lb), 6)
+        self.assertEqual(str(lb), "[0, 1, 2, 3, 4, 5]")
+        self.assertIsNone(lb._tail.next)
+        lb.add(6)
+        self.assertEqual(lb.count(6), 1)
+
+
+    def test_to_list_to_array(self):
+        lb = LinkedBag([x for x in range(5)])
+        self.assertEqual(lb.to_list(), [0, 1, 2, 3, 4])
+        self.assertEqual(LinkedBag().to_list(), [])
+        self.assertEqual(lb.to_array('l').tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(lb.to_array().typecode, 'd')
+
+
+    def test_splice(self):
+        lb1 = LinkedBag([0, 1])
+        lb2 = LinkedBag([2, 3])
+        tail = lb2._tail
+        self.assertIs(lb1.splice(lb2), lb1)
+        self.assertEqual(lb1.to_list(), [0, 1, 2, 3])
+        self.assertIs(lb1._tail, tail)
+        self.assertEqual(len(lb1), 4)
+        self.assertTrue(lb2.isEmpty())
+        self.assertIsNone(lb2._head)
+
+        lb3 = LinkedBag()
+        lb3.splice(lb1).splice(LinkedBag()).splice(LinkedBag([4]))
+        self.assertEqual(lb3.to_list(), [0, 1, 2, 3, 4])
+        lb3.add(5)
+        self.assertEqual(len(lb3), 6)
+
+        with self.assertRaises(ValueError):
+            lb3.splice(lb3)
+        with self.assertRaises(NotImplementedError):
+            lb3.splice([1])
+
+
+    def test_concat_view(self):
+        lb1 = LinkedBag([0, 1])
+        lb2 = LinkedBag()
+        lb3 = LinkedBag([1, 2])
+        view = ConcatView(lb1, lb2, lb3)
+        self.assertEqual(len(view), 4)
+        self.assertEqual(list(view), [0, 1, 1, 2])
+        self.assertEqual(str(view), "[0, 1, 1, 2]")
+        self.assertEqual(view.count(1), 2)
+        self.assertTrue(2 in view)
+        self.assertFalse(5 in view)
+        lb2.add(5)
+        self.assertTrue(5 in view)
+        self.assertEqual(view.materialize().to_list(), [0, 1, 5, 1, 2])
+        self.assertTrue(ConcatView().isEmpty())
+
+
+    def test_chunks(self):
+        lb = LinkedBag([x for x in range(7)])
+        self.assertEqual(list(lb.chunks(3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(lb.chunks(7)), [[0, 1, 2, 3, 4, 5, 6]])
+        self.assertEqual(list(LinkedBag().chunks(2)), [])
+        with self.assertRaises(ValueError):
+            list(lb.chunks(0))
+
 
 def main():
     ab = LinkedBag()
@@ -0,0 +1,200 @@
+"""
+Synthetic load generator: simulated customers drive real Order sessions, without
+any terminal, through the in-memory question backend. The workload is drawn from
+a seeded random generator, hence the same for a given seed:
+. arrivals: a Poisson process of the given rate (customers per second)
+. order size: number of distinct burgers, drawn from weights
+. item mix: menu keys drawn from weights, uniform by default
+. edits: probabilities to update or delete a line after each addition
+. customers: share of staff among the customers, probability to quit without paying
+
+Each session is timed from its start to its end, and its checkout from the
+answer to the student/staff question to the end (totals, receipt issued and stored).
+The report gives the p50/p95/p99 latencies and the throughput:
+
+    python loadgen.py --customers 2000 --rate 50 --workers 4 --seed 7
+    python loadgen.py --customers 2000 --no-pacing # as fast as possible
+
+The receipts are stored in a temporary folder unless given one, the outputs of the
+sessions discarded.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["Customer", "generate", "run", "percentile"]
+
+from orderpool import OrderPool
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from questionio import QueueIO
+from metrics import Metrics
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+from random import Random
+import tempfile
+import argparse
+import json
+
+DEFAULT_ORDER_SIZES = {1: 30, 2: 30, 3: 20, 4: 12, 5: 8}
+
+
+class Customer():
+    """Scripted customer: arrival time in seconds since the start, and the answers
+    given to the questions of the order, in sequence"""
+    __slots__ = ('arrival', 'answers', 'staff', 'cancels')
+
+    def __init__(self, arrival, answers, staff, cancels):
+        self.arrival = arrival
+        self.answers = answers
+        self.staff = staff
+        self.cancels = cancels
+
+
+class _ScriptIO(QueueIO):
+    """Answers of a customer, noting when the last one was read"""
+    def read(self, prompt):
+        answer = super().read(prompt)
+        self.last_read = perf_counter()
+        return answer
+
+    def write(self, text):
+        pass # nobody is reading
+
+
+def _script(rng, menu_size, order_sizes, item_weights, p_update, p_delete, p_staff, p_cancel):
+    """Answers of one customer to the questions of the Order"""
+    update, delete, commit, quit = menu_size+1, menu_size+2, menu_size+5, menu_size+6
+    keys = list(range(1, menu_size+1))
+    size = rng.choices(list(order_sizes), list(order_sizes.values()))[0]
+    answers = []
+    lines = [] # menu keys of the lines of the order, in the order of their IDs
+    for _ in range(size):
+        key = rng.choices(keys, item_weights)[0]
+        answers += [str(key), str(rng.randint(1, 3))]
+        if key not in lines:
+            lines.append(key)
+        if rng.random() < p_update:
+            line = rng.randint(1, len(lines))
+            answers += [str(update), str(line), str(rng.randint(1, 5))]
+        if len(lines) > 1 and rng.random() < p_delete:
+            line = rng.randint(1, len(lines))
+            answers += [str(delete), str(line)]
+            del lines[line-1]
+    staff = rng.random() < p_staff
+    cancels = rng.random() < p_cancel
+    answers += [str(quit)] if cancels else [str(commit), "2" if staff else "1"]
+    return answers, staff, cancels
+
+
+def generate(customers, menu_size, *, rate=20.0, seed=0, order_sizes=DEFAULT_ORDER_SIZES, item_weights=None,
+             p_update=0.1, p_delete=0.05, p_staff=0.3, p_cancel=0.05):
+    """The list of customers of a run, the same for a given seed"""
+    rng = Random(seed)
+    item_weights = item_weights or [1]*menu_size
+    arrival = 0.0
+    result = []
+    for _ in range(customers):
+        arrival += rng.expovariate(rate)
+        answers, staff, cancels = _script(rng, menu_size, order_sizes, item_weights, p_update, p_delete, p_staff, p_cancel)
+        result.append(Customer(arrival, answers, staff, cancels))
+    return result
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(1, -(-len(samples) * p // 100))
+    return samples[int(rank)-1]
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else 0.0,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'max': samples[-1] if samples else 0.0,
+    }
+
+
+def run(customers, *, workers=1, pacing=True, menu=None, receipts=None):
+    """Play the customers against a pool of orders, returns the report as a dict.
+    pacing: each customer starts at its arrival time, otherwise as soon as a worker is free
+    receipts: folder of the receipts, a temporary one removed after the run by default"""
+    if receipts is None:
+        with tempfile.TemporaryDirectory() as folder:
+            return run(customers, workers=workers, pacing=pacing, menu=menu, receipts=folder)
+    metrics = Metrics()
+    pool = OrderPool(workers, metrics=metrics, menu=menu, receipts=receipts)
+    sessions, checkouts, waits = [], [], []
+    start = None
+
+    def play(customer):
+        if pacing:
+            delay = start + customer.arrival - perf_counter()
+            if delay > 0:
+                sleep(delay)
+        io = _ScriptIO(customer.answers)
+        begin = perf_counter()
+        with pool.session(io) as order:
+            order.fill()
+        end = perf_counter()
+        sessions.append(end - begin)
+        if pacing:
+            waits.append(max(0.0, begin - start - customer.arrival))
+        if not customer.cancels:
+            checkouts.append(end - io.last_read)
+
+    start = perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(play, customers))
+    elapsed = perf_counter() - start
+
+    report = {
+        'customers': len(customers),
+        'committed': metrics['committed'],
+        'cancelled': metrics['cancellations'],
+        'elapsed': elapsed,
+        'throughput': len(customers) / elapsed if elapsed else 0.0,
+        'session': _summary(sessions),
+        'checkout': _summary(checkouts),
+    }
+    if pacing:
+        report['queueing'] = _summary(waits)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=20.0, help='arrivals per second')
+    parser.add_argument('--workers', type=int, default=1, help='registers served in parallel')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--p-update', type=float, default=0.1)
+    parser.add_argument('--p-delete', type=float, default=0.05)
+    parser.add_argument('--p-staff', type=float, default=0.3)
+    parser.add_argument('--p-cancel', type=float, default=0.05)
+    parser.add_argument('--no-pacing', action='store_true', help='ignore the arrival times')
+    parser.add_argument('--output', help='store the report as JSON')
+    args = parser.parse_args()
+
+    menu = MenuDecoratorForOrder(Menu(auto_load=True))
+    customers = generate(args.customers, len(menu), rate=args.rate, seed=args.seed, p_update=args.p_update,
+                         p_delete=args.p_delete, p_staff=args.p_staff, p_cancel=args.p_cancel)
+    report = run(customers, workers=args.workers, pacing=not args.no_pacing, menu=menu)
+
+    print(f"{report['customers']} customers ({report['committed']} paid, {report['cancelled']} quit)"
+          f" in {report['elapsed']:.2f}s: {report['throughput']:.1f} customers/s")
+    for name in ('session', 'checkout', 'queueing'):
+        if name in report:
+            s = report[name]
+            print(f"{name:>9s}: p50 {s['p50']*1e3:8.3f} ms | p95 {s['p95']*1e3:8.3f} ms | p99 {s['p99']*1e3:8.3f} ms")
+    if args.output:
+        with open(args.output, 'w') as fd:
+            fd.write(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
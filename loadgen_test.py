@@ -0,0 +1,59 @@
+"""Test the package loadgen"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from loadgen import *
+import unittest
+import tempfile
+import os
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        first = generate(100, 5, seed=42)
+        second = generate(100, 5, seed=42)
+        self.assertEqual([(c.arrival, c.answers) for c in first], [(c.arrival, c.answers) for c in second])
+        self.assertNotEqual([c.answers for c in first], [c.answers for c in generate(100, 5, seed=43)])
+        arrivals = [c.arrival for c in first]
+        self.assertEqual(arrivals, sorted(arrivals))
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile(samples, 100), 100)
+        self.assertEqual(percentile([3], 95), 3)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_run(self):
+        customers = generate(60, 5, seed=1, p_update=0.5, p_delete=0.3, p_cancel=0.2)
+        receipts = sorted(f for f in os.listdir('.') if f.startswith('receipt_'))
+        report = run(customers, workers=2, pacing=False)
+        # every script ran to its end, the receipts went to a temporary folder
+        self.assertEqual(report['cancelled'], sum(c.cancels for c in customers))
+        self.assertEqual(report['committed'], len(customers) - report['cancelled'])
+        self.assertEqual(report['session']['count'], 60)
+        self.assertEqual(report['checkout']['count'], report['committed'])
+        self.assertLessEqual(report['session']['p50'], report['session']['p99'])
+        self.assertGreater(report['throughput'], 0)
+        self.assertNotIn('queueing', report)
+        self.assertEqual(sorted(f for f in os.listdir('.') if f.startswith('receipt_')), receipts)
+
+        report = run(customers[:10], pacing=True)
+        self.assertEqual(report['queueing']['count'], 10)
+
+    def test_receipts(self):
+        customers = generate(20, 5, seed=3, p_cancel=0.0)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder:
+            report = run(customers, workers=2, pacing=False, receipts=folder)
+            # the process directory is left as is
+            self.assertEqual(os.getcwd(), cwd)
+            receipts = [f for f in os.listdir(folder) if f.startswith('receipt_')]
+            # the order IDs are random, two customers may share one
+            self.assertTrue(0 < len(receipts) <= report['committed'])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
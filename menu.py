@@ -11,15 +11,32 @@ leaving the doors open to future enhancements like CRUD on the menu itself.
 
 __author__ = "Bertrand Blanc (Alan Turing)"
 
-from linkedbag import LinkedBag
+from linkedbag import LinkedBag, ConcatView
 from menuitem import *
+from menuindex import PriceIndex, NameIndex
 import json
 
 
+def _read(file):
+    """Read the JSON file emulating the diner's database"""
+    try:
+        with open(file, "r") as fd:
+            return json.loads(fd.read())
+    except FileNotFoundError as e:
+        print(f'file {file} not accessible. Make sure the file is located in the current folder to emulate the retrieval from a DB')
+        exit(-1)
+    except json.JSONDecodeError as e:
+        print(f'file {file} has been corrupted. Make sure the file is properly JSON-formated to emulate the data integrity from a REST API call')
+        exit(-1)
+
+
 class Menu():
     """The menu is composed of burgers. That class loads the burger from an ad-hoc JSON file"""
-    def __init__(self, *, auto_load=False):
+    def __init__(self, *, auto_load=False, tax_table=None):
         self._bag = LinkedBag()
+        self._tax_table = tax_table
+        self._by_price = PriceIndex()
+        self._by_name = NameIndex()
         if auto_load:
             # Emulating the dynamic retrieval of the data from the diner's database
             self.load("./burger.json.txt")
@@ -28,24 +45,36 @@ class Menu():
     def bag(self):
         """Access to the collection of menu items"""
         return self._bag
+
+    @property
+    def by_price(self):
+        """Sorted index of the menu items by price"""
+        return self._by_price
+
+    @property
+    def by_name(self):
+        """Prefix index of the menu items by name"""
+        return self._by_name
     
     def __len__(self):
         return len(self._bag)
 
     def load(self, file):
         """Load the burgers from a JSON file into the menu data structure"""
-        try:
-            with open(file, "r") as fd:
-                data = json.loads(fd.read())
-        except FileNotFoundError as e:
-            print(f'file {file} not accessible. Make sure the file is located in the current folder to emulate the retrieval from a DB')
-            exit(-1)
-        except json.JSONDecodeError as e:
-            print(f'file {file} has been corrupted. Make sure the file is properly JSON-formated to emulate the data integrity from a REST API call')
-            exit(-1)
-
-        for record in data["burgers"]:
-            self._bag.add(Burger(record['name'], record['price']))
+        data = _read(file)
+        self.load_records(data["burgers"])
+
+    def load_records(self, records, item_class=Burger):
+        """Load records {'name', 'price'} as menu items of the given class"""
+        items = [item_class(record['name'], record['price']) for record in records]
+        for item, record in zip(items, records):
+            if 'tax_class' in record:
+                item.tax_class = record['tax_class']
+        self._bag.extend(items)
+        self._by_price.extend(items)
+        self._by_name.extend(items)
+        if self._tax_table:
+            self._tax_table.precompute(items)
 
     
     def dump(self, file):
@@ -75,6 +104,92 @@ class Menu():
 
 
 
+class CategorizedMenu(Menu):
+    """The menu partitioned by category, one Menu (hence one set of indexes) per item class.
+    A category is only loaded from the JSON file the first time it is accessed,
+    so that the startup only pays for the categories actually displayed.
+    The aggregated bag and indexes of the whole menu force the load of all the categories.
+    """
+    categories = {"burgers": Burger, "beverages": Beverage}
+
+    def __init__(self, file="./burger.json.txt"):
+        self._file = file
+        self._data = None
+        self._menus = {}
+        self._by_price = None
+        self._by_name = None
+
+    def _source(self):
+        # the file is read on the first access to a category, then kept
+        if self._data is None:
+            self._data = _read(self._file)
+        return self._data
+
+    def available(self):
+        """Names of the categories present in the JSON file"""
+        return [category for category in self.categories if category in self._source()]
+
+    def loaded(self):
+        """Names of the categories loaded so far"""
+        return list(self._menus)
+
+    def count(self):
+        """Number of items of all the categories, without loading them"""
+        return sum(len(self._source()[category]) for category in self.available())
+
+    def __getitem__(self, category):
+        """The Menu of a category, loaded on first access"""
+        if category not in self._menus:
+            if category not in self.categories:
+                raise KeyError(f'unknown category {category}')
+            menu = Menu()
+            menu.load_records(self._source().get(category, []), self.categories[category])
+            self._menus[category] = menu
+        return self._menus[category]
+
+    @property
+    def bag(self):
+        """Read-only view over the items of all the categories"""
+        return ConcatView(*[self[category].bag for category in self.available()])
+
+    @property
+    def by_price(self):
+        if self._by_price is None:
+            self._by_price = PriceIndex(self.bag)
+        return self._by_price
+
+    @property
+    def by_name(self):
+        if self._by_name is None:
+            self._by_name = NameIndex(self.bag)
+        return self._by_name
+
+    def __len__(self):
+        return len(self.bag)
+
+    def load(self, file):
+        """Point the menu to another JSON file. Nothing is read until a category is accessed."""
+        self.__init__(file)
+
+    def load_records(self, records, item_class=Burger):
+        raise NotImplementedError('records are loaded per category, see __getitem__')
+
+    def dump(self, file):
+        """Export all the categories into a JSON file"""
+        data = {}
+        for category in self.available():
+            data[category] = [{'name':v.name, 'price':v.price} for v in self[category].bag]
+        try:
+            with open(file, "w") as fd:
+                fd.write(json.dumps(data))
+        except Exception as e:
+            print(f'unexpected exception. Make sure {file} is in a writable directory to emulate the update of a DB')
+            raise e
+
+    def __str__(self):
+        return "\n".join(str(self[category]) for category in self.available())
+
+
 if __name__ == "__main__":
     # The JSON file is expected to come from a well-maintained DataBase
     # no expectation to have the JSON file filled with garbage
@@ -6,7 +6,7 @@ to add a key to the menu items to be referenced by the end-users.
 """
 
 __author__ = "Bertrand Blanc (Alan Turing)"
-__all__ = ["MenuDecoratorForOrder"]
+__all__ = ["MenuDecoratorForOrder", "CategoryMenuDecoratorForOrder", "ItemMatcher"]
 
 from menu import Menu
 from menuitem import ItemDisplay
@@ -20,46 +20,67 @@ class MenuDecoratorForOrder(Menu):
         # while extending the Menu super class
         # Then adds its custom layer
         self._keyed_bag = LinkedBag()
+        self._items = [] # item of key k at k-1, for O(1) access by key
+        self._keys = {} # menu item -> key, to key the results of the indexes
         if not menu.bag.isEmpty():
-            for i,item in enumerate(menu.bag,1):
-                self._keyed_bag.add((i,item))
-        
+            self._key(menu.bag)
+
+    def _key(self, items):
+        """Key the items, continuing after the keys already given.
+        Returns the list of (key, item)"""
+        offset = len(self._items)
+        records = list(enumerate(items, offset+1))
+        self._keyed_bag.extend(records)
+        self._items.extend(item for _,item in records)
+        self._keys.update((item, key) for key, item in records)
+        return records
+
 
     @property
     def bag(self):
         return self._keyed_bag
+
+    @property
+    def by_price(self):
+        return self._menu.by_price
+
+    @property
+    def by_name(self):
+        return self._menu.by_name
+
+    def find(self, fragment):
+        """Menu items matching the name fragment, as a list of (key, item)"""
+        return [(self._keys[item], item) for item in self.by_name.search(fragment)]
     
     def __len__(self):
         return len(self._keyed_bag)
 
+    def max_key(self):
+        """Largest key the menu may give, the keys beyond are free e.g. for the commands of an order"""
+        return len(self)
+
     def load(self, file):
         """load override"""
         # Override by forwarding the method to the object
         # it wraps, then adding its custom layer if needed
         self._menu.load(file)
-        for i,item in enumerate(menu.bag,1):
-            self._keyed_bag.add((i,item))
+        # the wrapped menu appends the new items after the ones already keyed
+        self._key(self._menu.bag.to_list()[len(self._items):])
 
     def __getitem__(self, idx):
-        found = False
-        item = None
-        for v in self._keyed_bag:
-            if v[0] == idx:
-                found = True
-                item = v[1]
-                break
-        if not found:
+        if not isinstance(idx, int) or not 1 <= idx <= len(self._items):
             raise IndexError(f'index {idx} not found')
-        return item
+        return self._items[idx-1]
 
 
     def dump(self, file):
         """export override"""
         self._menu.dump(file)
 
-    def __str__(self):
-        if len(self.bag) > 0:
-            column_size = max([len(item.name) for _,item in self.bag])+4
+    def _render(self, records, title=" MENU "):
+        records = list(records)
+        if len(records) > 0:
+            column_size = max([len(item.name) for _,item in records])+4
         else:
             column_size = 20
         
@@ -67,13 +88,85 @@ class MenuDecoratorForOrder(Menu):
 
         line = '='*line_size
         buf = line + '\n'
-        buf += f'{" MENU ":=^{line_size}}' '\n'
+        buf += f'{title:=^{line_size}}' '\n'
         buf += line + '\n'
 
-        for record in self.bag:
+        for record in records:
             buf += format(str(record[0]), "2>")
             item_to_display = ItemDisplay(record[1], column_size=column_size)
             buf += str(item_to_display) + "\n"
         buf += line
         return buf
-    
\ No newline at end of file
+
+    def __str__(self):
+        return self._render(self.bag)
+
+
+class CategoryMenuDecoratorForOrder(MenuDecoratorForOrder):
+    """Keyed decorator over a CategorizedMenu, paginated by category.
+    The items of a category are keyed the first time its page is requested,
+    continuing after the keys already given: a key never changes during a session
+    and the categories never displayed are never loaded.
+    """
+    def __init__(self, menu):
+        self._menu = menu
+        self._keyed_bag = LinkedBag()
+        self._items = []
+        self._keys = {}
+        self._pages = {} # category -> LinkedBag of (key, item)
+
+    def pages(self):
+        """Names of the categories available on the menu"""
+        return self._menu.available()
+
+    def page(self, category):
+        """Keyed items of a category, loading the category on first access"""
+        if category not in self._pages:
+            self._pages[category] = LinkedBag(self._key(self._menu[category].bag))
+        return self._pages[category]
+
+    def max_key(self):
+        """Keys are given up to the number of items of all the categories: counted from
+        the data file, without loading the categories"""
+        return self._menu.count()
+
+    def render_page(self, category):
+        return self._render(self.page(category), f' {category.upper()} ')
+
+    def find(self, fragment):
+        """Items matching the name fragment among the categories loaded so far"""
+        return [(self._keys[item], item)
+                for category in self._pages
+                for item in self._menu[category].by_name.search(fragment)]
+
+    def load(self, file):
+        """load override, forgetting the keys given so far"""
+        self._menu.load(file)
+        self.__init__(self._menu)
+
+    def __str__(self):
+        if not self._pages and self.pages():
+            self.page(self.pages()[0])
+        return "\n".join(self.render_page(category) for category in self._pages)
+
+
+class ItemMatcher():
+    """Items persisted by key and name (checkpoint, write-ahead log) matched against
+    a keyed menu which may have changed since, e.g. reloaded: by key if the item of
+    that key still has that name, by name otherwise, None if no longer on the menu.
+    The names are indexed on the first mismatch only."""
+    def __init__(self, menu):
+        self._menu = menu
+        self._by_name = None
+
+    def __call__(self, key, name):
+        menu = self._menu
+        if 1 <= key <= len(menu):
+            item = menu[key]
+            if item.name == name:
+                return item
+        if self._by_name is None:
+            self._by_name = {}
+            for _, item in menu.bag:
+                self._by_name.setdefault(item.name, item)
+        return self._by_name.get(name)
@@ -0,0 +1,142 @@
+"""Test the categorized menu and its keyed decorator"""
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+from menu import *
+from menu4order import *
+from menuitem import Burger, Beverage
+from scalability import generate_menu, measure_menu
+from order import Order, OrderTermination
+from questionio import QueueIO
+import unittest
+import json
+import os
+
+
+class TestCategorizedMenu(unittest.TestCase):
+    test_file = "_test_categories.json"
+
+    def setUp(self):
+        data = {
+            "burgers": [{"name": "de Anza Burger", "price": 5.25}, {"name": "Bacon Cheese", "price": 5.75}],
+            "beverages": [{"name": "Soda", "price": 1.5}, {"name": "Milk Shake", "price": 3.25}, {"name": "Coffee", "price": 2.0}],
+        }
+        with open(self.test_file, "w") as fd:
+            fd.write(json.dumps(data))
+
+    def tearDown(self):
+        os.remove(self.test_file)
+
+    def test_lazy_loading(self):
+        menu = CategorizedMenu(self.test_file)
+        self.assertIsNone(menu._data)
+        self.assertEqual(menu.available(), ["burgers", "beverages"])
+        self.assertEqual(menu.loaded(), [])
+
+        beverages = menu["beverages"]
+        self.assertEqual(menu.loaded(), ["beverages"])
+        self.assertEqual(len(beverages), 3)
+        self.assertTrue(all(isinstance(item, Beverage) for item in beverages.bag))
+        self.assertIs(menu["beverages"], beverages)
+        self.assertEqual(beverages.by_price.cheapest(1)[0].name, "Soda")
+
+        with self.assertRaises(KeyError):
+            menu["desserts"]
+
+    def test_whole_menu(self):
+        menu = CategorizedMenu(self.test_file)
+        self.assertEqual(len(menu), 5)
+        self.assertEqual(menu.loaded(), ["burgers", "beverages"])
+        self.assertTrue(isinstance(menu["burgers"].bag.to_list()[0], Burger))
+        self.assertEqual(menu.by_price.most_expensive(1)[0].name, "Bacon Cheese")
+        self.assertEqual([item.name for item in menu.by_name.search("sh")], ["Milk Shake"])
+
+    def test_dump(self):
+        menu = CategorizedMenu(self.test_file)
+        dump_file = "_test_categories_dump.json"
+        menu.dump(dump_file)
+        reloaded = CategorizedMenu(dump_file)
+        self.assertEqual(len(reloaded["beverages"]), 3)
+        self.assertEqual(len(reloaded["burgers"]), 2)
+        os.remove(dump_file)
+
+    def test_paginated_decorator(self):
+        menu = CategorizedMenu(self.test_file)
+        keyed = CategoryMenuDecoratorForOrder(menu)
+        self.assertEqual(keyed.pages(), ["burgers", "beverages"])
+        self.assertEqual(len(keyed), 0)
+
+        page = keyed.page("beverages")
+        self.assertEqual([key for key,_ in page], [1, 2, 3])
+        self.assertEqual(menu.loaded(), ["beverages"])
+        self.assertEqual(keyed[2].name, "Milk Shake")
+        self.assertEqual(keyed.find("bacon"), [])
+
+        page = keyed.page("burgers")
+        self.assertEqual([key for key,_ in page], [4, 5])
+        self.assertEqual(len(keyed), 5)
+        self.assertEqual([key for key,_ in keyed.find("bacon")], [5])
+        self.assertRegex(keyed.render_page("burgers"), r'BURGERS')
+        self.assertRegex(str(keyed), r'BEVERAGES[\s\S]+BURGERS')
+
+    def test_first_page_by_default(self):
+        keyed = CategoryMenuDecoratorForOrder(CategorizedMenu(self.test_file))
+        self.assertRegex(str(keyed), r'BURGERS')
+        self.assertNotRegex(str(keyed), r'BEVERAGES')
+
+    def test_order(self):
+        menu = CategorizedMenu(self.test_file)
+        keyed = CategoryMenuDecoratorForOrder(menu)
+        self.assertEqual(keyed.max_key(), 5)
+        io = QueueIO(["1", "2", "4", "bacon", "3", "11"])
+        """
+        1, 2: 2 burgers #1
+        4: not shown yet, refused
+        bacon, 3: 3 Bacon Cheese
+        11: quit
+        """
+        order = Order(menu=keyed, io=io)
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+        output = '\n'.join(io.output)
+        # the commands are keyed after all the items, loaded or not
+        self.assertRegex(output, r'\n1\s+de Anza Burger')
+        self.assertRegex(output, r'6\s+-\s+update')
+        self.assertNotRegex(output, r'\n1\s+-\s+update')
+        self.assertRegex(output, 'please select a valid item from the menu options')
+        self.assertEqual([(t.item.name, t.quantity) for t in order.transactions], [("de Anza Burger", 2), ("Bacon Cheese", 3)])
+        # only the first page was needed
+        self.assertEqual(menu.loaded(), ["burgers"])
+
+
+class TestMenuDecoratorForOrder(unittest.TestCase):
+    def test_load(self):
+        keyed = MenuDecoratorForOrder(Menu())
+        self.assertEqual(len(keyed), 0)
+        keyed.load("./burger.json.txt")
+        self.assertEqual(len(keyed), 5)
+        self.assertEqual(keyed[5].name, "Don Cali Burger")
+        self.assertEqual([key for key,_ in keyed.find("bacon")], [2])
+        with self.assertRaises(IndexError):
+            keyed[6]
+        with self.assertRaises(IndexError):
+            keyed[0]
+
+    def test_synthetic_menu(self):
+        test_file = "_test_synthetic.json"
+        generate_menu(test_file, 500, seed=3)
+        measure = measure_menu(test_file)
+        self.assertEqual(measure['size'], 500)
+        for key in ['load', 'construction', 'first_render']:
+            self.assertGreater(measure[key], 0)
+
+        menu = MenuDecoratorForOrder(Menu())
+        menu.load(test_file)
+        self.assertEqual(len(menu), 500)
+        self.assertTrue(menu[500].name.endswith(' 499'))
+        os.remove(test_file)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
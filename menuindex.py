@@ -0,0 +1,142 @@
+"""
+Secondary indexes over the menu items, maintained by the Menu when it loads.
+The Menu keeps its items in load order in a LinkedBag, which is fine to display
+the menu but requires a full scan to answer any question about the items.
+The indexes below answer these questions without scanning the whole menu.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["PriceIndex", "NameIndex"]
+
+from bisect import bisect_left, bisect_right
+
+
+class PriceIndex():
+    """Sorted index over the price of the menu items.
+    Two parallel sorted arrays are kept: the prices used as bisect keys, and the items.
+    Items with the same price are kept in load order.
+    Range queries cost O(log n + k) for k items returned.
+    """
+    def __init__(self, items=None):
+        self._prices = []
+        self._items = []
+        if items:
+            self.extend(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        """Items from the cheapest to the most expensive"""
+        return iter(self._items)
+
+    def add(self, item):
+        """Index a single item"""
+        idx = bisect_right(self._prices, item.price)
+        self._prices.insert(idx, item.price)
+        self._items.insert(idx, item)
+
+    def extend(self, items):
+        """Index many items at once, sorting once instead of inserting one by one"""
+        pairs = list(zip(self._prices, self._items))
+        pairs.extend((item.price, item) for item in items)
+        pairs.sort(key=lambda pair: pair[0])
+        self._prices = [price for price, _ in pairs]
+        self._items = [item for _, item in pairs]
+
+    def clear(self):
+        self._prices = []
+        self._items = []
+
+    def between(self, low, high):
+        """Items whose price is in [low, high]"""
+        return self._items[bisect_left(self._prices, low):bisect_right(self._prices, high)]
+
+    def under(self, price):
+        """Items strictly cheaper than price"""
+        return self._items[:bisect_left(self._prices, price)]
+
+    def over(self, price):
+        """Items strictly more expensive than price"""
+        return self._items[bisect_right(self._prices, price):]
+
+    def cheapest(self, k):
+        """The k cheapest items, cheapest first"""
+        return self._items[:max(k, 0)]
+
+    def most_expensive(self, k):
+        """The k most expensive items, most expensive first"""
+        if k <= 0:
+            return []
+        return self._items[:-k-1:-1]
+
+
+class NameIndex():
+    """Prefix index (trie) over the names of the menu items.
+    Names are case-folded and split into tokens; every token is indexed so that
+    "swi" finds "Mushroom Swiss". Each node of the trie keeps the items reachable
+    from it, in load order, hence a lookup costs O(length of the fragment + k)
+    regardless of the size of the menu.
+    """
+    _ITEMS = None   # key of the list of items in a trie node, can't collide with a character
+
+    def __init__(self, items=None):
+        self._root = {NameIndex._ITEMS: []}
+        self._len = 0
+        if items:
+            self.extend(items)
+
+    def __len__(self):
+        return self._len
+
+    @staticmethod
+    def tokenize(text):
+        return text.casefold().split()
+
+    def add(self, item):
+        """Index all the prefixes of all the tokens of the item name"""
+        ITEMS = NameIndex._ITEMS
+        for token in NameIndex.tokenize(item.name):
+            node = self._root
+            for char in token:
+                child = node.get(char)
+                if child is None:
+                    # a new branch: the nodes below are created with the item
+                    child = node[char] = {ITEMS: [item]}
+                    node = child
+                    continue
+                node = child
+                items = node[ITEMS]
+                # the same item may reach a node twice, via two tokens sharing a prefix
+                if items[-1] is not item:
+                    items.append(item)
+        self._len += 1
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def clear(self):
+        self._root = {NameIndex._ITEMS: []}
+        self._len = 0
+
+    def _prefix(self, token):
+        node = self._root
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node[NameIndex._ITEMS]
+
+    def search(self, text):
+        """Items for which each token of text is the prefix of a token of their name.
+        The items are returned in load order."""
+        tokens = NameIndex.tokenize(text)
+        if not tokens:
+            return []
+        # start from the most selective token, filter with the others
+        candidates = sorted((self._prefix(token) for token in tokens), key=len)
+        if len(candidates) == 1:
+            return list(candidates[0])
+        others = [set(map(id, items)) for items in candidates[1:]]
+        return [item for item in candidates[0] if all(id(item) in ids for ids in others)]
@@ -0,0 +1,74 @@
+"""Test the indexes over the menu items"""
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+from menuindex import *
+from menuitem import Burger
+from menu import Menu
+import unittest
+
+class TestPriceIndex(unittest.TestCase):
+    items = [Burger(name, price) for name, price in [("a", 5.25), ("b", 5.95), ("c", 4.5), ("d", 5.95), ("e", 7.99)]]
+
+    def test_sorted(self):
+        index = PriceIndex(self.items)
+        self.assertEqual(len(index), 5)
+        self.assertEqual([item.name for item in index], ["c", "a", "b", "d", "e"])
+
+        index.add(Burger("f", 5.95))
+        self.assertEqual([item.name for item in index], ["c", "a", "b", "d", "f", "e"])
+        index.clear()
+        self.assertEqual(len(index), 0)
+
+    def test_range_queries(self):
+        index = PriceIndex(self.items)
+        self.assertEqual([item.name for item in index.under(6)], ["c", "a", "b", "d"])
+        self.assertEqual([item.name for item in index.under(4.5)], [])
+        self.assertEqual([item.name for item in index.over(5.95)], ["e"])
+        self.assertEqual([item.name for item in index.between(5.25, 5.95)], ["a", "b", "d"])
+        self.assertEqual(index.between(6, 7), [])
+
+    def test_top_k(self):
+        index = PriceIndex(self.items)
+        self.assertEqual([item.name for item in index.cheapest(2)], ["c", "a"])
+        self.assertEqual([item.name for item in index.most_expensive(2)], ["e", "d"])
+        self.assertEqual(index.cheapest(0), [])
+        self.assertEqual(index.most_expensive(0), [])
+        self.assertEqual(len(index.most_expensive(10)), 5)
+
+    def test_menu_load(self):
+        menu = Menu(auto_load=True)
+        self.assertEqual(len(menu.by_price), len(menu))
+        prices = [item.price for item in menu.by_price]
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual(menu.by_price.cheapest(1)[0].name, "de Anza Burger")
+
+
+class TestNameIndex(unittest.TestCase):
+    items = [Burger(name, 5.0) for name in ["de Anza Burger", "Bacon Cheese", "Mushroom Swiss", "Western Burger", "Bacon Bacon"]]
+
+    def names(self, items):
+        return [item.name for item in items]
+
+    def test_prefix(self):
+        index = NameIndex(self.items)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(self.names(index.search("bac")), ["Bacon Cheese", "Bacon Bacon"])
+        self.assertEqual(self.names(index.search("SWI")), ["Mushroom Swiss"])
+        self.assertEqual(self.names(index.search("burger")), ["de Anza Burger", "Western Burger"])
+        self.assertEqual(index.search("pizza"), [])
+        self.assertEqual(index.search("   "), [])
+
+    def test_tokens(self):
+        index = NameIndex(self.items)
+        self.assertEqual(self.names(index.search("w bur")), ["Western Burger"])
+        self.assertEqual(self.names(index.search("bacon ch")), ["Bacon Cheese"])
+        self.assertEqual(index.search("bacon swiss"), [])
+
+    def test_menu_load(self):
+        menu = Menu(auto_load=True)
+        self.assertEqual(len(menu.by_name), len(menu))
+        self.assertEqual(self.names(menu.by_name.search("don")), ["Don Cali Burger"])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
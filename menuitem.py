@@ -11,6 +11,8 @@ from abc import ABC
 
 class MenuItem(ABC):
     """Abstract class for the menu items defined as a tuple(name,price) """
+    tax_class = "exempt" # see taxtable, may be overridden per item
+
     def __init__(self, name, price):
         self._name = name
         self._price= price
@@ -47,8 +49,8 @@ class ItemDisplay():
     
 class Burger(MenuItem):
     """That's a burger on the menu"""
-    pass
+    tax_class = "hot_food"
 
 class Beverage(MenuItem):
     """That's a beverage on the menu"""
-    pass
\ No newline at end of file
+    tax_class = "beverage"
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Menu stored in a local SQLite database, replacing the JSON file emulating the
+diner's database. The menu items are kept in one table, indexed by key, by name
+and by price, so that a lookup is a single indexed query.
+
+The connections are shared by the ordering sessions through a small pool. Each
+connection is tuned for reads (memory-mapped I/O, in-memory temporary tables,
+larger page cache) and keeps its statements prepared: the SQL of the queries is
+constant, so sqlite3 reuses the compiled statement from its per-connection cache.
+
+The JSON format of burger.json.txt is still supported to import and export the menu:
+
+    store = MenuStore('menu.db')
+    store.import_json('./burger.json.txt')
+    menu = store.menu()              # a Menu, as loaded from the JSON file
+    store.get(2), store.search('bac'), store.between(5, 6)
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["MenuStore", "ConnectionPool"]
+
+from menu import Menu, CategorizedMenu, _read
+from contextlib import contextmanager
+from itertools import count
+import threading
+import sqlite3
+import queue
+import json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    price REAL NOT NULL,
+    tax_class TEXT
+);
+CREATE INDEX IF NOT EXISTS items_name ON items(name);
+CREATE INDEX IF NOT EXISTS items_price ON items(price);
+CREATE INDEX IF NOT EXISTS items_category ON items(category, key);
+"""
+
+_COLUMNS = "key, category, name, price, tax_class"
+_GET = f"SELECT {_COLUMNS} FROM items WHERE key = ?"
+_SEARCH = f"SELECT {_COLUMNS} FROM items WHERE name LIKE ? ESCAPE '\\' ORDER BY name, key"
+_BETWEEN = f"SELECT {_COLUMNS} FROM items WHERE price BETWEEN ? AND ? ORDER BY price, key"
+_CHEAPEST = f"SELECT {_COLUMNS} FROM items ORDER BY price, key LIMIT ?"
+_MOST_EXPENSIVE = f"SELECT {_COLUMNS} FROM items ORDER BY price DESC, key LIMIT ?"
+_CATEGORY = f"SELECT {_COLUMNS} FROM items WHERE category = ? ORDER BY key"
+_ALL = f"SELECT {_COLUMNS} FROM items ORDER BY key"
+_COUNT = "SELECT count(*) FROM items"
+_INSERT = "INSERT INTO items (category, name, price, tax_class) VALUES (?, ?, ?, ?)"
+_UPDATE_PRICE = "UPDATE items SET price = ? WHERE key = ?"
+_DELETE = "DELETE FROM items WHERE key = ?"
+
+_memory_databases = count(1)
+
+
+class ConnectionPool():
+    """Pool of at most size connections to the same database, shared by threads.
+    with pool.connection() as connection: ... blocks while all of them are in use."""
+    def __init__(self, database, size=4, uri=False):
+        self._database = database
+        self._uri = uri
+        self._size = size
+        self._created = 0
+        self._idle = queue.LifoQueue() # the most recently used connection is the warmest
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        connection = sqlite3.connect(self._database, uri=self._uri, check_same_thread=False, cached_statements=256)
+        connection.execute("PRAGMA temp_store = MEMORY")
+        connection.execute("PRAGMA cache_size = -8192") # KiB
+        connection.execute("PRAGMA mmap_size = 67108864")
+        if connection.execute("PRAGMA journal_mode = WAL").fetchone()[0] == 'wal':
+            # readers never block the writer, nor the writer the readers
+            connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+
+
+class MenuStore():
+    """Menu items in a SQLite database, keyed from 1 in insertion order.
+    . database: path of the database file, ':memory:' for a private in-memory database
+    . pool_size: number of connections shared by the sessions
+    """
+    categories = CategorizedMenu.categories
+
+    def __init__(self, database=':memory:', pool_size=4):
+        self._keeper = None
+        if database == ':memory:':
+            # a named in-memory database is shared by the connections of the pool,
+            # as long as one of them stays open
+            database = f'file:menustore_{next(_memory_databases)}?mode=memory&cache=shared'
+            self._keeper = sqlite3.connect(database, uri=True, check_same_thread=False)
+            self._pool = ConnectionPool(database, pool_size, uri=True)
+        else:
+            self._pool = ConnectionPool(database, pool_size)
+        with self._pool.connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._pool.close()
+        if self._keeper is not None:
+            self._keeper.close()
+            self._keeper = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        with self._pool.connection() as connection:
+            return connection.execute(_COUNT).fetchone()[0]
+
+    def _item(self, row):
+        key, category, name, price, tax_class = row
+        item = self.categories.get(category, self.categories['burgers'])(name, price)
+        if tax_class is not None:
+            item.tax_class = tax_class
+        return item
+
+    def _query(self, sql, parameters):
+        with self._pool.connection() as connection:
+            return [self._item(row) for row in connection.execute(sql, parameters)]
+
+    def get(self, key):
+        """Menu item of the key, KeyError if there is none"""
+        with self._pool.connection() as connection:
+            row = connection.execute(_GET, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._item(row)
+
+    def search(self, prefix):
+        """Menu items whose name starts with prefix, case-insensitive"""
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return self._query(_SEARCH, (escaped + '%',))
+
+    def between(self, low, high):
+        """Menu items priced in [low, high], from the cheapest"""
+        return self._query(_BETWEEN, (low, high))
+
+    def cheapest(self, k):
+        return self._query(_CHEAPEST, (k,))
+
+    def most_expensive(self, k):
+        return self._query(_MOST_EXPENSIVE, (k,))
+
+    def records(self, category='burgers'):
+        """Records {'name', 'price'[, 'tax_class']} of a category, as in the JSON file"""
+        with self._pool.connection() as connection:
+            rows = connection.execute(_CATEGORY, (category,)).fetchall()
+        records = []
+        for _, _, name, price, tax_class in rows:
+            record = {'name': name, 'price': price}
+            if tax_class is not None:
+                record['tax_class'] = tax_class
+            records.append(record)
+        return records
+
+    def menu(self, category='burgers', tax_table=None):
+        """Menu of a category, as Menu.load would build it from the JSON file"""
+        menu = Menu(tax_table=tax_table)
+        menu.load_records(self.records(category), self.categories[category])
+        return menu
+
+    def add(self, name, price, category='burgers', tax_class=None):
+        """Add a menu item, returns its key"""
+        with self._pool.connection() as connection:
+            with connection:
+                return connection.execute(_INSERT, (category, name, price, tax_class)).lastrowid
+
+    def update_price(self, key, price):
+        with self._pool.connection() as connection:
+            with connection:
+                if connection.execute(_UPDATE_PRICE, (price, key)).rowcount == 0:
+                    raise KeyError(key)
+
+    def delete(self, key):
+        with self._pool.connection() as connection:
+            with connection:
+                if connection.execute(_DELETE, (key,)).rowcount == 0:
+                    raise KeyError(key)
+
+    def import_json(self, file, replace=True):
+        """Import the categories of a JSON file in the format of burger.json.txt,
+        replacing the current content unless replace is False"""
+        data = _read(file)
+        rows = [(category, record['name'], record['price'], record.get('tax_class'))
+                for category in self.categories for record in data.get(category, [])]
+        with self._pool.connection() as connection:
+            with connection:
+                if replace:
+                    connection.execute("DELETE FROM items")
+                connection.executemany(_INSERT, rows)
+        return len(rows)
+
+    def export_json(self, file):
+        """Export the menu into a JSON file in the format of burger.json.txt"""
+        data = {category: self.records(category) for category in self.categories}
+        data = {category: records for category, records in data.items() if records}
+        try:
+            with open(file, "w") as fd:
+                fd.write(json.dumps(data))
+        except Exception as e:
+            print(f'unexpected exception. Make sure {file} is in a writable directory')
+            raise e
+
+
+if __name__ == "__main__":
+    with MenuStore() as store:
+        store.import_json("./burger.json.txt")
+        print(store.menu())
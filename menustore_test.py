@@ -0,0 +1,79 @@
+"""Test the package menustore"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from menustore import *
+from menu import Menu
+from menuitem import Burger, Beverage
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+import tempfile
+import json
+import os
+
+
+class TestMenuStore(unittest.TestCase):
+    def setUp(self):
+        self.store = MenuStore()
+        self.store.import_json("./burger.json.txt")
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_same_as_json(self):
+        menu = Menu(auto_load=True)
+        self.assertEqual(len(self.store), len(menu))
+        self.assertEqual(str(self.store.menu()), str(menu))
+        self.assertEqual(self.store.get(2).name, "Bacon Cheese")
+        self.assertIsInstance(self.store.get(1), Burger)
+        with self.assertRaises(KeyError):
+            self.store.get(99)
+
+    def test_lookups(self):
+        self.assertEqual([item.name for item in self.store.search("m")], ["Mushroom Swiss"])
+        self.assertEqual([item.name for item in self.store.search("DE ANZA")], ["de Anza Burger"])
+        self.assertEqual(self.store.search("%"), [])
+        self.assertEqual([item.name for item in self.store.between(5.5, 5.95)],
+                         ["Bacon Cheese", "Mushroom Swiss", "Western Burger", "Don Cali Burger"])
+        self.assertEqual(self.store.cheapest(1)[0].name, "de Anza Burger")
+        self.assertEqual(self.store.most_expensive(1)[0].price, 5.95)
+
+    def test_edit(self):
+        key = self.store.add("Soda", 1.5, "beverages", tax_class="exempt")
+        self.assertIsInstance(self.store.get(key), Beverage)
+        self.assertEqual(self.store.get(key).tax_class, "exempt")
+        self.store.update_price(key, 1.75)
+        self.assertEqual(self.store.get(key).price, 1.75)
+        self.assertEqual(len(self.store.menu("beverages")), 1)
+        self.store.delete(key)
+        with self.assertRaises(KeyError):
+            self.store.delete(key)
+
+    def test_export_import(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, "menu.json")
+            self.store.add("Soda", 1.5, "beverages")
+            self.store.export_json(file)
+            with open(file) as fd:
+                data = json.loads(fd.read())
+            self.assertEqual(len(data["burgers"]), 5)
+            self.assertEqual(data["beverages"], [{"name": "Soda", "price": 1.5}])
+
+            with MenuStore(os.path.join(folder, "menu.db")) as store:
+                self.assertEqual(store.import_json(file), 6)
+                self.assertEqual(store.import_json(file), 6)
+                self.assertEqual(len(store), 6)
+
+    def test_pool(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with MenuStore(os.path.join(folder, "menu.db"), pool_size=2) as store:
+                store.import_json("./burger.json.txt")
+                with ThreadPoolExecutor(8) as executor:
+                    names = list(executor.map(lambda key: store.get(key % 5 + 1).name, range(200)))
+                self.assertEqual(names[:5], ["de Anza Burger", "Bacon Cheese", "Mushroom Swiss", "Western Burger", "Don Cali Burger"])
+                self.assertLessEqual(store._pool._created, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
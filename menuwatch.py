@@ -0,0 +1,98 @@
+"""
+Hot-reload of the menu for the live sessions. A price change no longer needs a
+restart of the kiosks: the watcher polls the menu file with a mere stat(), and
+when the file changed, builds the new keyed menu off the hot path then swaps it
+in with a single assignment. The new orders start with the new menu, the orders
+in progress keep the menu they started with.
+
+    watcher = MenuWatcher('./burger.json.txt')
+    watcher.start(interval=1.0)
+    order = Order(menu=watcher.current())
+    pool = OrderPool(menu=watcher.current) # each customer starts with the latest menu
+
+A file being rewritten may be read half-way: a menu that does not parse is
+ignored, the previous one is kept and the file is read again on the next poll.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["MenuWatcher"]
+
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+import threading
+import json
+import os
+
+
+class MenuWatcher():
+    """Keyed menu of a JSON file, reloaded when the file changes.
+    The menu is loaded once at construction: the file must be valid then."""
+    def __init__(self, file="./burger.json.txt", tax_table=None):
+        self._file = file
+        self._tax_table = tax_table
+        self._signature = None
+        self._current = None
+        self._version = 0
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock() # one reload at a time
+        if not self.check():
+            raise ValueError(f'menu {file} cannot be loaded')
+
+    @property
+    def version(self):
+        """Number of menus loaded so far"""
+        return self._version
+
+    def current(self):
+        """The latest keyed menu. It is never modified: it can be kept for a whole session."""
+        return self._current
+
+    def _stat(self):
+        try:
+            stat = os.stat(self._file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _build(self):
+        with open(self._file, "r") as fd:
+            data = json.loads(fd.read())
+        menu = Menu(tax_table=self._tax_table)
+        menu.load_records(data["burgers"])
+        return MenuDecoratorForOrder(menu)
+
+    def check(self):
+        """Reload the menu if the file changed since the last load.
+        Returns True if a new menu was swapped in."""
+        with self._lock:
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                menu = self._build()
+            except (OSError, ValueError, KeyError, TypeError):
+                # e.g. partially written: kept for the next poll
+                return False
+            self._current = menu
+            self._signature = signature
+            self._version += 1
+            return True
+
+    def start(self, interval=1.0):
+        """Poll the file every interval seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='menu-watcher', daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stopping.wait(interval):
+            self.check()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,89 @@
+"""Test the package menuwatch"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from menuwatch import *
+from order import Order
+from taxtable import TaxTable
+import unittest
+import tempfile
+import json
+import gc
+import time
+import os
+
+
+class TestMenuWatcher(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._folder.name, 'menu.json')
+        self._ticks = 0
+        self.write(5.25)
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def write(self, price, name="de Anza Burger"):
+        with open(self.file, 'w') as fd:
+            fd.write(json.dumps({"burgers": [{"name": name, "price": price}, {"name": "Bacon Cheese", "price": 5.75}]}))
+        # the modification time may not change within the resolution of the file system
+        self._ticks += 1
+        stat = os.stat(self.file)
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9 * self._ticks))
+
+    def test_swap(self):
+        watcher = MenuWatcher(self.file)
+        self.assertEqual(watcher.version, 1)
+        self.assertFalse(watcher.check())
+
+        order = Order(menu=watcher.current())
+        self.assertEqual(order.menu[1].price, 5.25)
+
+        self.write(5.50)
+        self.assertTrue(watcher.check())
+        self.assertEqual(watcher.version, 2)
+        # the session in progress keeps its menu, the new ones get the new prices
+        self.assertEqual(order.menu[1].price, 5.25)
+        self.assertEqual(Order(menu=watcher.current()).menu[1].price, 5.50)
+
+    def test_reload_releases_menu(self):
+        table = TaxTable({})
+        watcher = MenuWatcher(self.file, tax_table=table)
+        for price in (5.50, 5.75, 6.00):
+            self.write(price)
+            self.assertTrue(watcher.check())
+        gc.collect()
+        # the rates of the previous menus are not kept by the shared tax table
+        self.assertEqual(len(table._rates), len(watcher.current()))
+
+    def test_partial_write(self):
+        watcher = MenuWatcher(self.file)
+        menu = watcher.current()
+        with open(self.file, 'w') as fd:
+            fd.write('{"burgers": [{"name": "de Anza')
+        self.assertFalse(watcher.check())
+        self.assertIs(watcher.current(), menu)
+        self.write(6.0)
+        self.assertTrue(watcher.check())
+        self.assertEqual(watcher.current()[1].price, 6.0)
+
+        os.remove(self.file)
+        self.assertFalse(watcher.check())
+        with self.assertRaises(ValueError):
+            MenuWatcher(self.file)
+
+    def test_background(self):
+        watcher = MenuWatcher(self.file)
+        watcher.start(interval=0.01)
+        self.write(7.0)
+        for _ in range(500):
+            if watcher.version == 2:
+                break
+            time.sleep(0.01)
+        watcher.stop()
+        self.assertEqual(watcher.current()[1].price, 7.0)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,141 @@
+"""
+Instrumentation of the system: latency histograms and counters.
+Recording is meant to be cheap enough to be always on: the buckets of the
+histograms are preallocated and recording a value is a bisect plus a few
+additions. A snapshot of all the metrics can be dumped at any time as a dict,
+ready to be serialized in JSON.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["LatencyHistogram", "Metrics", "TimedIO", "default_metrics"]
+
+from bisect import bisect_left
+from time import perf_counter
+
+
+class LatencyHistogram():
+    """Histogram of durations in seconds, with log2-spaced buckets from 1us to ~67s.
+    The last bucket collects anything slower."""
+    BOUNDS = [1e-6 * 2**k for k in range(27)]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._counts = [0] * (len(LatencyHistogram.BOUNDS)+1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self._counts[bisect_left(LatencyHistogram.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (p in [0, 100])"""
+        if self.count == 0:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self._counts):
+            seen += n
+            if n and seen >= rank:
+                return LatencyHistogram.BOUNDS[i] if i < len(LatencyHistogram.BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': {f'{bound:.6f}': n for bound, n in zip(LatencyHistogram.BOUNDS + [float('inf')], self._counts) if n},
+        }
+
+
+class _Timer():
+    """Context manager recording the duration of its block into a histogram"""
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.record(perf_counter() - self._start)
+        return False
+
+
+class Metrics():
+    """Latency histograms per command and counters of the ordering sessions.
+    . commands: add, update, delete, display, commit (processing time only)
+    . question_wait: time spent waiting for the end-user to answer
+    . counters: orders, lines, committed, cancellations
+    """
+    COMMANDS = ('add', 'update', 'delete', 'display', 'commit')
+    COUNTERS = ('orders', 'lines', 'committed', 'cancellations')
+
+    def __init__(self):
+        self._histograms = {name: LatencyHistogram() for name in Metrics.COMMANDS + ('question_wait',)}
+        self._counters = dict.fromkeys(Metrics.COUNTERS, 0)
+
+    def histogram(self, name):
+        if name not in self._histograms:
+            self._histograms[name] = LatencyHistogram()
+        return self._histograms[name]
+
+    def time(self, name):
+        """with metrics.time('add'): ... records the duration of the block"""
+        return _Timer(self.histogram(name))
+
+    def incr(self, name, n=1):
+        self._counters[name] = self._counters.get(name, 0) + n
+
+    def __getitem__(self, name):
+        return self._counters[name]
+
+    def reset(self):
+        for histogram in self._histograms.values():
+            histogram.reset()
+        for name in self._counters:
+            self._counters[name] = 0
+
+    def snapshot(self):
+        """All the metrics as a dict. The processing time is the sum over the commands,
+        to be compared with the time waiting for the end-users."""
+        latency = {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+        return {
+            'latency': latency,
+            'counters': dict(self._counters),
+            'processing_time': sum(latency[name]['total'] for name in Metrics.COMMANDS),
+            'wait_time': latency['question_wait']['total'],
+        }
+
+
+class TimedIO():
+    """Question I/O backend wrapper recording the time waiting for the answers"""
+    def __init__(self, io, metrics):
+        self._io = io
+        self._histogram = metrics.histogram('question_wait')
+
+    def read(self, prompt):
+        start = perf_counter()
+        answer = self._io.read(prompt)
+        self._histogram.record(perf_counter() - start)
+        return answer
+
+    def write(self, text):
+        self._io.write(text)
+
+
+# shared by all the orders of the process unless specified otherwise
+default_metrics = Metrics()
@@ -0,0 +1,60 @@
+"""Test the instrumentation package"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+import unittest
+import json
+from metrics import *
+from questionio import QueueIO
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        h = LatencyHistogram()
+        self.assertEqual(h.percentile(50), 0.0)
+        for _ in range(90):
+            h.record(3e-6)
+        for _ in range(10):
+            h.record(1e-3)
+        self.assertEqual(h.count, 100)
+        self.assertAlmostEqual(h.total, 90*3e-6 + 10*1e-3)
+        self.assertEqual(h.max, 1e-3)
+        self.assertEqual(h.percentile(50), 4e-6)
+        self.assertGreaterEqual(h.percentile(95), 1e-3)
+        self.assertLess(h.percentile(95), 2e-3)
+        h.record(1000.0)
+        self.assertEqual(h.percentile(100), 1000.0)
+        h.reset()
+        self.assertEqual(h.count, 0)
+
+    def test_metrics(self):
+        m = Metrics()
+        with m.time('add'):
+            pass
+        with m.time('custom'):
+            pass
+        m.incr('lines', 3)
+        m.incr('orders')
+        self.assertEqual(m['lines'], 3)
+        snapshot = m.snapshot()
+        self.assertEqual(snapshot['latency']['add']['count'], 1)
+        self.assertEqual(snapshot['latency']['custom']['count'], 1)
+        self.assertEqual(snapshot['counters']['orders'], 1)
+        self.assertEqual(snapshot['counters']['cancellations'], 0)
+        self.assertGreaterEqual(snapshot['processing_time'], 0.0)
+        json.dumps(snapshot)
+        m.reset()
+        self.assertEqual(m['lines'], 0)
+        self.assertEqual(m.snapshot()['latency']['add']['count'], 0)
+
+    def test_timed_io(self):
+        m = Metrics()
+        io = TimedIO(QueueIO(["1", "2"]), m)
+        self.assertEqual(io.read("? "), "1")
+        self.assertEqual(io.read("? "), "2")
+        self.assertEqual(m.snapshot()['latency']['question_wait']['count'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -20,10 +20,16 @@ from menu import Menu
 from linkedbag import LinkedBag
 from person import *
 from transaction import *
+from persistent import PersistentTransactions
 from questions import *
+from questionio import get_default_io, WouldBlock
+from metrics import TimedIO, default_metrics
+from events import *
 from functools import reduce
+from inspect import isgenerator
 from random import randint
 import printer
+import wal
 
 class IllegalChoice(Exception):
     pass
@@ -35,27 +41,83 @@ class Order():
     MAX_ITEM = 50
 
     commands = [
-        ('update', lambda obj:obj.update()),
-        ('delete', lambda obj:obj.delete()),
+        ('update', lambda obj:obj._update()),
+        ('delete', lambda obj:obj._delete()),
         ("display the menu", lambda obj:obj.print_commands()),
         ("display the order", lambda obj:obj.display_order()),
-        ("finalize the order and pay", lambda obj:obj.commit()),
-        ("quit", lambda obj:obj.shutdown()),
+        ("finalize the order and pay", lambda obj:obj._commit()),
+        ("quit", lambda obj:obj.cancel()),
+        ("undo the last edit", lambda obj:obj.undo() and obj.display_order()),
+        ("redo the last edit undone", lambda obj:obj.redo() and obj.display_order()),
     ]
 
 
 
-    def __init__(self):
-        self._menu = MenuDecoratorForOrder(Menu(auto_load=True))
-        self._transactions = Transactions() # composed of (MenuItem, quantity)
-
-        self._commands = LinkedBag()
-        for i,command in enumerate(Order.commands,1):
-            self._commands.add((len(self._menu)+i,command))
-
-        self._total = {'pre_tax': 0.0, 'tax_rate': 0.0, 'taxes': 0.0, 'grand_total': 0.0}
-        self._len = len(self._commands)+len(self._menu)+1
+    def __init__(self, *, metrics=None, io=None, tax_table=None, repository=None, menu=None, checkpoint=None, wal=None, events=None, receipts=None):
+        self._metrics = metrics or default_metrics
+        # the receipts are stored in this folder, the current directory by default
+        self._receipts = receipts
+        # finalized orders are handed to the repository, if any, which stores them in the background
+        self._repository = repository
+        # the order in progress is checkpointed after each edit, if a checkpoint is given
+        self._checkpoint = checkpoint
+        # the edits are logged into the write-ahead log shared by the sessions, if any
+        self._wal = wal
+        # the edits and the end of the order are published on the event bus, if any
+        self._events = events
+        # the questions wait for the end-user through a timed backend
+        self._io = TimedIO(io or get_default_io(), self._metrics)
+        # with a tax table, the rate of each line depends on the item and the customer
+        self._tax_table = tax_table
+        # a keyed menu given by the caller e.g. the current one of a MenuWatcher,
+        # kept for the whole session even if a new menu is swapped in meanwhile.
+        # The commands are keyed after the last key the menu may give: a paginated
+        # menu keys its items as its pages are displayed
+        self._menu = menu if menu is not None else MenuDecoratorForOrder(Menu(auto_load=True, tax_table=tax_table))
+        self._commands = Order._keyed_commands(self._menu.max_key())
+        self._len = len(self._commands)+self._menu.max_key()+1
+        # each edit creates a new version sharing most of its structure with
+        # the previous one: keeping the versions for undo/redo is almost free
+        self._undo = []
+        self._redo = []
+        self._total = {}
+        self._start()
+
+    # keyed commands per size of menu, never modified once built
+    _command_bags = {}
+
+    @classmethod
+    def _keyed_commands(cls, menu_size):
+        if menu_size not in cls._command_bags:
+            commands = LinkedBag()
+            for i,command in enumerate(Order.commands,1):
+                commands.add((menu_size+i,command))
+            cls._command_bags[menu_size] = commands
+        return cls._command_bags[menu_size]
+
+    def _start(self):
+        """State of a new customer"""
+        self._metrics.incr('orders')
+        self._transactions = PersistentTransactions() # composed of (MenuItem, quantity)
+        self._undo.clear()
+        self._redo.clear()
+        self._total.update(pre_tax=0.0, tax_rate=0.0, taxes=0.0, grand_total=0.0)
         self._id = randint(10_000, 100_000)
+        self._session = None # the flow suspended by a non-blocking backend, if any
+
+    def reset(self, *, io=None, menu=None):
+        """Recycle the order for the next customer: only the state of the customer is
+        cleared, the menu, the commands and the repository are kept.
+        io: the I/O backend of the next customer, the current one by default
+        menu: the keyed menu of the next customer e.g. reloaded, the current one by default"""
+        if io is not None:
+            self._io = TimedIO(io, self._metrics)
+        if menu is not None and menu is not self._menu:
+            self._menu = menu
+            self._commands = Order._keyed_commands(self._menu.max_key())
+            self._len = len(self._commands)+self._menu.max_key()+1
+        self._start()
+        return self
 
     @property
     def transactions(self):
@@ -65,6 +127,14 @@ class Order():
         raise IllegalChoice('modifying transactions is prohibited')
     
 
+    @property
+    def checkpoint(self):
+        return self._checkpoint
+
+    @property
+    def metrics(self):
+        return self._metrics
+
     @property
     def menu(self):
         return self._menu
@@ -109,10 +179,49 @@ class Order():
 
 
     def fill(self):
-        """Main method called by the system to start the flow"""
-        self.add()
+        """Main method called by the system to start the flow, or to resume it.
+        All the outputs go through the I/O backend of the order. When a non-blocking
+        backend has no answer yet (WouldBlock), the session is suspended and fill
+        returns True: the next call, once answers arrived, resumes it by asking the
+        pending question again. No thread is needed per session.
+        The end of the order raises OrderTermination."""
+        if self._session is None:
+            self._session = self._add()
+        try:
+            next(self._session)
+        except StopIteration:
+            self._session = None
+            return False
+        except BaseException:
+            self._session = None
+            raise
+        return True
+
+    def _ask(self, question):
+        """Answer of the question, the flow being suspended while the backend has none yet"""
+        while True:
+            try:
+                return question.ask()
+            except WouldBlock:
+                yield
+
+    def _execute(self, command):
+        """Run the sub-menu command, part of the flow if it asks questions"""
+        flow = command[1][1](self)
+        if isgenerator(flow):
+            yield from flow
+
+    @staticmethod
+    def _complete(flow):
+        """Run a flow outside of fill: it cannot be suspended, WouldBlock is raised"""
+        for _ in flow:
+            raise WouldBlock()
 
     def add(self):
+        """Add items until the end of the order, see _add"""
+        self._complete(self._add())
+
+    def _add(self):
         """
         Add an item aka a transaction in the order:
         . the menu items are displayed
@@ -120,42 +229,68 @@ class Order():
         . the user selects the quantity (bounded to 50 max) for that burger
         . If the quantity is 0, the customer probably doesn't want that burger anymore
         . If no data is entered the menu is re-displayed
+        . Several burgers and their quantities can be entered at once e.g. 4x15, 2x3, 5
         """
 
         self.print_commands()
         while True:
             try:
                 question = "Select from the menu"
-                question = IntegerQuestion(question, range(1,self._len), error_message='please select a valid item from the menu options. Thank you.')
-                choice = question.ask()
+                question = OrderLineQuestion(question, range(1,self._len), self._lookup, range(1,len(self.menu)+1), self.MAX_ITEM, error_message='please select a valid item from the menu options. Thank you.', io=self._io)
+                choice = yield from self._ask(question)
             except SkipInput: 
                 # the user entered an empty string
                 self.print_commands()
                 continue
 
+            # the user entered a whole batch of items, already validated
+            if isinstance(choice, list):
+                self.add_batch(choice)
+                continue
+
             # the user entered a menu item
             if 1 <= choice <= len(self.menu):
                 try:
                     question = f'Select the quantity for {self.menu[choice].name}'
-                    question = IntegerQuestion(question, range(0,self.MAX_ITEM+1), error_message=f"up to {self.MAX_ITEM} please...")
-                    quantity = question.ask()
+                    question = IntegerQuestion(question, range(0,self.MAX_ITEM+1), error_message=f"up to {self.MAX_ITEM} please...", io=self._io)
+                    quantity = yield from self._ask(question)
                 except SkipInput:
                     quantity = 0
 
                 if quantity == 0:
-                    print(f'{self.menu[choice].name} choice has been cancelled')
+                    self._io.write(f'{self.menu[choice].name} choice has been cancelled')
                     continue
 
-                self._transactions.add(Transaction(self.menu[choice],quantity))
+                with self._metrics.time('add'):
+                    self._apply(self._transactions.add(Transaction(self.menu[choice],quantity)), [self.menu[choice]])
+                    self._metrics.incr('lines')
                 continue
 
             # the user entered a sub-menu command e.g. update, pay, quit...
             for command in self._commands:
                 if choice == command[0]:
-                    command[1][1](self)
+                    yield from self._execute(command)
+                    break
+            else:
+                # the key of an item on a page not displayed yet
+                self._io.write('please select a valid item from the menu options. Thank you.')
+
 
+    def add_batch(self, batch):
+        """Add a batch of (menu key, quantity) as a single edit of the order,
+        hence undone at once."""
+        with self._metrics.time('add'):
+            transactions = self._transactions
+            for key, quantity in batch:
+                transactions = transactions.add(Transaction(self.menu[key],quantity))
+            self._apply(transactions, [self.menu[key] for key, _ in batch])
+            self._metrics.incr('lines', len(batch))
 
     def update(self):
+        """Update a transaction then go on adding items, see _update"""
+        self._complete(self._update())
+
+    def _update(self):
         """Update a trasaction, entering in a "sub-menu".
         . the items compising the current order are displayed
         . the user selects an existing item from their order
@@ -166,16 +301,16 @@ class Order():
         while True:
             try:
                 question = "Select a transaction from the order to update a quantity"
-                choice = IntegerQuestion(question, self._transactions.keys()).ask()
+                choice = yield from self._ask(IntegerQuestion(question, self._transactions.keys(), io=self._io))
             except SkipInput: 
                 # the user enters nothing
-                print(f'update cancelled, back to main menu.')
+                self._io.write(f'update cancelled, back to main menu.')
                 break
 
             if choice > len(self.menu):
                 for command in self._commands:
                     if choice == command[0]:
-                        command[1][1](self)
+                        yield from self._execute(command)
                 continue
 
             existing_transaction = self._transactions[choice]
@@ -184,28 +319,33 @@ class Order():
             try:
                 existing_transaction = self._transactions[choice]
             except KeyError:
-                print(f'please select an item from your order. Thank you.')
+                self._io.write(f'please select an item from your order. Thank you.')
                 continue
             """
             try:
                 question = f'Select the new quantity for {existing_transaction.item.name}'
-                question = IntegerQuestion(question, range(0,self.MAX_ITEM+1), error_message=f'please up to {self.MAX_ITEM} items. Thanks.')
-                quantity = question.ask()
+                question = IntegerQuestion(question, range(0,self.MAX_ITEM+1), error_message=f'please up to {self.MAX_ITEM} items. Thanks.', io=self._io)
+                quantity = yield from self._ask(question)
             except SkipInput:
                 # empty input
-                print(f'update cancelled, back to main menu.')
+                self._io.write(f'update cancelled, back to main menu.')
                 break
 
-            self._transactions.update(Transaction(existing_transaction.item,quantity))
+            with self._metrics.time('update'):
+                self._apply(self._transactions.update(Transaction(existing_transaction.item,quantity)), [existing_transaction.item])
 
 
             if quantity == 0:
-                print(f'{existing_transaction.item.name} has been deleted')
+                self._io.write(f'{existing_transaction.item.name} has been deleted')
             break
             
-        self.add()
+        yield from self._add()
 
     def delete(self):
+        """Delete a transaction then go on adding items, see _delete"""
+        self._complete(self._delete())
+
+    def _delete(self):
         """Delete a transaction from the order:
         . display the content of the current order
         . the user selects a transaction ID
@@ -215,16 +355,16 @@ class Order():
         while True:
             try:
                 question = "Select from the order to delete an item"
-                choice = IntegerQuestion(question, self._transactions.keys()).ask()
+                choice = yield from self._ask(IntegerQuestion(question, self._transactions.keys(), io=self._io))
             except SkipInput: 
                 # the user enters nothing
-                print(f'deletion cancelled, back to main menu.')
+                self._io.write(f'deletion cancelled, back to main menu.')
                 break
 
             if choice > len(self.menu):
                 for command in self._commands:
                     if choice == command[0]:
-                        command[1][1](self)
+                        yield from self._execute(command)
                 continue
 
             existing_transaction = self._transactions[choice]
@@ -233,64 +373,197 @@ class Order():
                 existing_transaction = self._transactions[choice]
             except SkipInput:
                 # empty input
-                print(f'deletion cancelled, back to main menu.')
+                self._io.write(f'deletion cancelled, back to main menu.')
                 break
             """
 
-            self._transactions.delete(Transaction(existing_transaction.item,0))
-            print(f'{existing_transaction.item.name} has been deleted')
+            with self._metrics.time('delete'):
+                self._apply(self._transactions.delete(Transaction(existing_transaction.item,0)), [existing_transaction.item])
+            self._io.write(f'{existing_transaction.item.name} has been deleted')
             break
 
-        self.add()
-
+        yield from self._add()
+
+
+    def _lookup(self, fragment):
+        """Resolve a fragment of a burger name into the keys of the matching menu items"""
+        return [(key, item.name) for key, item in self.menu.find(fragment)]
+
+    def _apply(self, version, changed=None):
+        """Make version the current state of the transactions.
+        The previous state is kept for undo, and the redo history is discarded.
+        changed: the menu items edited, logged as such, all the lines by default"""
+        if version is self._transactions:
+            return
+        self._undo.append(self._transactions)
+        self._redo.clear()
+        self._transactions = version
+        self._save(self._undo[-1], changed)
+
+    def _save(self, previous, changed=None):
+        """Make the current state of the transactions durable, then publish the changes
+        since the previous state"""
+        if self._checkpoint is not None:
+            self._checkpoint.save(self)
+        if self._wal is not None:
+            self._log(changed)
+        if self._events is not None:
+            self._publish(previous, changed)
+
+    def _publish(self, previous, changed=None):
+        """Publish an event per item whose quantity changed: the items changed,
+        or all the items of both states by default"""
+        if changed is None:
+            changed = [t.item for t in previous] + [t.item for t in self._transactions]
+        events = []
+        seen = set()
+        for item in changed:
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            before = after = 0
+            try:
+                before = previous[item].quantity
+            except KeyError:
+                pass
+            try:
+                after = self._transactions[item].quantity
+            except KeyError:
+                pass
+            if before == after:
+                continue
+            kind = LINE_ADDED if before == 0 else LINE_REMOVED if after == 0 else QUANTITY_CHANGED
+            events.append(Event(kind, self._id, item, after))
+        if events:
+            self._events.publish(events)
+
+    def _log(self, changed=None):
+        """Append the new quantity of the items changed to the write-ahead log,
+        or all the lines if the whole state changed (e.g. undo)"""
+        keys = self._menu._keys
+        if changed is None:
+            records = [(self._id, wal.CLEAR)]
+            records += [(self._id, wal.SET, keys[t.item], t.quantity, t.item.name) for t in self._transactions]
+        else:
+            records = []
+            for item in changed:
+                try:
+                    quantity = self._transactions[item].quantity
+                except KeyError:
+                    quantity = 0 # removed
+                records.append((self._id, wal.SET, keys[item], quantity, item.name))
+        self._wal.extend(records)
+
+    def resume(self, order_id, transactions):
+        """Resume an order left in progress, e.g. recovered from a checkpoint or the
+        write-ahead log: its ID and its transactions, a fresh undo history"""
+        self._id = order_id
+        self._undo.clear()
+        self._redo.clear()
+        self._transactions = transactions
+
+    def undo(self):
+        """Revert the last edit of the order"""
+        if not self._undo:
+            self._io.write('nothing to undo.')
+            return False
+        self._redo.append(self._transactions)
+        self._transactions = self._undo.pop()
+        self._save(self._redo[-1])
+        return True
+
+    def redo(self):
+        """Re-apply the last edit reverted by undo"""
+        if not self._redo:
+            self._io.write('nothing to redo.')
+            return False
+        self._undo.append(self._transactions)
+        self._transactions = self._redo.pop()
+        self._save(self._undo[-1])
+        return True
 
     def print_commands(self):
         """Print the list of commands:
         . the menu items
         . the different additional commands
         """
-        print(self.menu)
-        for i,c in self._commands:
-            print(f'{i:<3} - {c[0]}')
+        with self._metrics.time('display'):
+            self._io.write(str(self.menu))
+            for i,c in self._commands:
+                self._io.write(f'{i:<3} - {c[0]}')
 
 
     def commit(self):
+        """Finalize the order, see _commit"""
+        self._complete(self._commit())
+
+    def _commit(self):
         """Finalize the order
         . collects the status of the customer student/staff
         . computes the pre-tax, tax and grand total amounts
         . prints the receipt
         . stores the receipt on file
+        . queues the order into the repository, if any
+        . publishes the order finalized on the event bus, if any
         """
         if len(self.transactions.keys()) == 0:
-            print('Empty order. Order aborted.')
-            self.shutdown()
+            self._io.write('Empty order. Order aborted.')
+            self.cancel()
 
         enum = [(1,"student",Student),(2,"staff",Staff)]
         flag = True
         while flag:
             try:
-                choice = EnumQuestion(enum).ask()
+                choice = yield from self._ask(EnumQuestion(enum, io=self._io))
             except ValueError:
                 continue
             else:
                 flag = False
         
-        choice().compute(self)
-
-        receipt = printer.Receipt(self)
-        receipt.issue()
-        receipt.store()
+        with self._metrics.time('commit'):
+            choice().compute(self)
+            if self._repository is not None:
+                self._repository.save(self, choice)
+            if self._events is not None:
+                self._events.publish([Event(ORDER_FINALIZED, self._id, total=self.post_tax)])
+
+            receipt = printer.VectoredReceipt(self, self._io.write)
+            receipt.issue()
+            receipt.store(self._receipts)
+        self._metrics.incr('committed')
         self.shutdown()
         
-    def compute(self):
-        """Compute the pre-tax, taxes and grand-total amounts"""
+    def compute(self, customer=None):
+        """Compute the pre-tax, taxes and grand-total amounts.
+        With a tax table and the type of customer, the taxes are computed line by line
+        and the tax rate becomes the effective rate of the whole order."""
         self._total['pre_tax'] = round(reduce(lambda total,transaction: total+transaction.item.price*transaction.quantity, self.transactions,0),2)
-        self._total['taxes'] = round(self.pre_tax*self.tax_rate,2)
+        if self._tax_table is not None and customer is not None:
+            self._total['taxes'] = round(self._tax_table.taxes(self.transactions, customer),2)
+            self._total['tax_rate'] = round(self.taxes/self.pre_tax,4) if self.pre_tax else 0.0
+        else:
+            self._total['taxes'] = round(self.pre_tax*self.tax_rate,2)
         self._total['grand_total'] = round(self.pre_tax+self.taxes,2)
 
+    def _set_totals(self, totals):
+        """Store totals computed outside of the order e.g. by the batch tax engine"""
+        for key in ('pre_tax', 'tax_rate', 'taxes', 'grand_total'):
+            self._total[key] = totals[key]
+
+    def cancel(self):
+        """Quit the order, loosing the transactions"""
+        self._metrics.incr('cancellations')
+        if self._events is not None:
+            self._events.publish([Event(ORDER_CANCELLED, self._id)])
+        self.shutdown()
+
     def shutdown(self):
         """Close the order for the current customer"""
-        print('Thank you for your visit. See you soon!!')
+        if self._checkpoint is not None:
+            self._checkpoint.clear()
+        if self._wal is not None:
+            self._wal.append(self._id, wal.END)
+        self._io.write('Thank you for your visit. See you soon!!')
         raise OrderTermination()
 
     def __str__(self):
@@ -298,7 +571,8 @@ class Order():
 
     def display_order(self):
         """Display the order, deferring the look-n-feel to the printer package"""
-        printer.PrintOnGoingOrder(self).issue()
+        with self._metrics.time('display'):
+            printer.PrintOnGoingOrder(self, self._io.write).issue()
 
 
 if __name__ == "__main__":
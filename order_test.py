@@ -7,6 +7,8 @@ from order import *
 from transaction import *
 from menu4order import *
 from menu import Menu
+from metrics import Metrics
+from questionio import QueueIO
 import unittest
 from unittest.mock import patch, call
 
@@ -28,7 +30,7 @@ class TestOrder(unittest.TestCase):
             order.menu = MenuDecoratorForOrder(Menu(auto_load=True))
 
         self.assertNotEqual(len(order._commands),0)
-        self.assertEqual(len(order._commands),6)
+        self.assertEqual(len(order._commands),8)
         for v in order._commands:
             self.assertTrue(v[1] in Order.commands)
             self.assertRegex(str(v[0]), r'\d+')
@@ -82,6 +84,8 @@ class TestOrder(unittest.TestCase):
             self.assertRegex(data, '9\s+-\s+display the order')
             self.assertRegex(data, '10\s+-\s+finalize the order and pay')
             self.assertRegex(data, '11\s+-\s+quit')
+            self.assertRegex(data, r'12\s+-\s+undo the last edit')
+            self.assertRegex(data, r'13\s+-\s+redo the last edit undone')
 
             burgers = [{'id': idx, 'name': order.menu[idx].name, 'price': round(order.menu[idx].price,2)} for idx in range(1,len(order.menu)+1)]
             for burger in burgers:
@@ -140,6 +144,69 @@ class TestOrder(unittest.TestCase):
 
         os.remove(test_file)
 
+    @patch('builtins.input', create=True)
+    def test_add_burger_by_name(self, mocked_input):
+        test_file = "_test_add_by_name.txt"
+        order = Order()
+        mocked_input.side_effect = ["bacon", "3", "burger", "cali", "2", "pizza", "9", "11"]
+        """
+        bacon: select burger #2 (Bacon Cheese)
+        3: 3 burgers #2
+        burger: ambiguous, the matching burgers are listed
+        cali: select burger #5 (Don Cali Burger)
+        2: 2 burgers #5
+        pizza: nothing matches
+        9: display the order
+        11: quit
+        """
+        burger2 = {'name': order.menu[2].name, 'price': str(round(order.menu[2].price,2)), 'quantity': str(3)}
+        burger5 = {'name': order.menu[5].name, 'price': str(round(order.menu[5].price,2)), 'quantity': str(2)}
+
+        with open(test_file, "w") as fd:
+            sys.stdout = fd
+            try:
+                order.fill()
+            except OrderTermination:
+                pass
+
+        with open(test_file, "r") as fd:
+            data = fd.read()
+            self.assertRegex(data, r'{name}:\s+{price}\s+x\s+{quantity}'.format(**burger2))
+            self.assertRegex(data, r'{name}:\s+{price}\s+x\s+{quantity}'.format(**burger5))
+            self.assertRegex(data, r'4\s+-\s+Western Burger')
+            self.assertRegex(data, 'please select a valid item from the menu options. Thank you.')
+
+        os.remove(test_file)
+
+    @patch('builtins.print')
+    @patch('builtins.input', create=True)
+    def test_add_batch(self, mocked_input, mocked_print):
+        order = Order()
+        mocked_input.side_effect = ["4x15, 2x3, 5", "4x51, 1", "2x2", "11"]
+        """
+        4x15, 2x3, 5: 15 burgers #4, 3 burgers #2, 1 burger #5
+        4x51, 1: too many, the whole line is rejected
+        2x2: 2 more burgers #2
+        11: quit
+        """
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+
+        self.assertEqual(order.transactions.keys(), [1,2,3])
+        self.assertEqual(order.transactions[order.menu[4]].quantity, 15)
+        self.assertEqual(order.transactions[order.menu[2]].quantity, 5)
+        self.assertEqual(order.transactions[order.menu[5]].quantity, 1)
+        with self.assertRaises(KeyError):
+            order.transactions[order.menu[1]]
+        mocked_print.assert_any_call(f'up to {Order.MAX_ITEM} please for item 4')
+
+        # a batch is undone at once
+        order.undo()
+        order.undo()
+        self.assertEqual(order.transactions.keys(), [])
+
     @patch('builtins.input', create=True)
     def test_add_burger_too_many(self, mocked_input):
         test_file = "_test_too_many.txt"
@@ -585,6 +652,159 @@ class TestOrder(unittest.TestCase):
         os.remove(test_file)
         os.remove(f'receipt_{order_id}.txt')
 
+    @patch('builtins.print')
+    @patch('builtins.input', create=True)
+    def test_undo_redo(self, mocked_input, mocked_print):
+        order = Order()
+        mocked_input.side_effect = ["2", "5", "4", "2", "6", "1", "3", "11"]
+        """
+        2: select burger #2
+        5: add 5 burgers #2
+        4: select burger #4
+        2: add 2 burgers #4
+        6: select the update
+        1: select transaction #1 (related to burger #2)
+        3: change the quantity to 3 burgers #2
+        11: quit
+        """
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+
+        self.assertEqual(order.transactions[order.menu[2]].quantity, 3)
+        self.assertTrue(order.undo())
+        self.assertEqual(order.transactions[order.menu[2]].quantity, 5)
+        self.assertTrue(order.undo())
+        self.assertEqual(order.transactions.keys(), [1])
+        self.assertTrue(order.redo())
+        self.assertTrue(order.redo())
+        self.assertEqual(order.transactions[order.menu[2]].quantity, 3)
+        self.assertFalse(order.redo())
+
+        self.assertTrue(order.undo())
+        self.assertTrue(order.undo())
+        self.assertTrue(order.undo())
+        self.assertEqual(order.transactions.keys(), [])
+        self.assertFalse(order.undo())
+
+        # a new edit discards the redo history
+        order._apply(order.transactions.add(Transaction(order.menu[1], 1)))
+        self.assertFalse(order.redo())
+
+
+    @patch('builtins.print')
+    @patch('builtins.input', create=True)
+    def test_undo_redo_commands(self, mocked_input, mocked_print):
+        order = Order()
+        mocked_input.side_effect = ["2", "5", "4", "2", "12", "12", "12", "13", "11"]
+        """
+        2: select burger #2
+        5: add 5 burgers #2
+        4: select burger #4
+        2: add 2 burgers #4
+        12: undo, burger #4 removed
+        12: undo, burger #2 removed
+        12: nothing to undo
+        13: redo, burger #2 back
+        11: quit
+        """
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+
+        self.assertEqual(order.transactions.keys(), [1])
+        self.assertEqual(order.transactions[order.menu[2]].quantity, 5)
+        mocked_print.assert_any_call('nothing to undo.')
+
+
+    @patch('builtins.print')
+    def test_metrics(self, mocked_print):
+        metrics = Metrics()
+        answers = ["2", "5", "4x2, 1", "6", "1", "3", "9", "11"]
+        """
+        2: select burger #2
+        5: add 5 burgers #2
+        4x2, 1: add 2 burgers #4 and 1 burger #1
+        6: select the update
+        1: select transaction #1
+        3: change the quantity to 3
+        9: display the order
+        11: quit
+        """
+        order = Order(metrics=metrics, io=QueueIO(answers))
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+
+        snapshot = order.metrics.snapshot()
+        self.assertEqual(snapshot['counters']['orders'], 1)
+        self.assertEqual(snapshot['counters']['lines'], 3)
+        self.assertEqual(snapshot['counters']['cancellations'], 1)
+        self.assertEqual(snapshot['counters']['committed'], 0)
+        self.assertEqual(snapshot['latency']['add']['count'], 2)
+        self.assertEqual(snapshot['latency']['update']['count'], 1)
+        self.assertEqual(snapshot['latency']['question_wait']['count'], len(answers))
+        self.assertGreaterEqual(snapshot['latency']['display']['count'], 3)
+
+
+    @patch('builtins.print')
+    def test_output_through_io(self, mocked_print):
+        io = QueueIO(["2", "0", "2", "5", "9", "11"])
+        """
+        2, 0: select burger #2, then cancelled
+        2, 5: add 5 burgers #2
+        9: display the order
+        11: quit
+        """
+        order = Order(io=io)
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+
+        # nothing goes to the console: a customer on a pipe or a socket sees it all
+        mocked_print.assert_not_called()
+        output = '\n'.join(io.output)
+        self.assertRegex(output, 'MENU')
+        self.assertRegex(output, r'11\s+-\s+quit')
+        self.assertRegex(output, '{} choice has been cancelled'.format(order.menu[2].name))
+        self.assertRegex(output, r'\*\*\* ORDER {} \*\*\*'.format(order.id))
+        self.assertRegex(output, 'Thank you for your visit. See you soon!!')
+
+
+    @patch('builtins.print')
+    def test_suspended_session(self, mocked_print):
+        # two sessions in one thread: each is suspended until its answers arrive
+        first, second = QueueIO(), QueueIO()
+        orders = [Order(io=first), Order(io=second)]
+        self.assertTrue(orders[0].fill())
+        self.assertTrue(orders[1].fill())
+        first.push("2")
+        second.push("4", "1")
+        self.assertTrue(orders[0].fill())
+        self.assertTrue(orders[1].fill())
+        first.push("5", "6", "1")
+        self.assertTrue(orders[0].fill())
+        # the pending question is asked again, its prompt displayed once
+        self.assertTrue(orders[0].fill())
+        first.push("3")
+        self.assertTrue(orders[0].fill())
+        self.assertEqual(first.output.count('Select the new quantity for {}: '.format(orders[0].menu[2].name)), 1)
+        self.assertEqual([(t.item.name, t.quantity) for t in orders[0].transactions], [(orders[0].menu[2].name, 3)])
+        self.assertEqual([(t.item.name, t.quantity) for t in orders[1].transactions], [(orders[1].menu[4].name, 1)])
+
+        second.push("11")
+        with self.assertRaises(OrderTermination):
+            orders[1].fill()
+        # a terminated session starts over
+        orders[1].reset()
+        self.assertTrue(orders[1].fill())
+        self.assertEqual(len(orders[1].transactions), 0)
+
+
 if __name__ == "__main__":
     unittest.main(argv=['ignore'], verbosity=2, exit=False)
 
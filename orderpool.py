@@ -0,0 +1,72 @@
+"""
+Pool of Order objects recycled between the customers. Building an Order loads
+and keys the menu; a recycled one only clears the state of the previous customer
+(transactions, undo/redo, totals, ID), the keyed menu and the commands being
+shared by all the orders of the pool.
+
+    pool = OrderPool(repository=repository)
+    with pool.session(io) as order:
+        order.fill()
+
+With a menu hot-reloaded by a MenuWatcher, the pool is given the provider of the
+current menu: each customer then starts with the latest one.
+
+    pool = OrderPool(menu=watcher.current)
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["OrderPool"]
+
+from order import Order, OrderTermination
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from contextlib import contextmanager
+import threading
+
+
+class OrderPool():
+    """Idle orders ready for the next customers.
+    . max_idle: orders kept for reuse, the others are dropped on release
+    . menu: keyed menu of the orders, loaded once from burger.json.txt by default,
+      or a callable returning the current keyed menu e.g. MenuWatcher.current
+    . the other keyword arguments are passed to Order (metrics, tax_table, repository, receipts)
+    """
+    def __init__(self, max_idle=8, *, menu=None, **kwargs):
+        self._max_idle = max_idle
+        self._kwargs = kwargs
+        self._menu = menu if menu is not None else MenuDecoratorForOrder(Menu(auto_load=True, tax_table=kwargs.get('tax_table')))
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of idle orders"""
+        return len(self._idle)
+
+    def acquire(self, io=None):
+        """An order for a new customer, recycled if possible"""
+        menu = self._menu() if callable(self._menu) else self._menu
+        with self._lock:
+            order = self._idle.pop() if self._idle else None
+        if order is None:
+            return Order(io=io, menu=menu, **self._kwargs)
+        return order.reset(io=io, menu=menu)
+
+    def release(self, order):
+        """Give back an order once its customer is gone"""
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(order)
+
+    @contextmanager
+    def session(self, io=None):
+        """with pool.session(io) as order: ... The end of the session (OrderTermination)
+        is not propagated, the order goes back to the pool in any case.
+        For a blocking backend: with a non-blocking one, the session outlives the call
+        to fill, the order is acquired then released on OrderTermination."""
+        order = self.acquire(io)
+        try:
+            yield order
+        except OrderTermination:
+            pass
+        finally:
+            self.release(order)
@@ -0,0 +1,85 @@
+"""Test the package orderpool"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from orderpool import *
+from order import Order
+from metrics import Metrics
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from questionio import QueueIO
+from unittest.mock import patch
+import unittest
+
+
+class TestOrderPool(unittest.TestCase):
+    @patch('builtins.print')
+    def test_recycle(self, mocked_print):
+        metrics = Metrics()
+        pool = OrderPool(2, metrics=metrics)
+        with pool.session(QueueIO(["2", "5", "11"])) as order:
+            order.fill()
+        self.assertEqual(len(pool), 1)
+        first = order
+
+        with pool.session(QueueIO(["3", "1", "9", "11"])) as order:
+            self.assertIs(order, first)
+            # nothing left from the previous customer
+            self.assertEqual(len(order.transactions.keys()), 0)
+            self.assertEqual(order.pre_tax, 0.0)
+            order.fill()
+        self.assertEqual([t.item.name for t in order.transactions], ["Mushroom Swiss"])
+        # the undo history is the one of the current customer
+        self.assertEqual(len(order._undo), 1)
+        self.assertEqual(metrics['orders'], 2)
+        self.assertEqual(metrics['cancellations'], 2)
+
+    def test_shared_structures(self):
+        pool = OrderPool(1)
+        orders = [pool.acquire(), pool.acquire()]
+        self.assertIsNot(orders[0], orders[1])
+        self.assertIs(orders[0].menu, orders[1].menu)
+        self.assertIs(orders[0]._commands, orders[1]._commands)
+        self.assertIs(orders[0]._commands, Order()._commands)
+        for order in orders:
+            pool.release(order)
+        self.assertEqual(len(pool), 1)
+
+    @patch('builtins.print')
+    def test_reset(self, mocked_print):
+        order = Order()
+        order.add_batch([(1, 2)])
+        order.tax_rate = 0.09
+        order.compute()
+        self.assertGreater(order.post_tax, 0)
+        io = QueueIO()
+        self.assertIs(order.reset(io=io), order)
+        self.assertEqual(order.post_tax, 0.0)
+        self.assertEqual(order.tax_rate, 0.0)
+        self.assertEqual(list(order.transactions), [])
+        self.assertIs(order._io._io, io)
+
+    @patch('builtins.print')
+    def test_menu_provider(self, mocked_print):
+        menus = [MenuDecoratorForOrder(Menu(auto_load=True))]
+        pool = OrderPool(1, menu=lambda: menus[-1])
+        with pool.session(QueueIO(["2", "5", "11"])) as order:
+            order.fill()
+        self.assertIs(order.menu, menus[0])
+        first = order
+
+        # a new menu is swapped in, e.g. by a MenuWatcher
+        menu = Menu()
+        menu.load_records([{'name': 'Bacon Cheese', 'price': 6.25}, {'name': 'Mushroom Swiss', 'price': 6.75}])
+        menus.append(MenuDecoratorForOrder(menu))
+        with pool.session(QueueIO(["2", "1", "8"])) as order:
+            self.assertIs(order, first)
+            self.assertIs(order.menu, menus[1])
+            order.fill()
+        # 8: quit, the commands follow the 2 items of the new menu
+        self.assertEqual([(t.item.name, t.item.price) for t in order.transactions], [("Mushroom Swiss", 6.75)])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
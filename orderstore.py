@@ -0,0 +1,245 @@
+"""
+Persistence of the finalized orders into a local SQLite database: the header of
+the order (ID, customer, totals) and its lines (item, unit price, quantity).
+
+The checkout never waits for the database: Order.commit hands a snapshot of the
+order to the repository, which queues it. A background writer thread drains the
+queue and writes all the orders queued so far in a single SQL transaction, with
+multi-row inserts (group commit), the database being in WAL mode. The orders are
+written at most flush_interval seconds after their checkout, or as soon as
+batch_size orders are queued. The sequence number of an order is assigned by
+SQLite when it is written, so that several registers can share the database.
+A write failing on a busy database is retried with the next batch, after a growing
+delay; an order failing for good (e.g. a constraint) is set aside into rejected.
+Either error is raised by the next save(), flush() or close().
+
+    repository = OrderRepository('orders.db')
+    order = Order(repository=repository)
+    ...
+    repository.close() # writes the last orders
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["OrderRepository"]
+
+from concurrent.futures import Future
+from datetime import datetime
+from time import monotonic
+import threading
+import sqlite3
+import queue
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    committed_at TEXT NOT NULL,
+    customer TEXT,
+    pre_tax REAL NOT NULL,
+    tax_rate REAL NOT NULL,
+    taxes REAL NOT NULL,
+    grand_total REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_order_id ON orders(order_id);
+CREATE TABLE IF NOT EXISTS lines (
+    seq INTEGER NOT NULL REFERENCES orders(seq),
+    line_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (seq, line_id)
+) WITHOUT ROWID;
+"""
+
+_HEADER_COLUMNS = "order_id, committed_at, customer, pre_tax, tax_rate, taxes, grand_total"
+_ORDER_COLUMNS = "seq, " + _HEADER_COLUMNS
+_INSERT_ORDER = f"INSERT INTO orders ({_HEADER_COLUMNS}) VALUES ({', '.join('?' * len(_HEADER_COLUMNS.split(', ')))})"
+_LINE_COLUMNS = "seq, line_id, name, price, quantity"
+_ROWS_PER_INSERT = 64 # well below the limit of SQLite on the number of parameters
+_MAX_RETRY_DELAY = 1.0 # seconds between the retries of a failed write, at most
+_STOP = object()
+
+
+def _transient(error):
+    """True if the write may succeed later e.g. the database is locked by another register"""
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in str(error) or 'busy' in str(error))
+
+
+class OrderRepository():
+    """Finalized orders stored in SQLite by a background writer.
+    . database: path of the database file
+    . batch_size: maximum number of orders written per SQL transaction
+    . flush_interval: maximum delay in seconds before a queued order is written
+    . max_pending: orders queued beyond this block the checkout (backpressure)
+    . synchronous: SQLite synchronous mode of the writer, NORMAL or FULL
+    """
+    def __init__(self, database, batch_size=256, flush_interval=0.05, max_pending=10_000, synchronous='NORMAL'):
+        self._database = database
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._inserts = {} # (table, number of rows) -> SQL
+        # (header, lines, error) of the orders which cannot be written, set aside
+        self.rejected = []
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(_SCHEMA)
+        connection.close()
+
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._synchronous = synchronous
+        self._writer = threading.Thread(target=self._run, name='order-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self._database, check_same_thread=False, cached_statements=256)
+
+    def save(self, order, customer=None):
+        """Queue a finalized order, returns the Future of its sequence number in the
+        repository, set once the order is written. The order is copied: it can be reused right away."""
+        self._raise()
+        committed_at = datetime.now().isoformat(timespec='seconds')
+        header = (order.id, committed_at, customer.__name__ if isinstance(customer, type) else customer,
+                  order.pre_tax, order.tax_rate, order.taxes, order.post_tax)
+        lines = [(t.id, t.item.name, t.item.price, t.quantity) for t in order.transactions]
+        seq = Future()
+        self._queue.put((header, lines, seq))
+        return seq
+
+    def _insert(self, table, columns, n):
+        key = (table, n)
+        if key not in self._inserts:
+            row = '(' + ', '.join('?' * len(columns.split(', '))) + ')'
+            self._inserts[key] = f"INSERT INTO {table} ({columns}) VALUES " + ', '.join([row] * n)
+        return self._inserts[key]
+
+    def _write_rows(self, connection, table, columns, rows):
+        for i in range(0, len(rows), _ROWS_PER_INSERT):
+            chunk = rows[i:i+_ROWS_PER_INSERT]
+            connection.execute(self._insert(table, columns, len(chunk)), [value for row in chunk for value in row])
+
+    def _write(self, connection, batch):
+        """Write the (header, lines, future) orders in a single transaction,
+        then set their sequence numbers"""
+        seqs = []
+        rows = []
+        with connection:
+            for header, lines, _ in batch:
+                # assigned by SQLite within the transaction: unique across the registers
+                seq = connection.execute(_INSERT_ORDER, header).lastrowid
+                seqs.append(seq)
+                rows += [(seq,) + line for line in lines]
+            self._write_rows(connection, 'lines', _LINE_COLUMNS, rows)
+        for (_, _, future), seq in zip(batch, seqs):
+            future.set_result(seq)
+
+    def _write_batch(self, connection, batch):
+        """Write the orders, returns the ones to retry later.
+        An order failing for good is set aside, without holding back the others."""
+        try:
+            self._write(connection, batch)
+            return []
+        except Exception as e:
+            error = self._error = e
+        if _transient(error):
+            return batch
+        if len(batch) == 1:
+            header, lines, future = batch[0]
+            self.rejected.append((header, lines, error))
+            future.set_exception(error)
+            return []
+        # one order at a time, to find the ones at fault
+        failed = []
+        for entry in batch:
+            failed += self._write_batch(connection, [entry])
+        return failed
+
+    def _run(self):
+        connection = self._connect()
+        connection.execute(f"PRAGMA synchronous = {self._synchronous}")
+        failed = [] # orders of a write which failed, retried with the next batch
+        retry_delay = self._flush_interval
+        stopping = False
+        while not stopping:
+            batch, received = failed, 0
+            # waits for the first order, or until the retry of the failed ones
+            timeout = retry_delay if failed else None
+            deadline = None
+            while not stopping and (received == 0 or len(batch) < self._batch_size):
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                received += 1
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    batch.append(entry)
+                # group commit: gather what comes within the flush interval
+                if deadline is None:
+                    deadline = monotonic() + self._flush_interval
+                timeout = max(0, deadline - monotonic())
+            if batch:
+                failed = self._write_batch(connection, batch)
+                # the orders are kept until written: save() already handed them out
+                retry_delay = min(2 * retry_delay, _MAX_RETRY_DELAY) if failed else self._flush_interval
+            for _ in range(received):
+                self._queue.task_done()
+        connection.close()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self):
+        """Wait until all the queued orders are written.
+        Raises the error of the last write if it failed, the orders being retried."""
+        self._queue.join()
+        self._raise()
+
+    def close(self):
+        """Write the queued orders, then stop the writer.
+        Raises the error of the last write if it failed, the orders being lost."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self._raise()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _read(self, sql, parameters=()):
+        # WAL: reading never blocks the writer
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            return self._reader.execute(sql, parameters).fetchall()
+
+    def __len__(self):
+        """Number of orders written so far"""
+        return self._read("SELECT count(*) FROM orders")[0][0]
+
+    def get(self, seq):
+        """Stored order: {'seq', 'order_id', ..., 'grand_total', 'lines': [{'line_id', 'name', 'price', 'quantity'}]}"""
+        rows = self._read(f"SELECT {_ORDER_COLUMNS} FROM orders WHERE seq = ?", (seq,))
+        if not rows:
+            raise KeyError(seq)
+        order = dict(zip(_ORDER_COLUMNS.split(', '), rows[0]))
+        order['lines'] = [dict(zip(_LINE_COLUMNS.split(', ')[1:], row))
+                          for row in self._read(f"SELECT {_LINE_COLUMNS[len('seq, '):]} FROM lines WHERE seq = ? ORDER BY line_id", (seq,))]
+        return order
+
+    def find(self, order_id):
+        """Sequence numbers of the stored orders with that order ID (random, may be reused)"""
+        return [seq for seq, in self._read("SELECT seq FROM orders WHERE order_id = ? ORDER BY seq", (order_id,))]
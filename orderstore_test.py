@@ -0,0 +1,132 @@
+"""Test the package orderstore"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from orderstore import *
+from order import Order, OrderTermination
+from person import Staff
+from questionio import QueueIO
+from unittest.mock import patch
+import unittest
+import tempfile
+import sqlite3
+import os
+
+
+class TestOrderRepository(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self._folder.name, 'orders.db')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def order(self, batch):
+        order = Order()
+        order.add_batch(batch)
+        order.tax_rate = 0.09
+        order.compute()
+        return order
+
+    def test_save_get(self):
+        with OrderRepository(self.database) as repository:
+            order = self.order([(2, 5), (4, 1)])
+            future = repository.save(order, Staff)
+            repository.flush()
+            seq = future.result()
+            stored = repository.get(seq)
+            self.assertEqual(stored['order_id'], order.id)
+            self.assertEqual(stored['customer'], 'Staff')
+            self.assertEqual(stored['grand_total'], order.post_tax)
+            self.assertEqual(stored['lines'], [{'line_id': 1, 'name': 'Bacon Cheese', 'price': 5.75, 'quantity': 5},
+                                               {'line_id': 2, 'name': 'Western Burger', 'price': 5.95, 'quantity': 1}])
+            self.assertEqual(repository.find(order.id), [seq])
+            with self.assertRaises(KeyError):
+                repository.get(seq + 1)
+
+    def test_group_commit(self):
+        with OrderRepository(self.database, batch_size=50, flush_interval=1.0) as repository:
+            futures = [repository.save(self.order([(i % 5 + 1, i % 7 + 1)])) for i in range(500)]
+            repository.flush()
+            self.assertEqual(len(repository), 500)
+            self.assertEqual([future.result() for future in futures], list(range(1, 501)))
+
+        # reopened: the sequence goes on
+        with OrderRepository(self.database) as repository:
+            self.assertEqual(repository.save(self.order([(1, 1)])).result(timeout=5), 501)
+        with OrderRepository(self.database) as repository:
+            self.assertEqual(len(repository), 501)
+
+    def test_failed_write(self):
+        with OrderRepository(self.database, flush_interval=0.01) as repository:
+            write = repository._write
+            failures = [sqlite3.OperationalError('database is locked')]
+            def flaky(connection, batch):
+                if failures:
+                    raise failures.pop()
+                write(connection, batch)
+            repository._write = flaky
+
+            first = repository.save(self.order([(2, 5)]))
+            with self.assertRaises(sqlite3.OperationalError):
+                repository.flush()
+            # the order of the failed write is kept and written with the next ones
+            second = repository.save(self.order([(4, 1)]))
+            repository.flush()
+            self.assertEqual(len(repository), 2)
+            self.assertEqual(repository.get(first.result())['lines'][0]['quantity'], 5)
+            self.assertEqual(repository.get(second.result())['lines'][0]['quantity'], 1)
+
+    def test_rejected_order(self):
+        with OrderRepository(self.database) as repository:
+            bad = self.order([(2, 5)])
+            write = repository._write
+            def faulty(connection, batch):
+                if any(header[0] == bad.id for header, _, _ in batch):
+                    raise sqlite3.IntegrityError('CHECK constraint failed')
+                write(connection, batch)
+            repository._write = faulty
+
+            good = self.order([(4, 1)])
+            while good.id == bad.id:
+                good = self.order([(4, 1)])
+            futures = [repository.save(bad), repository.save(good)]
+            with self.assertRaises(sqlite3.IntegrityError):
+                repository.flush()
+            # set aside, not retried: the next orders are written
+            self.assertEqual([header[0] for header, _, _ in repository.rejected], [bad.id])
+            with self.assertRaises(sqlite3.IntegrityError):
+                futures[0].result()
+            after = repository.save(good)
+            repository.flush()
+            self.assertEqual(len(repository), 2)
+            self.assertEqual(after.result(), futures[1].result() + 1)
+
+    def test_shared_database(self):
+        # one repository per register process, on the same database
+        with OrderRepository(self.database) as first, OrderRepository(self.database) as second:
+            futures = [first.save(self.order([(1, 1)])), second.save(self.order([(2, 2)])), first.save(self.order([(3, 3)]))]
+            first.flush()
+            second.flush()
+            self.assertEqual(sorted(future.result() for future in futures), [1, 2, 3])
+            self.assertEqual(len(first), 3)
+
+    @patch('builtins.print')
+    def test_commit(self, mocked_print):
+        with OrderRepository(self.database) as repository:
+            order = Order(io=QueueIO(["2", "5", "10", "2"]), repository=repository)
+            try:
+                order.fill()
+            except OrderTermination:
+                pass
+            os.remove(f'receipt_{order.id}.txt')
+            repository.flush()
+            stored = repository.get(repository.find(order.id)[-1])
+            self.assertEqual(stored['customer'], 'Staff')
+            self.assertEqual(stored['pre_tax'], 28.75)
+            self.assertEqual(len(stored['lines']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,237 @@
+"""
+Persistent (immutable) version of the Transactions collection.
+Every edit returns a new version of the collection while the previous
+version remains untouched and usable. The versions share all the nodes
+that have not been modified by the edit (structural sharing via path copying),
+hence an edit costs O(log n) in time and memory instead of a deep copy.
+
+Keeping all the versions of an order is then as cheap as keeping references
+to them, which is how the undo/redo of the Order is implemented.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["PersistentTransactions"]
+
+from transaction import Transaction
+from menuitem import MenuItem
+
+
+class _Node():
+    """Immutable node of a persistent AVL tree, augmented with the size of the subtree."""
+    __slots__ = ('key', 'value', 'left', 'right', 'height', 'size')
+
+    def __init__(self, key, value, left=None, right=None):
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        self.height = 1 + max(_height(left), _height(right))
+        self.size = 1 + _size(left) + _size(right)
+
+
+def _height(node):
+    return node.height if node else 0
+
+def _size(node):
+    return node.size if node else 0
+
+def _rotate_right(node):
+    pivot = node.left
+    return _Node(pivot.key, pivot.value, pivot.left, _Node(node.key, node.value, pivot.right, node.right))
+
+def _rotate_left(node):
+    pivot = node.right
+    return _Node(pivot.key, pivot.value, _Node(node.key, node.value, node.left, pivot.left), pivot.right)
+
+def _balance(key, value, left, right):
+    """Builds a new node, rebalancing it if one side is too deep"""
+    node = _Node(key, value, left, right)
+    skew = _height(left) - _height(right)
+    if skew > 1:
+        if _height(left.left) < _height(left.right):
+            node = _Node(key, value, _rotate_left(left), right)
+        return _rotate_right(node)
+    if skew < -1:
+        if _height(right.right) < _height(right.left):
+            node = _Node(key, value, left, _rotate_right(right))
+        return _rotate_left(node)
+    return node
+
+def _insert(node, key, value):
+    """Returns a new tree with key set to value. Only the path to key is copied."""
+    if node is None:
+        return _Node(key, value)
+    if key < node.key:
+        return _balance(node.key, node.value, _insert(node.left, key, value), node.right)
+    if key > node.key:
+        return _balance(node.key, node.value, node.left, _insert(node.right, key, value))
+    return _Node(key, value, node.left, node.right)
+
+def _pop_min(node):
+    """Returns (min node, new tree without the min node)"""
+    if node.left is None:
+        return node, node.right
+    smallest, left = _pop_min(node.left)
+    return smallest, _balance(node.key, node.value, left, node.right)
+
+def _remove(node, key):
+    """Returns a new tree without key. Only the path to key is copied."""
+    if node is None:
+        raise KeyError(key)
+    if key < node.key:
+        return _balance(node.key, node.value, _remove(node.left, key), node.right)
+    if key > node.key:
+        return _balance(node.key, node.value, node.left, _remove(node.right, key))
+    if node.right is None:
+        return node.left
+    if node.left is None:
+        return node.right
+    smallest, right = _pop_min(node.right)
+    return _balance(smallest.key, smallest.value, node.left, right)
+
+def _get(node, key):
+    while node:
+        if key < node.key:
+            node = node.left
+        elif key > node.key:
+            node = node.right
+        else:
+            return node.value
+    raise KeyError(key)
+
+def _select(node, rank):
+    """Returns the node of the given 0-based rank in the key order"""
+    while node:
+        left = _size(node.left)
+        if rank < left:
+            node = node.left
+        elif rank > left:
+            rank -= left + 1
+            node = node.right
+        else:
+            return node
+    raise KeyError(rank)
+
+def _rank(node, key):
+    """Returns the number of keys strictly lower than key"""
+    rank = 0
+    while node:
+        if key < node.key:
+            node = node.left
+        elif key > node.key:
+            rank += _size(node.left) + 1
+            node = node.right
+        else:
+            return rank + _size(node.left)
+    return rank
+
+def _walk(node):
+    """In-order traversal without recursion"""
+    stack = []
+    while stack or node:
+        if node:
+            stack.append(node)
+            node = node.left
+            continue
+        node = stack.pop()
+        yield node
+        node = node.right
+
+
+class PersistentTransactions():
+    """Immutable counterpart of Transactions: add/update/delete return a new version.
+    The lines are kept in insertion order, keyed by a sequence number, and a second
+    tree indexes the sequence number of each menu item (by reference).
+    As for Transactions after reset_IDs, the ID of a transaction is its position
+    in the order, starting at 1.
+    """
+    def __init__(self, *, _lines=None, _index=None, _seq=0):
+        self._lines = _lines    # seq -> (item, quantity)
+        self._index = _index    # id(item) -> seq
+        self._seq = _seq
+
+    def _version(self, lines, index, seq):
+        return PersistentTransactions(_lines=lines, _index=index, _seq=seq)
+
+    def __len__(self):
+        return _size(self._lines)
+
+    def __iter__(self):
+        for i, node in enumerate(_walk(self._lines), 1):
+            item, quantity = node.value
+            yield Transaction(item, quantity, id=i)
+
+    def add(self, transaction):
+        """Returns a new version with the transaction added.
+        If a transaction for the same item was previously done, the quantity is updated
+        """
+        try:
+            seq = _get(self._index, id(transaction.item))
+        except KeyError:
+            lines = _insert(self._lines, self._seq, (transaction.item, transaction.quantity))
+            index = _insert(self._index, id(transaction.item), self._seq)
+            return self._version(lines, index, self._seq + 1)
+        item, quantity = _get(self._lines, seq)
+        lines = _insert(self._lines, seq, (item, quantity + transaction.quantity))
+        return self._version(lines, self._index, self._seq)
+
+    def delete(self, transaction):
+        """Returns a new version without the item of the transaction.
+        The same version is returned if the item is not part of the transactions."""
+        try:
+            seq = _get(self._index, id(transaction.item))
+        except KeyError:
+            return self
+        lines = _remove(self._lines, seq)
+        index = _remove(self._index, id(transaction.item))
+        return self._version(lines, index, self._seq)
+
+    def update(self, transaction):
+        """Returns a new version where the item has the new positive quantity.
+        If the quantity is null, the item is removed.
+        The same version is returned if the item is not part of the transactions."""
+        assert transaction.quantity >= 0, "negative values shall be prohibited by construction"
+        if transaction.quantity == 0:
+            return self.delete(transaction)
+        try:
+            seq = _get(self._index, id(transaction.item))
+        except KeyError:
+            return self
+        lines = _insert(self._lines, seq, (transaction.item, transaction.quantity))
+        return self._version(lines, self._index, self._seq)
+
+    def __getitem__(self, item):
+        """The versions are indexed based on 2 possible keys:
+        . the ID of the transaction
+        . the menu item of the transaction
+        """
+        if isinstance(item, MenuItem):
+            try:
+                seq = _get(self._index, id(item))
+            except KeyError:
+                raise KeyError(f'the item {item.name} has never been selected')
+            _, quantity = _get(self._lines, seq)
+            return Transaction(item, quantity, id=_rank(self._lines, seq)+1)
+
+        if isinstance(item, int):
+            if not 1 <= item <= len(self):
+                raise KeyError(f'there is no #{item} item in the list of transactions')
+            menu_item, quantity = _select(self._lines, item-1).value
+            return Transaction(menu_item, quantity, id=item)
+
+        assert False, "unreachable"
+
+    def __str__(self):
+        if len(self) > 0:
+            column_name_size = max([len(transaction.item.name) for transaction in self])+4
+        else:
+            column_name_size = 20
+
+        buf = ""
+        for transaction in self:
+            buf += f'{str(transaction.id):>3s} {transaction.item.name:>{column_name_size}s}: {transaction.item.price:.2f} x {transaction.quantity}\n'
+        return buf
+
+    def keys(self):
+        """List of IDs for the transactions"""
+        return list(range(1, len(self)+1))
@@ -0,0 +1,76 @@
+"""Test the class PersistentTransactions"""
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+from persistent import *
+from persistent import _walk, _height
+from transaction import Transaction
+from menu4order import MenuDecoratorForOrder
+from menuitem import Burger
+from menu import Menu
+import unittest
+
+class TestPersistentTransactions(unittest.TestCase):
+    menu = MenuDecoratorForOrder(Menu(auto_load=True))
+
+    def test_add_keeps_previous_version(self):
+        v0 = PersistentTransactions()
+        v1 = v0.add(Transaction(self.menu[1],3))
+        v2 = v1.add(Transaction(self.menu[2],5))
+        v3 = v2.add(Transaction(self.menu[1],2))
+
+        self.assertEqual(len(v0),0)
+        self.assertEqual(len(v1),1)
+        self.assertEqual(len(v3),2)
+        self.assertEqual(v1[self.menu[1]].quantity,3)
+        self.assertEqual(v3[self.menu[1]].quantity,5)
+        self.assertEqual(v3.keys(),[1,2])
+        # the untouched line is shared between the versions
+        self.assertIs(v2._lines.right, v3._lines.right)
+
+    def test_update_delete(self):
+        v1 = PersistentTransactions().add(Transaction(self.menu[1],3)).add(Transaction(self.menu[2],5))
+        v2 = v1.update(Transaction(self.menu[2],7))
+        v3 = v2.update(Transaction(self.menu[1],0))
+        self.assertEqual(v1[2].quantity,5)
+        self.assertEqual(v2[2].quantity,7)
+        self.assertEqual(len(v3),1)
+        self.assertIs(v3[1].item,self.menu[2])
+        self.assertEqual(v3[self.menu[2]].id,1)
+        with self.assertRaises(KeyError):
+            v3[self.menu[1]]
+        with self.assertRaises(KeyError):
+            v3[2]
+
+        self.assertIs(v3.delete(Transaction(self.menu[3],0)), v3)
+        self.assertIs(v3.update(Transaction(self.menu[3],4)), v3)
+
+    def test_ids_follow_the_order(self):
+        v = PersistentTransactions()
+        for i in range(1,6):
+            v = v.add(Transaction(self.menu[i],i))
+        v = v.delete(Transaction(self.menu[2],0))
+        v = v.add(Transaction(self.menu[2],9))
+        self.assertEqual([t.id for t in v],[1,2,3,4,5])
+        self.assertEqual([t.item for t in v],[self.menu[i] for i in [1,3,4,5,2]])
+        self.assertEqual(v[self.menu[2]].id,5)
+
+    def test_balanced(self):
+        items = [Burger(f'burger {i}', 1.0) for i in range(1000)]
+        v = PersistentTransactions()
+        for item in items:
+            v = v.add(Transaction(item,1))
+        for item in items[::2]:
+            v = v.delete(Transaction(item,0))
+        self.assertEqual(len(v),500)
+        self.assertLessEqual(_height(v._lines),1.45*10)
+        keys = [node.key for node in _walk(v._lines)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertIs(v[250].item, items[499])
+
+    def test_str(self):
+        v = PersistentTransactions().add(Transaction(self.menu[1],3))
+        self.assertRegex(str(v), r'\s*\d+\s*[\s|\w]+:\s*\d*.\d{2}\s++x\s+\d+')
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
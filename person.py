@@ -16,7 +16,7 @@ class Person(ABC):
 
     def compute(self, order):
         order.tax_rate = self._tax_rate
-        order.compute()
+        order.compute(type(self))
 
 class Student(Person):
     """Student with 0% tax rate"""
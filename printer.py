@@ -9,28 +9,36 @@ decreasing the risks to create bugs.
 """
 
 __author__ = "Bertrand Blanc (Alan Turing)"
-__all__ = ["Receipt", "PrettyPrint", "PrintOnGoingOrder"]
+__all__ = ["Receipt", "PrettyPrint", "VectoredReceipt", "PrintOnGoingOrder"]
 """Not all Objects are exposed to the public, only a tiny set used as generics"""
 
 import pandas as pd
 from datetime import datetime
 import pytz
+import threading
+import os
 
 class Printer():
     """ Basic printer defining basic printing capabilities.
     Let's note that this object is good enough to have a working system.
+    write: where the text is displayed e.g. the I/O backend of the order, the console by default
     """
-    def __init__(self, order):
+    def __init__(self, order, write=print):
         self.order = order
+        self.write = write
 
     def issue(self):
         """rough display leveraging the serialization of the calling object"""
-        print(self.order)
+        self.write(str(self.order))
 
-    def store(self):
-        """basic storing on file"""
+    def filename(self, folder=None):
+        """file of the receipt in folder, the current directory by default"""
         filename = 'receipt_' + str(self.order.id) + '.txt'
-        with open(filename, 'w') as fd:
+        return filename if folder is None else os.path.join(folder, filename)
+
+    def store(self, folder=None):
+        """basic storing on file, in folder if given"""
+        with open(self.filename(folder), 'w') as fd:
             fd.write(str(self.order) + '\n')
     
 
@@ -46,8 +54,8 @@ class Receipt(Printer):
     
 class PrettyPrint(Receipt):
     """Printer for a receipt"""
-    def __init__(self,order):
-        super().__init__(order)
+    def __init__(self,order,write=print):
+        super().__init__(order,write)
 
     def issue(self):
         transactions = str(self.order.transactions)
@@ -68,6 +76,113 @@ class PrettyPrint(Receipt):
         return buf
 
 
+class VectoredReceipt(Receipt):
+    """Receipt stored without building the intermediate strings of PrettyPrint.
+    The content of the file is the same as the basic store of a PrettyPrint receipt,
+    but the variable parts are formatted as bytes into a reusable buffer, the constant
+    parts (separators, labels) are encoded once, and the whole receipt is flushed
+    with a single vectored write.
+    The buffer is shared by all the receipts stored by a thread.
+    """
+    _local = threading.local() # .buffer
+    _separators = {} # length -> b'====...\n'
+    _titles = {} # length -> b'  RECEIPT  \n'
+    _names = {} # menu item name -> encoded name
+    _PRE_TAX = b' pre tax amount: $'
+    _GRAND_TOTAL = b'    grand total: $'
+    _IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names else 1024
+
+    @classmethod
+    def _separator(cls, length):
+        if length not in cls._separators:
+            cls._separators[length] = b'=' * length + b'\n'
+        return cls._separators[length]
+
+    @classmethod
+    def _title(cls, length):
+        if length not in cls._titles:
+            cls._titles[length] = "{0:^{1}}\n".format("RECEIPT", length).encode()
+        return cls._titles[length]
+
+    @classmethod
+    def _name(cls, name):
+        encoded = cls._names.get(name)
+        if encoded is None:
+            encoded = cls._names[name] = name.encode()
+        return encoded
+
+    def render(self, buf):
+        """Format the receipt into buf, returns the list of segments (bytes or
+        (start, end) slices of buf) in the order they are to be written"""
+        order = self.order
+        transactions = list(order.transactions)
+        column_name_size = max([len(t.item.name) for t in transactions])+4 if transactions else 20
+
+        del buf[:]
+        start = 0
+        max_length = 0
+        for t in transactions:
+            name = t.item.name
+            encoded = VectoredReceipt._name(name)
+            buf += b'%3d %s%s: %.2f x %d\n' % (t.id, b' '*(column_name_size-len(name)), encoded, t.item.price, t.quantity)
+            # length in characters, the name may hold multi-byte characters
+            max_length = max(max_length, len(buf) - start - 1 - (len(encoded) - len(name)))
+            start = len(buf)
+        lines_end = len(buf)
+        length = max_length + 5
+        separator = VectoredReceipt._separator(length)
+
+        buf += datetime.now(pytz.timezone('US/Pacific')).strftime("%A %B %d,%Y %I:%M%p").encode() + b'\n'
+        buf += b'order: %d\n' % order.id
+        header_end = len(buf)
+        buf += b'%s%6.2f\n' % (VectoredReceipt._PRE_TAX, order.pre_tax)
+        buf += b'%15s: $%6.2f\n' % (("taxes " + str(round(order.tax_rate*100,2)) + "%").encode(), order.taxes)
+        buf += b'%s%6.2f\n' % (VectoredReceipt._GRAND_TOTAL, order.post_tax)
+        totals_end = len(buf)
+
+        return [
+            VectoredReceipt._title(length),
+            (lines_end, header_end),
+            separator,
+            (0, lines_end),
+            separator,
+            (header_end, totals_end),
+            separator,
+            b'\n',
+        ]
+
+    def store(self, folder=None):
+        """Store the receipt with a single vectored write, in folder if given"""
+        buf = getattr(VectoredReceipt._local, 'buffer', None)
+        if buf is None:
+            buf = VectoredReceipt._local.buffer = bytearray()
+        segments = self.render(buf)
+        fd = os.open(self.filename(folder), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            with memoryview(buf) as view:
+                buffers = [view[s[0]:s[1]] if isinstance(s, tuple) else s for s in segments]
+                self._writev(fd, buffers)
+                for b in buffers:
+                    if isinstance(b, memoryview):
+                        b.release()
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def _writev(cls, fd, buffers):
+        if not hasattr(os, 'writev'):
+            # e.g. Windows: one write of the joined segments
+            os.write(fd, b''.join(buffers))
+            return
+        for i in range(0, len(buffers), cls._IOV_MAX):
+            chunk = buffers[i:i+cls._IOV_MAX]
+            expected = sum(len(b) for b in chunk)
+            written = os.writev(fd, chunk)
+            if written < expected:
+                # partial write: the rest is written the slow way
+                os.write(fd, b''.join(chunk)[written:])
+
+
 class _PrintOnGoingOrderBasic(Printer):
     """Internal skin to print the content of an order while the end-user is still working on it.
     The formatting is basic and good enough"""
@@ -75,7 +190,7 @@ class _PrintOnGoingOrderBasic(Printer):
         buf = ""
         buf += f"*** ORDER {self.order.id} ***\n"
         buf += str(self.order.transactions)
-        print(buf)
+        self.write(buf)
 
 class _PrintOnGoingOrderPandas(Printer):
     """Using Pandas for a standardized display. The look-n-feel doesn't look that great."""
@@ -84,7 +199,7 @@ class _PrintOnGoingOrderPandas(Printer):
         df.set_index('key', inplace=True)
         for v in self.order.transactions:
             df.loc[v.id] = [v.item.name, v.item.price, v.quantity]
-        print(df)
+        self.write(str(df))
 
 
 class PrintOnGoingOrder(_PrintOnGoingOrderBasic):
@@ -0,0 +1,55 @@
+"""Test the package printer"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from printer import *
+from order import Order
+from menuitem import Burger
+from transaction import Transaction
+from datetime import datetime
+from unittest.mock import patch
+import unittest
+import os
+
+
+class TestVectoredReceipt(unittest.TestCase):
+    def stored(self, order, receipt):
+        filename = f'receipt_{order.id}.txt'
+        receipt(order).store()
+        with open(filename, 'r', encoding='utf-8') as fd:
+            data = fd.read()
+        os.remove(filename)
+        return data
+
+    @patch('printer.datetime')
+    def test_same_as_basic_store(self, mocked_datetime):
+        mocked_datetime.now.return_value = datetime(2024, 3, 8, 17, 23)
+        order = Order()
+        order.add_batch([(4, 15), (2, 3), (5, 1)])
+        order.tax_rate = 0.09
+        order.compute()
+        self.assertEqual(self.stored(order, VectoredReceipt), self.stored(order, Receipt))
+
+        # empty order, non-ASCII names, large quantities
+        order = Order()
+        self.assertEqual(self.stored(order, VectoredReceipt), self.stored(order, Receipt))
+        order.add_batch([(1, 50)])
+        order._apply(order.transactions.add(Transaction(Burger("Crème Brûlée Burger", 12.5), 1234)))
+        order.compute()
+        self.assertEqual(self.stored(order, VectoredReceipt), self.stored(order, Receipt))
+
+    @patch('printer.datetime')
+    def test_many_lines(self, mocked_datetime):
+        mocked_datetime.now.return_value = datetime(2024, 3, 8, 17, 23)
+        order = Order()
+        transactions = order.transactions
+        for i in range(3000):
+            transactions = transactions.add(Transaction(Burger(f'burger {i}', 1.0 + i/100), i % 50 + 1))
+        order._apply(transactions)
+        order.compute()
+        self.assertEqual(self.stored(order, VectoredReceipt), self.stored(order, Receipt))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
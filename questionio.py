@@ -0,0 +1,138 @@
+"""
+I/O backends for the Question objects. A question only needs to read an answer
+after displaying a prompt, and to write messages. Where these come from is
+decided by the backend:
+. BlockingIO: the console, via input() and print(), which is the default
+. StreamIO: any buffered text stream e.g. a pipe, a socket.makefile(), a StringIO
+. QueueIO: an in-memory queue of answers, fed by the caller
+. NonBlockingIO: a file descriptor in non-blocking mode e.g. a pipe or a socket
+
+The non-blocking backends raise WouldBlock when no complete answer is available yet:
+the question can be asked again later, once data arrived, without a thread per session.
+Order.fill then returns with the session suspended, and resumes it when called again
+e.g. once a selector reports the backend readable.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["BlockingIO", "StreamIO", "QueueIO", "NonBlockingIO", "WouldBlock", "get_default_io", "set_default_io"]
+
+from collections import deque
+import os
+
+
+class WouldBlock(Exception):
+    """No complete answer is available yet, ask again later"""
+    pass
+
+
+class BlockingIO():
+    """Console backend, waiting for the end-user to answer"""
+    def read(self, prompt):
+        return input(prompt)
+
+    def write(self, text):
+        print(text)
+
+
+class StreamIO():
+    """Backend over buffered text streams. The end of the input stream raises EOFError,
+    as input() does."""
+    def __init__(self, instream, outstream):
+        self._in = instream
+        self._out = outstream
+
+    def read(self, prompt):
+        self._out.write(prompt)
+        self._out.flush()
+        line = self._in.readline()
+        if not line:
+            raise EOFError()
+        return line.rstrip('\r\n')
+
+    def write(self, text):
+        self._out.write(text + '\n')
+
+
+class QueueIO():
+    """In-memory backend: answers are pushed by the caller, outputs are collected.
+    Reading from an empty queue raises WouldBlock, the prompt being displayed only once
+    until the answer comes."""
+    def __init__(self, answers=None):
+        self._answers = deque(answers or [])
+        self.output = []
+        self._prompted = False
+
+    def push(self, *answers):
+        self._answers.extend(answers)
+
+    def read(self, prompt):
+        if not self._prompted:
+            self.output.append(prompt)
+            self._prompted = True
+        if not self._answers:
+            raise WouldBlock()
+        self._prompted = False
+        return self._answers.popleft()
+
+    def write(self, text):
+        self.output.append(text)
+
+
+class NonBlockingIO():
+    """Backend over file descriptors in non-blocking mode.
+    The bytes available are buffered until a complete line is received."""
+    def __init__(self, infd, outfd, *, encoding='utf-8'):
+        self._in = infd
+        self._out = outfd
+        self._encoding = encoding
+        self._buffer = bytearray()
+        self._prompted = False
+        self._eof = False
+        os.set_blocking(infd, False)
+
+    def fileno(self):
+        """Allows the backend to be registered in a selector"""
+        return self._in
+
+    def _fill(self):
+        while not self._eof:
+            try:
+                data = os.read(self._in, 4096)
+            except BlockingIOError:
+                return
+            if not data:
+                self._eof = True
+                return
+            self._buffer += data
+
+    def read(self, prompt):
+        if not self._prompted:
+            os.write(self._out, prompt.encode(self._encoding))
+            self._prompted = True
+        self._fill()
+        end = self._buffer.find(b'\n')
+        if end < 0:
+            if not self._eof:
+                raise WouldBlock()
+            if not self._buffer:
+                raise EOFError()
+            # last line without end-of-line
+            end = len(self._buffer)
+        line = bytes(self._buffer[:end])
+        del self._buffer[:end+1]
+        self._prompted = False
+        return line.decode(self._encoding).rstrip('\r')
+
+    def write(self, text):
+        os.write(self._out, (text + '\n').encode(self._encoding))
+
+
+_default_io = BlockingIO()
+
+def get_default_io():
+    return _default_io
+
+def set_default_io(io):
+    """Backend used by the questions created without an explicit backend"""
+    global _default_io
+    _default_io = io
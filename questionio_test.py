@@ -0,0 +1,69 @@
+"""Test the I/O backends of the questions"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+import unittest
+import io
+import os
+from questions import *
+from questionio import *
+
+
+class TestQuestionIO(unittest.TestCase):
+    def test_stream(self):
+        out = io.StringIO()
+        backend = StreamIO(io.StringIO("12\n4\n"), out)
+        q = IntegerQuestion("give a number", range(2,10), io=backend)
+        self.assertEqual(q.ask(), 4)
+        self.assertEqual(out.getvalue(), "give a number: please select a valid item in range(2, 10). Thank you.\ngive a number: ")
+        with self.assertRaises(EOFError):
+            q.ask()
+
+    def test_queue(self):
+        backend = QueueIO()
+        q = EnumQuestion([(1,"student","S"), (2,"staff","T")], io=backend)
+        with self.assertRaises(WouldBlock):
+            q.ask()
+        with self.assertRaises(WouldBlock):
+            q.ask()
+        self.assertEqual(backend.output, ["Select [1-student, 2-staff]: "])
+        backend.push("3", "2")
+        self.assertEqual(q.ask(), "T")
+        self.assertEqual(len(backend.output), 3)
+
+    def test_non_blocking(self):
+        infd, writer = os.pipe()
+        reader, outfd = os.pipe()
+        backend = NonBlockingIO(infd, outfd)
+        q = IntegerQuestion("give a number", [3,16], io=backend)
+        with self.assertRaises(WouldBlock):
+            q.ask()
+        os.write(writer, b"1")
+        with self.assertRaises(WouldBlock):
+            q.ask()
+        os.write(writer, b"6\n")
+        self.assertEqual(q.ask(), 16)
+        self.assertEqual(os.read(reader, 1024), b"give a number: ")
+
+        os.write(writer, b"3")
+        os.close(writer)
+        self.assertEqual(q.ask(), 3)
+        with self.assertRaises(EOFError):
+            q.ask()
+        for fd in [infd, reader, outfd]:
+            os.close(fd)
+
+    def test_default(self):
+        backend = QueueIO(["5"])
+        previous = get_default_io()
+        set_default_io(backend)
+        try:
+            self.assertEqual(IntegerQuestion("give a number", range(2,10)).ask(), 5)
+        finally:
+            set_default_io(previous)
+        self.assertIsInstance(get_default_io(), BlockingIO)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -1,13 +1,17 @@
 """
 The questions asked to the end-users to interact with them are wrapped
 into dedicated Question objects. The nature of the question involves 
-different checking mechanism. Two styles of question are currently available.
+different checking mechanism. Four styles of question are currently available.
+The answers are read and the messages written through an I/O backend, the console
+by default, see the questionio package.
 """
 
 __author__ = "Bertrand Blanc (Alan Turing)"
-__all__ = ["IntegerQuestion", "EnumQuestion", "SkipInput"]
+__all__ = ["IntegerQuestion", "NameQuestion", "OrderLineQuestion", "EnumQuestion", "SkipInput", "parse_batch"]
 
 from abc import ABC, abstractmethod
+from questionio import get_default_io
+import re
 
 
 class IllegalChoice(Exception):
@@ -18,10 +22,12 @@ class SkipInput(Exception):
 
 class Question(ABC):
     """Generic abstract superclass to inforce an interface requirement"""
-    def __init__(self, question, default_error_message):
+    def __init__(self, question, default_error_message, io=None):
         self._question = question
         self._result = None
         self._error_message = default_error_message
+        # where the answers come from and the messages go, see questionio
+        self._io = io or get_default_io()
 
     @abstractmethod
     def ask(self):
@@ -38,12 +44,14 @@ class IntegerQuestion(Question):
     """The answer to this question is expected to be an Integer value within a 
     specific range
     """
-    def __init__(self, question, val_range, *, error_message=None):
+    def __init__(self, question, val_range, *, error_message=None, io=None):
         if not error_message:
             error_message = f"please select a valid item in {val_range}. Thank you."
 
-        super().__init__(question, error_message)
+        super().__init__(question, error_message, io)
         self._range = val_range
+        # O(1) membership: a range already is, any other collection is hashed once
+        self._choices = val_range if isinstance(val_range, range) else frozenset(val_range)
 
     def ask(self):
         """The question is asked to the end-user until s/he provides a valid answer:
@@ -54,18 +62,18 @@ class IntegerQuestion(Question):
         """
         while True:
             try:
-                choice = input(self._question + ": ")
+                choice = self._io.read(self._question + ": ")
                 if len(choice.strip()) == 0:
                     raise SkipInput()
                 choice = int(choice)
-                if choice not in self._range:
+                if choice not in self._choices:
                     raise IllegalChoice()
             except TypeError:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except IllegalChoice:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except ValueError as e:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except SkipInput as e:
                 raise e
             else:
@@ -74,17 +82,120 @@ class IntegerQuestion(Question):
             
         assert False, "unreachable location"
     
+class NameQuestion(IntegerQuestion):
+    """Same as the IntegerQuestion, but the answer can also be a fragment of a name.
+    The fragment is resolved by the lookup callable, returning the list of candidates
+    as tuples (integer key, name). A single candidate is the answer, several candidates
+    are displayed for the end-user to refine the answer.
+    """
+    def __init__(self, question, val_range, lookup, *, error_message=None, io=None):
+        super().__init__(question, val_range, error_message=error_message, io=io)
+        self._lookup = lookup
+
+    def ask(self):
+        """The question is asked to the end-user until s/he provides a valid answer:
+        either an integer within the specific range, or a name fragment matching
+        exactly one candidate.
+        An empty answer raises SkipInput, allowing the flow to continue.
+        """
+        while True:
+            choice = self._io.read(self._question + ": ")
+            if len(choice.strip()) == 0:
+                raise SkipInput()
+            try:
+                result = self._resolve(choice)
+            except IllegalChoice as e:
+                self._io.write(e.args[0] if e.args else self._error_message)
+                continue
+            if result is None:
+                # several candidates displayed, the end-user shall refine the answer
+                continue
+            self._result = result
+            return self.result
+
+        assert False, "unreachable location"
+
+    def _resolve(self, choice):
+        """Returns the key selected by the answer, or None to ask again"""
+        try:
+            choice = int(choice)
+        except ValueError:
+            candidates = [(key, name) for key, name in self._lookup(choice) if key in self._choices]
+            if len(candidates) == 1:
+                return candidates[0][0]
+            if len(candidates) == 0:
+                raise IllegalChoice()
+            for key, name in candidates:
+                self._io.write(f'{key:<3} - {name}')
+            return None
+        if choice not in self._choices:
+            raise IllegalChoice()
+        return choice
+
+
+_BATCH_ENTRY = re.compile(r'\s*(\d+)\s*(?:[xX*]\s*(\d+))?\s*')
+_BATCH_HINT = re.compile(r'\d\s*[xX*]\s*\d')
+
+def is_batch(text):
+    """True if the answer is written with the compact order-entry syntax e.g. 4x15, 2x3, 5"""
+    return ',' in text or _BATCH_HINT.search(text) is not None
+
+def parse_batch(text, item_keys, max_quantity):
+    """Parse the compact order-entry syntax in one pass: item[xquantity], item[xquantity]...
+    A missing quantity means 1. The same item entered twice has its quantities summed,
+    the limit max_quantity applying to the sum.
+    The whole line is validated before anything is returned: a single wrong entry
+    rejects the batch, raising IllegalChoice with a message for the end-user.
+    Returns the list of (item key, quantity) in the order of entry.
+    """
+    batch = {}
+    for entry in text.split(','):
+        match = _BATCH_ENTRY.fullmatch(entry)
+        if not match:
+            raise IllegalChoice(f'cannot read "{entry.strip()}", please enter item or itemxquantity e.g. 4x15, 2x3, 5')
+        key = int(match.group(1))
+        quantity = int(match.group(2)) if match.group(2) else 1
+        if key not in item_keys:
+            raise IllegalChoice(f'item {key} is not on the menu')
+        total = batch.get(key, 0) + quantity
+        if quantity < 1 or total > max_quantity:
+            raise IllegalChoice(f'up to {max_quantity} please for item {key}')
+        batch[key] = total
+    return list(batch.items())
+
+
+class OrderLineQuestion(NameQuestion):
+    """Same as the NameQuestion, but the answer can also be a whole batch of items
+    written with the compact order-entry syntax e.g. 4x15, 2x3, 5
+    The result is then the list of (item key, quantity), see parse_batch.
+    """
+    def __init__(self, question, val_range, lookup, item_keys, max_quantity, *, error_message=None, io=None):
+        super().__init__(question, val_range, lookup, error_message=error_message, io=io)
+        # as IntegerQuestion: a range is kept as is, asking stays O(1) whatever the menu size
+        self._item_keys = item_keys if isinstance(item_keys, (range, frozenset)) else frozenset(item_keys)
+        self._max_quantity = max_quantity
+
+    def _resolve(self, choice):
+        if is_batch(choice):
+            return parse_batch(choice, self._item_keys, self._max_quantity)
+        return super()._resolve(choice)
+
+
 class EnumQuestion(Question):
     """The answer to this question is expected to be based on an enumeration.
     The format is a list of candidates represented as tuples.
     tuple(value to be keyed, short description in plain english, object to return upon selection)
     """
-    def __init__(self, enum):
+    def __init__(self, enum, *, io=None):
         # enum format = List[(value,description,object)]
         question = "Select [" + ", ".join(str(x[0])+'-'+x[1] for x in enum) + ']'
         error_message = f"please select an numeric choice from [{', '.join(str(x[0])+'-'+x[1] for x in enum)}]. Thank you."
-        super().__init__(question, error_message)
+        super().__init__(question, error_message, io)
         self._enum = enum
+        # first occurrence of a key wins, as in a scan of the enumeration
+        self._lookup = {}
+        for e in reversed(enum):
+            self._lookup[e[0]] = e[2]
 
     def ask(self):
         """
@@ -92,21 +203,20 @@ class EnumQuestion(Question):
         """
         while True:
             try:
-                choice = input(self._question + ": ")
+                choice = self._io.read(self._question + ": ")
                 if len(choice.strip()) == 0:
                     raise SkipInput
                 choice = int(choice)
-                for e in self._enum:
-                    if choice == e[0]:
-                        self._result = e[2]
-                        return self.result
-                raise IllegalChoice()
+                if choice not in self._lookup:
+                    raise IllegalChoice()
+                self._result = self._lookup[choice]
+                return self.result
             except TypeError:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except IllegalChoice:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except ValueError as e:
-                print(self._error_message)
+                self._io.write(self._error_message)
             except SkipInput as e:
                 raise e
 
@@ -6,6 +6,7 @@ __author__ = "Bertrand Blanc (Alan Turing)"
 import unittest
 from unittest.mock import patch
 from questions import *
+from questions import IllegalChoice
 
 
 class TestQuestions(unittest.TestCase):
@@ -49,6 +50,60 @@ class TestQuestions(unittest.TestCase):
             self.assertEqual(q,x)
 
 
+    @patch('builtins.print')
+    @patch('builtins.input', create=True)
+    def test_namequestion(self, mocked_input, mocked_print):
+        names = {1: "Bacon Cheese", 2: "Bacon Bacon", 3: "Mushroom Swiss"}
+        lookup = lambda text: [(k, v) for k, v in names.items() if text.lower() in v.lower()]
+
+        mocked_input.side_effect = ["swiss"]
+        self.assertEqual(NameQuestion("pick", range(1,4), lookup).ask(), 3)
+
+        mocked_input.side_effect = ["bacon", "pizza", "12", "bacon bacon"]
+        self.assertEqual(NameQuestion("pick", range(1,4), lookup).ask(), 2)
+        self.assertEqual(mocked_print.call_count, 4)
+
+        mocked_input.side_effect = ["2"]
+        self.assertEqual(NameQuestion("pick", range(1,4), lookup).ask(), 2)
+
+        # candidates outside the range are not eligible
+        mocked_input.side_effect = ["bacon"]
+        self.assertEqual(NameQuestion("pick", range(2,4), lookup).ask(), 2)
+
+        with self.assertRaises(SkipInput):
+            mocked_input.side_effect = ["  "]
+            NameQuestion("pick", range(1,4), lookup).ask()
+
+
+    def test_parse_batch(self):
+        keys = range(1,6)
+        self.assertEqual(parse_batch("4x15, 2x3, 5", keys, 50), [(4,15), (2,3), (5,1)])
+        self.assertEqual(parse_batch(" 4 X 15,4*2 ", keys, 50), [(4,17)])
+        for text in ["4x15, 7x2", "4x51", "4x0", "4x", "a, 2", "4x15,,2", "4x2x3", "4x30, 4x30", "4x50, 4", "4x5, 4x0"]:
+            with self.assertRaises(IllegalChoice):
+                parse_batch(text, keys, 50)
+
+
+    @patch('builtins.print')
+    @patch('builtins.input', create=True)
+    def test_orderlinequestion(self, mocked_input, mocked_print):
+        lookup = lambda text: [(3, "Mushroom Swiss")] if "swiss".startswith(text) else []
+        q = OrderLineQuestion("pick", range(1,12), lookup, range(1,6), 50)
+
+        mocked_input.side_effect = ["4x15, 9x2", "4x15, 2x3, 5"]
+        self.assertEqual(q.ask(), [(4,15), (2,3), (5,1)])
+        mocked_print.assert_called_once_with("item 9 is not on the menu")
+
+        mocked_input.side_effect = ["9"]
+        self.assertEqual(q.ask(), 9)
+
+        # the keys of a big menu are not copied at each question
+        keys = range(1, 10**6+1)
+        self.assertIs(OrderLineQuestion("pick", range(1, 10**6+7), lookup, keys, 50)._item_keys, keys)
+        mocked_input.side_effect = ["sw"]
+        self.assertEqual(q.ask(), 3)
+
+
     @patch('builtins.input', create=True)
     def test_enumquestion_basic(self, mocked_input):
         enum = [(2,"choice 1", 3), (3,"choice 2", [2,3])]
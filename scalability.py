@@ -0,0 +1,118 @@
+"""
+Scalability harness for large menus, going through the real code paths:
+a synthetic menu is generated in the burger.json.txt format, then loaded by
+Menu.load, keyed by MenuDecoratorForOrder and rendered once. For each size,
+the harness reports:
+. the load time (Menu.load, including the indexes)
+. the construction time of the keyed decorator
+. the latency of the first rendering of the menu
+. the peak resident memory (RSS) of the process
+
+Each size runs in a fresh process, the peak RSS being a high-water mark:
+
+    python scalability.py --sizes 1000 10000 100000 1000000 --output scalability.json
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["generate_menu", "measure_menu", "run"]
+
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from time import perf_counter
+from random import Random
+import subprocess
+import tempfile
+import argparse
+import json
+import sys
+import os
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows: the peak RSS is not reported
+    resource = None
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+_ADJECTIVES = ["Classic", "Double", "Spicy", "Smoky", "Crispy", "Deluxe", "Veggie", "Western", "Royal", "Mini"]
+_NAMES = ["Burger", "Cheese", "Bacon", "Mushroom", "Chicken", "Swiss", "Avocado", "Jalapeno", "Onion", "BBQ"]
+
+
+def generate_menu(file, size, seed=0):
+    """Write a synthetic menu of size burgers in the format of burger.json.txt"""
+    rng = Random(seed)
+    burgers = [{'name': f'{rng.choice(_ADJECTIVES)} {rng.choice(_NAMES)} {i}', 'price': round(rng.uniform(2.0, 15.0), 2)}
+               for i in range(size)]
+    with open(file, 'w') as fd:
+        fd.write(json.dumps({'burgers': burgers}))
+
+
+def peak_rss():
+    """Peak resident memory of the current process in bytes, None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_menu(file):
+    """Load, key and render the menu of file, in the current process"""
+    start = perf_counter()
+    menu = Menu()
+    menu.load(file)
+    loaded = perf_counter()
+    keyed = MenuDecoratorForOrder(menu)
+    constructed = perf_counter()
+    str(keyed)
+    rendered = perf_counter()
+    return {
+        'size': len(keyed),
+        'load': loaded - start,
+        'construction': constructed - loaded,
+        'first_render': rendered - constructed,
+        'peak_rss': peak_rss(),
+    }
+
+
+def run(sizes=DEFAULT_SIZES, seed=0, verbose=True):
+    """Measure each size in a child process. Returns the list of measures."""
+    measures = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            file = os.path.join(folder, f'menu_{size}.json')
+            generate_menu(file, size, seed)
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', file],
+                                   capture_output=True, text=True, check=True)
+            measure = json.loads(child.stdout)
+            measures.append(measure)
+            if verbose:
+                rss = f"{measure['peak_rss']/2**20:9.1f} MiB" if measure['peak_rss'] else '        n/a'
+                print(f"{size:>9d} items: load {measure['load']*1e3:10.1f} ms"
+                      f" | decorator {measure['construction']*1e3:10.1f} ms"
+                      f" | first render {measure['first_render']*1e3:10.1f} ms"
+                      f" | peak RSS {rss}")
+    return measures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='store the measures as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_menu(args.child)))
+        return
+
+    measures = run(args.sizes, args.seed)
+    if args.output:
+        with open(args.output, 'w') as fd:
+            fd.write(json.dumps(measures, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Read-only menu in shared memory, for the deployments running one process per
+register. Instead of each process parsing the JSON file and holding its own copy
+of the menu, one loader process publishes the menu into a shared memory block,
+and the registers attach to it: the prices and the names are read in place,
+without any copy, so that adding registers does not add copies of the menu.
+The items of a register only hold their key. The lookup by name bisects a sorted
+index of the name tokens, also published into the block, rather than building an
+index per process.
+
+Layout of the block, native byte order:
+. header: magic b'MENU', number of items n, size of the name blob,
+  number of tokens m, size of the token blob
+. prices: n doubles
+. offsets: n+1 unsigned ints, the name of item k (from 1) is blob[offsets[k-1]:offsets[k]]
+. kinds: n bytes, index of the item class in SharedMenu.kinds
+. blob: the UTF-8 names one after the other
+. token offsets: m+1 unsigned ints, token t is token blob[token offsets[t]:token offsets[t+1]]
+. token keys: m unsigned ints, the key of the item of token t
+. token blob: the case-folded UTF-8 tokens of the names (see NameIndex.tokenize),
+  sorted, one after the other
+
+    # loader process
+    shared = SharedMenu.publish(Menu(auto_load=True), name='diner_menu')
+    # register processes
+    menu = SharedMenu.attach('diner_menu')
+    menu[2].name, menu.price(2)
+    order = Order(menu=menu)
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["SharedMenu"]
+
+from menuitem import MenuItem, Burger, Beverage, ItemDisplay
+from menuindex import NameIndex
+from multiprocessing import shared_memory, resource_tracker
+import struct
+
+_HEADER = struct.Struct('=4sIIII')
+_MAGIC = b'MENU'
+
+# blocks published by this process, see _attach
+_published = set()
+
+
+def _align(offset, size):
+    return (offset + size - 1) // size * size
+
+
+def _layout(n, blob_size, m, token_blob_size):
+    """Offsets of the prices, offsets, kinds, blob, token offsets, token keys and
+    token blob, and the total size"""
+    prices = _align(_HEADER.size, 8)
+    offsets = prices + 8*n
+    kinds = offsets + 4*(n+1)
+    blob = kinds + n
+    token_offsets = _align(blob + blob_size, 4)
+    token_keys = token_offsets + 4*(m+1)
+    token_blob = token_keys + 4*m
+    return prices, offsets, kinds, blob, token_offsets, token_keys, token_blob, token_blob + token_blob_size
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: attaching does not make the process responsible for the block
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:
+            # otherwise the block is unlinked when the first register exits
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class _SharedItem(MenuItem):
+    """Menu item read in place from the shared block, the process only holds its key"""
+    __slots__ = ('_menu', '_key')
+
+    def __init__(self, menu, key):
+        self._menu = menu
+        self._key = key
+
+    @property
+    def name(self):
+        return self._menu.item_name(self._key)
+
+    @property
+    def price(self):
+        return self._menu.price(self._key)
+
+
+class _Keys():
+    """Item -> key of a shared menu, as MenuDecoratorForOrder._keys: the key is held by the item"""
+    __slots__ = ('_menu',)
+
+    def __init__(self, menu):
+        self._menu = menu
+
+    def __getitem__(self, item):
+        if not isinstance(item, _SharedItem) or item._menu is not self._menu:
+            raise KeyError(item)
+        return item._key
+
+
+class SharedMenu():
+    """Menu items of a shared memory block, keyed from 1 as in MenuDecoratorForOrder,
+    with the same interface for Order: menu[key], find, bag and _keys.
+    The menu items are built on first access by key, then cached by the process
+    for their identity; they only hold their key."""
+    kinds = (Burger, Beverage)
+    # item class of each kind, e.g. still a Burger for the tax class
+    _item_kinds = tuple(type(f'Shared{kind.__name__}', (_SharedItem, kind), {'__slots__': ()}) for kind in kinds)
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self._owner = owner
+        magic, n, blob_size, m, token_blob_size = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'{shm.name} is not a shared menu')
+        self._n = n
+        self._m = m
+        prices, offsets, kinds, blob, token_offsets, token_keys, token_blob, end = _layout(n, blob_size, m, token_blob_size)
+        # views over the block, no copy
+        self._prices = shm.buf[prices:offsets].cast('d')
+        self._offsets = shm.buf[offsets:kinds].cast('I')
+        self._kinds = shm.buf[kinds:blob]
+        self._blob = shm.buf[blob:blob+blob_size]
+        self._token_offsets = shm.buf[token_offsets:token_keys].cast('I')
+        self._token_keys = shm.buf[token_keys:token_blob].cast('I')
+        self._token_blob = shm.buf[token_blob:end]
+        self._cache = {}
+        self._keys = _Keys(self)
+
+    @classmethod
+    def publish(cls, menu, name=None):
+        """Copy the items of a Menu into a new shared memory block.
+        The publisher owns the block: it is destroyed by its unlink()."""
+        items = list(menu.bag)
+        names = [item.name.encode() for item in items]
+        blob_size = sum(len(name) for name in names)
+        tokens = sorted({(token.encode(), key) for key, item in enumerate(items, 1) for token in NameIndex.tokenize(item.name)})
+        token_blob_size = sum(len(token) for token, _ in tokens)
+        prices, offsets, kinds, blob, token_offsets, token_keys, token_blob, size = \
+            _layout(len(items), blob_size, len(tokens), token_blob_size)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        _published.add(shm.name)
+        buf = shm.buf
+        _HEADER.pack_into(buf, 0, _MAGIC, len(items), blob_size, len(tokens), token_blob_size)
+        struct.pack_into(f'={len(items)}d', buf, prices, *[item.price for item in items])
+        position = 0
+        bounds = [0]
+        for encoded in names:
+            buf[blob+position:blob+position+len(encoded)] = encoded
+            position += len(encoded)
+            bounds.append(position)
+        struct.pack_into(f'={len(bounds)}I', buf, offsets, *bounds)
+        buf[kinds:blob] = bytes(cls.kinds.index(type(item)) if type(item) in cls.kinds else 0 for item in items)
+        buf[token_blob:size] = b''.join(token for token, _ in tokens)
+        bounds = [0]
+        for token, _ in tokens:
+            bounds.append(bounds[-1] + len(token))
+        struct.pack_into(f'={len(bounds)}I', buf, token_offsets, *bounds)
+        struct.pack_into(f'={len(tokens)}I', buf, token_keys, *[key for _, key in tokens])
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to the block published under that name"""
+        return cls(_attach(name))
+
+    @property
+    def name(self):
+        """Name of the shared memory block, to be passed to the registers"""
+        return self._shm.name
+
+    def __len__(self):
+        return self._n
+
+    def max_key(self):
+        return self._n
+
+    def _check(self, key):
+        if not isinstance(key, int) or not 1 <= key <= self._n:
+            raise IndexError(f'index {key} not found')
+
+    def price(self, key):
+        self._check(key)
+        return self._prices[key-1]
+
+    def item_name(self, key):
+        self._check(key)
+        return bytes(self._blob[self._offsets[key-1]:self._offsets[key]]).decode()
+
+    def __getitem__(self, key):
+        item = self._cache.get(key)
+        if item is None:
+            self._check(key)
+            item = self._cache[key] = self._item_kinds[self._kinds[key-1]](self, key)
+        return item
+
+    def __iter__(self):
+        for key in range(1, self._n+1):
+            yield self[key]
+
+    @property
+    def bag(self):
+        """(key, item) of all the items, in key order"""
+        return [(key, self[key]) for key in range(1, self._n+1)]
+
+    def _token(self, t):
+        return bytes(self._token_blob[self._token_offsets[t]:self._token_offsets[t+1]])
+
+    def _bisect(self, token):
+        """Index of the first token not below token, bisected in the block"""
+        low, high = 0, self._m
+        while low < high:
+            middle = (low + high) // 2
+            if self._token(middle) < token:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix(self, token):
+        """Range of the tokens starting with token: no UTF-8 byte is 0xFF"""
+        return range(self._bisect(token), self._bisect(token + b'\xff'))
+
+    def find(self, fragment):
+        """Menu items matching the name fragment, as a list of (key, item), with the
+        same matching as NameIndex: each token is the prefix of a token of the name"""
+        tokens = NameIndex.tokenize(fragment)
+        if not tokens:
+            return []
+        # start from the most selective token, filter with the others
+        ranges = sorted((self._prefix(token.encode()) for token in tokens), key=len)
+        keys = set(self._token_keys[ranges[0].start:ranges[0].stop])
+        for other in ranges[1:]:
+            if not keys:
+                break
+            keys.intersection_update(self._token_keys[other.start:other.stop])
+        return [(key, self[key]) for key in sorted(keys)]
+
+    def records(self):
+        """Records {'name', 'price'} in key order, as in the JSON file"""
+        return [{'name': self.item_name(key), 'price': self.price(key)} for key in range(1, self._n+1)]
+
+    def __str__(self):
+        column_size = max([self._offsets[k] - self._offsets[k-1] for k in range(1, self._n+1)], default=16) + 4
+        line = '=' * (column_size + 20)
+        buf = line + '\n' + f'{" MENU ":=^{column_size + 20}}' + '\n' + line + '\n'
+        for key in range(1, self._n+1):
+            buf += format(str(key), "2>") + str(ItemDisplay(self[key], column_size=column_size)) + "\n"
+        return buf + line
+
+    def close(self):
+        """Detach from the block"""
+        for view in (self._prices, self._offsets, self._kinds, self._blob, self._token_offsets, self._token_keys, self._token_blob):
+            view.release()
+        self._shm.close()
+
+    def unlink(self):
+        """Destroy the block, once all the registers detached. Publisher only."""
+        if not self._owner:
+            raise PermissionError('only the publisher of the menu can destroy it')
+        _published.discard(self._shm.name)
+        self._shm.unlink()
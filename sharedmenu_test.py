@@ -0,0 +1,136 @@
+"""Test the package sharedmenu"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from sharedmenu import *
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from scalability import generate_menu
+from menuitem import Burger, Beverage
+from order import Order, OrderTermination
+from questionio import QueueIO
+from checkpoint import Checkpoint
+from wal import WriteAheadLog, recover
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+import unittest
+import tempfile
+import os
+
+
+def register(name):
+    """Worker process attaching to the shared menu"""
+    menu = SharedMenu.attach(name)
+    try:
+        return [(item.name, item.price) for item in menu]
+    finally:
+        menu.close()
+
+
+class TestSharedMenu(unittest.TestCase):
+    test_file = "_test_shared_synthetic.json"
+
+    def setUp(self):
+        self.menu = Menu(auto_load=True)
+        self.shared = SharedMenu.publish(self.menu)
+
+    def tearDown(self):
+        self.shared.close()
+        self.shared.unlink()
+
+    def test_same_as_menu(self):
+        keyed = MenuDecoratorForOrder(self.menu)
+        self.assertEqual(len(self.shared), len(keyed))
+        for key in range(1, len(keyed)+1):
+            self.assertEqual(self.shared[key].name, keyed[key].name)
+            self.assertEqual(self.shared.price(key), keyed[key].price)
+        self.assertIs(self.shared[1], self.shared[1])
+        self.assertEqual(str(self.shared), str(keyed))
+        self.assertEqual(self.shared.records(), [{'name': item.name, 'price': item.price} for item in self.menu.bag])
+        with self.assertRaises(IndexError):
+            self.shared.price(0)
+
+    def test_attach(self):
+        menu = SharedMenu.attach(self.shared.name)
+        self.assertEqual(menu.item_name(5), "Don Cali Burger")
+        with self.assertRaises(PermissionError):
+            menu.unlink()
+        menu.close()
+
+        with ProcessPoolExecutor(2) as executor:
+            results = list(executor.map(register, [self.shared.name]*4))
+        expected = [(item.name, item.price) for item in self.menu.bag]
+        self.assertEqual(results, [expected]*4)
+
+    def test_kinds(self):
+        menu = Menu()
+        menu.load_records([{'name': 'Crème Brûlée Burger', 'price': 7.5}])
+        menu.load_records([{'name': 'Soda', 'price': 1.5}], Beverage)
+        shared = SharedMenu.publish(menu)
+        try:
+            self.assertIsInstance(shared[1], Burger)
+            self.assertIsInstance(shared[2], Beverage)
+            self.assertEqual(shared[1].name, 'Crème Brûlée Burger')
+            self.assertEqual([key for key, _ in shared.find('crème brû')], [1])
+        finally:
+            shared.close()
+            shared.unlink()
+
+    def test_keyed_interface(self):
+        keyed = MenuDecoratorForOrder(self.menu)
+        for fragment in ["swi", "BURGER", "de an", "cali x", ""]:
+            self.assertEqual([(key, item.name) for key, item in self.shared.find(fragment)],
+                             [(key, item.name) for key, item in keyed.find(fragment)])
+        self.assertEqual([(key, item.name) for key, item in self.shared.bag], [(key, item.name) for key, item in keyed.bag])
+        self.assertEqual(self.shared._keys[self.shared[4]], 4)
+        with self.assertRaises(KeyError):
+            self.shared._keys[keyed[4]]
+
+    def test_find_synthetic(self):
+        generate_menu(self.test_file, 2000, seed=5)
+        menu = Menu()
+        menu.load(self.test_file)
+        os.remove(self.test_file)
+        keyed = MenuDecoratorForOrder(menu)
+        shared = SharedMenu.publish(menu)
+        try:
+            for fragment in ["b", "bacon", "bacon swi", "burger 19", "1", "zz", "DE ANZA"]:
+                self.assertEqual([(key, item.name) for key, item in shared.find(fragment)],
+                                 [(key, item.name) for key, item in keyed.find(fragment)])
+        finally:
+            shared.close()
+            shared.unlink()
+
+    @patch('builtins.print')
+    def test_order(self, mocked_print):
+        # swi: Mushroom Swiss, 4 of them, then 2 Bacon Cheese in a batch, 11: quit
+        order = Order(menu=self.shared, io=QueueIO(["swi", "4", "2x2", "11"]))
+        try:
+            order.fill()
+        except OrderTermination:
+            pass
+        self.assertEqual([(t.item.name, t.quantity) for t in order.transactions], [("Mushroom Swiss", 4), ("Bacon Cheese", 2)])
+
+    def test_recovery(self):
+        with tempfile.TemporaryDirectory() as folder:
+            checkpoint = Checkpoint(os.path.join(folder, 'register.ckpt'))
+            with WriteAheadLog(os.path.join(folder, 'orders.wal')) as log:
+                order = Order(menu=self.shared, checkpoint=checkpoint, wal=log)
+                order.add_batch([(3, 4), (2, 2)])
+            expected = [(t.id, t.item.name, t.quantity) for t in order.transactions]
+
+            # the register restarts, attached to the shared menu
+            menu = SharedMenu.attach(self.shared.name)
+            try:
+                transactions = recover(os.path.join(folder, 'orders.wal'), menu)[order.id]
+                self.assertEqual([(t.id, t.item.name, t.quantity) for t in transactions], expected)
+                resumed = Order(menu=menu)
+                self.assertEqual(checkpoint.restore(resumed), 0)
+                self.assertEqual([(t.id, t.item.name, t.quantity) for t in resumed.transactions], expected)
+                self.assertIs(resumed.transactions[1].item, menu[3])
+            finally:
+                menu.close()
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
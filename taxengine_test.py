@@ -0,0 +1,59 @@
+"""Test the batch tax engine against Order.compute"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from taxengine import *
+from order import Order
+from person import Student, Staff
+from random import Random
+import unittest
+
+
+class TestBatchTaxEngine(unittest.TestCase):
+    def random_orders(self, count, seed=5):
+        rng = Random(seed)
+        orders = []
+        for _ in range(count):
+            order = Order()
+            order.add_batch([(rng.randint(1, len(order.menu)), rng.randint(1, Order.MAX_ITEM)) for _ in range(rng.randint(1, 8))])
+            orders.append((order, rng.choice([Student, Staff])()))
+        return orders
+
+    def test_identical_to_order_compute(self):
+        orders = self.random_orders(200)
+        engine = BatchTaxEngine()
+        engine.extend(orders)
+        self.assertEqual(len(engine), 200)
+        results = engine.compute()
+
+        for order, customer in orders:
+            customer.compute(order)
+            self.assertEqual(results[order]['pre_tax'], order.pre_tax)
+            self.assertEqual(results[order]['tax_rate'], order.tax_rate)
+            self.assertEqual(results[order]['taxes'], order.taxes)
+            self.assertEqual(results[order]['grand_total'], order.post_tax)
+
+    def test_apply(self):
+        orders = self.random_orders(20)
+        engine = BatchTaxEngine()
+        engine.extend(orders)
+        engine.apply()
+        for order, customer in orders:
+            totals = (order.pre_tax, order.tax_rate, order.taxes, order.post_tax)
+            self.assertGreater(order.pre_tax, 0)
+            customer.compute(order)
+            self.assertEqual(totals, (order.pre_tax, order.tax_rate, order.taxes, order.post_tax))
+
+    def test_summary(self):
+        orders = self.random_orders(30)
+        engine = BatchTaxEngine()
+        engine.extend(orders)
+        summary = engine.summary()
+        self.assertEqual(sum(group['orders'] for group in summary.values()), 30)
+        self.assertEqual(summary['Student']['taxes'], 0.0)
+        self.assertGreater(summary['Staff']['taxes'], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,64 @@
+"""
+Multi-rate taxes: the tax rate of a line depends on the tax class of the menu item
+(hot food, beverage, exempt) combined with the type of customer (Student, Staff).
+The effective rate of each (item, customer type) pair is precomputed when the menu
+loads, so that totalling an order is a lookup plus one multiply-accumulate per line,
+however many rules the table holds.
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["TaxTable", "HOT_FOOD", "BEVERAGE", "EXEMPT"]
+
+import weakref
+
+HOT_FOOD = "hot_food"
+BEVERAGE = "beverage"
+EXEMPT = "exempt"
+
+
+class TaxTable():
+    """Tax rates per (tax class, customer type).
+    rules = {(HOT_FOOD, Staff): 0.09, (BEVERAGE, Staff): 0.05, ...}
+    A pair without a rule falls back on the flat rate of the customer type.
+    """
+    def __init__(self, rules):
+        self._rules = dict(rules)
+        self._customers = {customer for _, customer in self._rules}
+        self._defaults = {}
+        # menu item -> {customer type: rate}, weakly keyed: the table outlives the
+        # menus loaded with it e.g. reloaded by a MenuWatcher
+        self._rates = weakref.WeakKeyDictionary()
+
+    def _default(self, customer):
+        if customer not in self._defaults:
+            self._defaults[customer] = customer()._tax_rate
+        return self._defaults[customer]
+
+    def rule(self, tax_class, customer):
+        return self._rules.get((tax_class, customer), self._default(customer))
+
+    def precompute(self, items):
+        """Effective rates of the menu items for all the customer types of the table"""
+        for item in items:
+            self._rates[item] = {customer: self.rule(item.tax_class, customer) for customer in self._customers}
+
+    def rate(self, item, customer):
+        """Effective rate of a menu item for a customer type"""
+        try:
+            return self._rates[item][customer]
+        except KeyError:
+            # item loaded without the table, or customer type without any rule
+            return self.rule(item.tax_class, customer)
+
+    def taxes(self, transactions, customer):
+        """Unrounded taxes of the transactions for a customer type"""
+        rates = self._rates
+        taxes = 0.0
+        for transaction in transactions:
+            item = transaction.item
+            try:
+                rate = rates[item][customer]
+            except KeyError:
+                rate = self.rule(item.tax_class, customer)
+            taxes += item.price * transaction.quantity * rate
+        return taxes
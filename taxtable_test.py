@@ -0,0 +1,69 @@
+"""Test the multi-rate tax table"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from taxtable import *
+from taxengine import BatchTaxEngine
+from transaction import Transaction
+from menuitem import Burger, Beverage
+from person import Student, Staff
+from menu import Menu
+from order import Order
+import unittest
+
+
+class TestTaxTable(unittest.TestCase):
+    rules = {(HOT_FOOD, Staff): 0.09, (BEVERAGE, Staff): 0.05, (EXEMPT, Staff): 0.0, (BEVERAGE, Student): 0.02}
+
+    def test_rates(self):
+        table = TaxTable(self.rules)
+        burger, soda, water = Burger("b", 5.0), Beverage("s", 2.0), Beverage("w", 1.0)
+        water.tax_class = EXEMPT
+        table.precompute([burger, soda, water])
+        self.assertEqual(table.rate(burger, Staff), 0.09)
+        self.assertEqual(table.rate(soda, Staff), 0.05)
+        self.assertEqual(table.rate(water, Staff), 0.0)
+        self.assertEqual(table.rate(soda, Student), 0.02)
+        # no rule: flat rate of the customer type
+        self.assertEqual(table.rate(burger, Student), 0.0)
+        self.assertEqual(table.rate(Burger("not loaded", 1.0), Staff), 0.09)
+
+    def test_taxes(self):
+        table = TaxTable(self.rules)
+        burger, soda = Burger("b", 5.0), Beverage("s", 2.0)
+        table.precompute([burger, soda])
+        lines = [Transaction(burger, 2), Transaction(soda, 3)]
+        self.assertAlmostEqual(table.taxes(lines, Staff), 10*0.09 + 6*0.05)
+        self.assertAlmostEqual(table.taxes(lines, Student), 6*0.02)
+
+    def test_menu_load(self):
+        table = TaxTable(self.rules)
+        menu = Menu(tax_table=table)
+        menu.load_records([{'name': 'Soda', 'price': 1.5}, {'name': 'Water', 'price': 1.0, 'tax_class': EXEMPT}], Beverage)
+        soda, water = menu.bag.to_list()
+        self.assertEqual(table._rates[soda][Staff], 0.05)
+        self.assertEqual(table._rates[water][Staff], 0.0)
+
+    def test_order(self):
+        table = TaxTable({(HOT_FOOD, Staff): 0.10})
+        order = Order(tax_table=table)
+        order.add_batch([(2, 5), (3, 10)])
+        Staff().compute(order)
+        lines = [(order.menu[2].price, 5), (order.menu[3].price, 10)]
+        self.assertEqual(order.taxes, round(sum(price*quantity*0.10 for price, quantity in lines), 2))
+        self.assertAlmostEqual(order.tax_rate, 0.1, places=3)
+        Student().compute(order)
+        self.assertEqual(order.taxes, 0.0)
+
+        # same as the batch engine
+        engine = BatchTaxEngine(table)
+        engine.add(order, Staff())
+        totals = engine.compute()[order]
+        Staff().compute(order)
+        self.assertEqual((totals['pre_tax'], totals['tax_rate'], totals['taxes'], totals['grand_total']),
+                         (order.pre_tax, order.tax_rate, order.taxes, order.post_tax))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)
@@ -0,0 +1,236 @@
+"""
+Write-ahead log of the edits of the orders in progress, shared by the sessions.
+Each edit appends a small binary record; the records are written and flushed
+to disk (fsync) by a background thread, all the records appended meanwhile by all
+the sessions at once (group commit): the end-user never waits for the disk, and
+the cost of an fsync is shared by all the edits of the interval.
+
+Record, 28 bytes plus the item name, little endian:
+. LSN: sequence number of the record in the log
+. order ID, menu key of the item, quantity
+. operation: SET (the quantity of the item, 0 to remove it), CLEAR (all the lines
+  removed, e.g. before the lines of an undo), END (order finalized or cancelled)
+. length of the item name, then the UTF-8 name
+. CRC32 of the above, to detect a torn record at the end of the log
+
+On startup, recover() replays the log into the transactions of the orders which
+did not end. As for the checkpoints (see ItemMatcher), an item is matched by its key,
+or by its name if the menu changed since (e.g. reloaded), and is skipped if no
+longer on the menu.
+
+    log = WriteAheadLog('orders.wal')
+    for order_id, transactions in recover('orders.wal', menu).items(): ...
+    order = Order(wal=log)
+"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+__all__ = ["WriteAheadLog", "recover", "replay", "SET", "CLEAR", "END", "RECORD_SIZE"]
+
+from transaction import Transaction
+from persistent import PersistentTransactions
+from menu4order import ItemMatcher
+from zlib import crc32
+import threading
+import struct
+import os
+
+SET = 1
+CLEAR = 2
+END = 3
+
+_BODY = struct.Struct('<QIIIBxH')
+_CRC = struct.Struct('<I')
+RECORD_SIZE = _BODY.size + _CRC.size # without the name
+
+
+def _pack(lsn, order_id, op, key, quantity, name):
+    name = name.encode()
+    record = _BODY.pack(lsn, order_id, key, quantity, op, len(name)) + name
+    return record + _CRC.pack(crc32(record))
+
+
+def _records(data):
+    """Valid records (end offset, lsn, order id, key, quantity, op, name) of data, up to the first torn one"""
+    view = memoryview(data)
+    offset = 0
+    while offset + RECORD_SIZE <= len(data):
+        lsn, order_id, key, quantity, op, length = _BODY.unpack_from(view, offset)
+        end = offset + _BODY.size + length
+        if end + _CRC.size > len(data) or _CRC.unpack_from(view, end)[0] != crc32(view[offset:end]):
+            return
+        name = bytes(view[offset+_BODY.size:end]).decode()
+        offset = end + _CRC.size
+        yield offset, lsn, order_id, key, quantity, op, name
+
+
+def _read(file):
+    try:
+        with open(file, 'rb') as fd:
+            return fd.read()
+    except FileNotFoundError:
+        return b''
+
+
+def replay(data, menu):
+    """{order id: PersistentTransactions} of the orders of the log data which did not end.
+    menu: the keyed menu the keys refer to."""
+    orders = {}
+    match = ItemMatcher(menu)
+    for _, _, order_id, key, quantity, op, name in _records(data):
+        if op == END:
+            orders.pop(order_id, None)
+            continue
+        transactions = orders.get(order_id, PersistentTransactions())
+        if op == CLEAR:
+            transactions = PersistentTransactions()
+        elif op == SET:
+            item = match(key, name)
+            # an item no longer on the menu is skipped
+            if item is not None:
+                try:
+                    transactions[item]
+                except KeyError:
+                    if quantity > 0:
+                        transactions = transactions.add(Transaction(item, quantity))
+                else:
+                    transactions = transactions.update(Transaction(item, quantity))
+        orders[order_id] = transactions
+    return orders
+
+
+def recover(file, menu):
+    """{order id: PersistentTransactions} of the orders in progress when the log was left"""
+    return replay(_read(file), menu)
+
+
+class WriteAheadLog():
+    """Append-only log shared by the sessions, flushed by group commit.
+    . interval: maximum delay in seconds before an appended record is on disk
+    . batch_size: records appended beyond this trigger the flush right away
+    """
+    def __init__(self, file, interval=0.01, batch_size=256):
+        self._file = file
+        self._interval = interval
+        self._batch_size = batch_size
+        self._lock = threading.Lock() # appends
+        self._flush_lock = threading.Lock() # one writer at a time
+        self._durable_changed = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._pending = bytearray()
+        self._pending_count = 0
+
+        data = _read(file)
+        end, self._lsn = 0, 0
+        for end, self._lsn, *_ in _records(data):
+            pass
+        self._durable = self._lsn
+        self._fd = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        # a torn record at the end is dropped, the next ones are appended after the last valid one
+        os.ftruncate(self._fd, end)
+
+        self._thread = threading.Thread(target=self._run, name='wal-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def durable_lsn(self):
+        """LSN of the last record on disk"""
+        return self._durable
+
+    def append(self, order_id, op, key=0, quantity=0, name=''):
+        """Append a record, returns its LSN. The record is on disk once durable_lsn reaches it.
+        name: name of the item, to match it if the menu changed"""
+        with self._lock:
+            self._lsn += 1
+            lsn = self._lsn
+            self._pending += _pack(lsn, order_id, op, key, quantity, name)
+            self._pending_count += 1
+            if self._pending_count >= self._batch_size:
+                self._wakeup.set()
+        return lsn
+
+    def extend(self, records):
+        """Append (order id, op, key, quantity, name) records, returns the LSN of the last one"""
+        lsn = self._lsn
+        for record in records:
+            lsn = self.append(*record)
+        return lsn
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            self._flush()
+
+    def _flush(self):
+        with self._flush_lock:
+            with self._lock:
+                data, self._pending = self._pending, bytearray()
+                self._pending_count = 0
+                lsn = self._lsn
+            if data:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self._fd, view):]
+                os.fsync(self._fd)
+            with self._durable_changed:
+                self._durable = lsn
+                self._durable_changed.notify_all()
+
+    def sync(self, lsn=None):
+        """Wait until the record lsn, the last appended one by default, is on disk"""
+        lsn = self._lsn if lsn is None else lsn
+        with self._durable_changed:
+            while self._durable < lsn:
+                self._wakeup.set()
+                self._durable_changed.wait(self._interval)
+
+    def compact(self, menu):
+        """Rewrite the log with the orders in progress only: a CLEAR then a SET per line each.
+        The LSNs go on increasing. Returns the number of orders in progress."""
+        with self._flush_lock:
+            with self._lock:
+                if self._pending:
+                    os.write(self._fd, bytes(self._pending))
+                    self._pending = bytearray()
+                    self._pending_count = 0
+                orders = recover(self._file, menu)
+                keys = menu._keys
+                lsn = self._lsn
+                data = bytearray()
+                for order_id, transactions in orders.items():
+                    lsn += 1
+                    data += _pack(lsn, order_id, CLEAR, 0, 0, '')
+                    for t in transactions:
+                        lsn += 1
+                        data += _pack(lsn, order_id, SET, keys[t.item], t.quantity, t.item.name)
+                temporary = self._file + '.tmp'
+                with open(temporary, 'wb') as fd:
+                    fd.write(data)
+                    fd.flush()
+                    os.fsync(fd.fileno())
+                os.replace(temporary, self._file)
+                os.close(self._fd)
+                self._fd = os.open(self._file, os.O_WRONLY | os.O_APPEND)
+                self._lsn = lsn
+            with self._durable_changed:
+                self._durable = lsn
+                self._durable_changed.notify_all()
+        return len(orders)
+
+    def close(self):
+        """Flush the last records and stop the writer"""
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+            self._flush()
+            os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,123 @@
+"""Test the package wal"""
+
+__author__ = "Bertrand Blanc (Alan Turing)"
+
+
+from wal import *
+from order import Order, OrderTermination
+from menu import Menu
+from menu4order import MenuDecoratorForOrder
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import unittest
+import tempfile
+import os
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._folder.name, 'orders.wal')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def lines(self, transactions):
+        return [(t.id, t.item.name, t.quantity) for t in transactions]
+
+    def record(self, menu, order_id, key, quantity):
+        return (order_id, SET, key, quantity, menu[key].name)
+
+    @patch('builtins.print')
+    def test_recover(self, mocked_print):
+        log = WriteAheadLog(self.file)
+        order = Order(wal=log)
+        order.add_batch([(2, 5), (4, 1), (1, 3)])
+        removed = order.transactions[2].item
+        order._apply(order.transactions.delete(order.transactions[2]), [removed])
+        order.undo()
+        order.redo()
+        order.add_batch([(2, 1)])
+        ended = Order(wal=log)
+        ended.add_batch([(3, 3)])
+        try:
+            ended.cancel()
+        except OrderTermination:
+            pass
+        log.close()
+
+        # the register restarts
+        orders = recover(self.file, order.menu)
+        self.assertEqual(list(orders), [order.id])
+        self.assertEqual(self.lines(orders[order.id]), self.lines(order.transactions))
+
+        resumed = Order()
+        resumed.resume(order.id, orders[order.id])
+        self.assertEqual(self.lines(resumed.transactions), [(1, 'Bacon Cheese', 6), (2, 'de Anza Burger', 3)])
+
+    def test_torn_record(self):
+        menu = Order().menu
+        with WriteAheadLog(self.file) as log:
+            log.extend([self.record(menu, 1, 2, 5), self.record(menu, 1, 3, 1)])
+        with open(self.file, 'ab') as fd:
+            fd.write(b'\x00' * (RECORD_SIZE // 2))
+        self.assertEqual(self.lines(recover(self.file, menu)[1]), [(1, 'Bacon Cheese', 5), (2, 'Mushroom Swiss', 1)])
+
+        # the torn record is dropped, the log goes on after the last valid one
+        with WriteAheadLog(self.file) as log:
+            self.assertEqual(log.append(*self.record(menu, 1, 2, 0)), 3)
+        self.assertEqual(os.path.getsize(self.file), 3 * RECORD_SIZE + len('Bacon Cheese')*2 + len('Mushroom Swiss'))
+        self.assertEqual(self.lines(recover(self.file, menu)[1]), [(1, 'Mushroom Swiss', 1)])
+
+    def test_group_commit(self):
+        menu = Order().menu
+        with WriteAheadLog(self.file, interval=0.005, batch_size=64) as log:
+            def session(order_id):
+                for quantity in range(1, 51):
+                    log.append(*self.record(menu, order_id, order_id % 5 + 1, quantity))
+                return log.append(*self.record(menu, order_id, 1, 1))
+            with ThreadPoolExecutor(8) as executor:
+                last = max(executor.map(session, range(1, 41)))
+            log.sync(last)
+            self.assertGreaterEqual(log.durable_lsn, last)
+            names = sum(50 * len(menu[order_id % 5 + 1].name) + len(menu[1].name) for order_id in range(1, 41))
+            self.assertEqual(os.path.getsize(self.file), 40 * 51 * RECORD_SIZE + names)
+
+            orders = recover(self.file, menu)
+            self.assertEqual(len(orders), 40)
+            self.assertEqual(orders[7][menu[3]].quantity, 50)
+
+            # compaction keeps the orders in progress only
+            log.append(7, END)
+            self.assertEqual(log.compact(menu), 39)
+            self.assertEqual(recover(self.file, menu).keys(), orders.keys() - {7})
+            # the LSNs go on increasing
+            self.assertGreater(log.append(1, END), 40*51 + 1)
+
+    @patch('builtins.print')
+    def test_changed_menu(self, mocked_print):
+        with WriteAheadLog(self.file) as log:
+            order = Order(wal=log)
+            order.add_batch([(1, 2), (3, 4), (5, 1)])
+        # "Mushroom Swiss" moved from key 3 to key 1, the other items were removed
+        menu = Menu()
+        menu.load_records([{'name': 'Mushroom Swiss', 'price': 6.25}])
+        orders = recover(self.file, MenuDecoratorForOrder(menu))
+        self.assertEqual([(t.item.name, t.quantity) for t in orders[order.id]], [('Mushroom Swiss', 4)])
+
+    def test_name_collision(self):
+        # same CRC32, swapped keys: matched by name
+        menu = Menu()
+        menu.load_records([{'name': 'plumless', 'price': 1}, {'name': 'buckeroo', 'price': 2}])
+        with WriteAheadLog(self.file) as log:
+            log.append(1, SET, 1, 3, 'plumless')
+            log.append(1, SET, 2, 5, 'buckeroo')
+        menu = Menu()
+        menu.load_records([{'name': 'buckeroo', 'price': 2}, {'name': 'plumless', 'price': 1}])
+        orders = recover(self.file, MenuDecoratorForOrder(menu))
+        self.assertEqual([(t.item.name, t.quantity) for t in orders[1]], [('plumless', 3), ('buckeroo', 5)])
+
+
+
+if __name__ == "__main__":
+    unittest.main(argv=['ignore'], exit=False, verbosity=2)